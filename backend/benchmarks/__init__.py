@@ -0,0 +1,3 @@
+"""
+Benchmarks des générateurs d'emploi du temps (voir run_benchmarks.py)
+"""
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks des générateurs d'emploi du temps
+
+Crée une base de test, y génère une université synthétique, puis exécute
+chaque générateur dans un processus séparé (mémoire de pointe isolée) en
+mesurant temps de construction du modèle, de résolution et de persistance,
+nombre de requêtes SQL, mémoire de pointe (RSS) et séances placées.
+Les résultats sont écrits en JSON pour comparer les commits entre eux.
+
+Usage:
+    python benchmarks/run_benchmarks.py --size small --output bench-small.json
+    python benchmarks/run_benchmarks.py --size medium --generators timetable_solver
+"""
+
+import os
+import sys
+import json
+import platform
+import subprocess
+import multiprocessing
+from datetime import datetime, timedelta, date
+from queue import Empty, Queue
+
+try:
+    import resource  # Unix uniquement
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+
+# Configuration Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from benchmarks.synthetic import SIZES, SyntheticUniversity
+
+# Lundi de référence pour les périodes générées
+BENCHMARK_START = date(2024, 9, 2)
+
+# Durée maximale d'un générateur avant d'arrêter son processus
+GENERATOR_TIMEOUT_SECONDS = 3600
+
+
+def _peak_rss_kb() -> int:
+    """Mémoire de pointe du processus et de ses fils (Ko sous Linux, None hors Unix)"""
+    if resource is None:
+        return None
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+
+
+def _reset_schedules():
+    """Supprimer les séances générées par un précédent générateur"""
+    from schedule.models import Schedule as LiveSchedule
+    from core import models as core_models
+
+    LiveSchedule.objects.all().delete()
+    EnhancedSchedule = getattr(core_models, 'Schedule', None)
+    if EnhancedSchedule is not None and EnhancedSchedule is not LiveSchedule:
+        EnhancedSchedule.objects.all().delete()
+
+
+def bench_timetable_solver(university: SyntheticUniversity) -> dict:
+    """Solveur CP-SAT (core/timetable_solver.py)"""
+    from core.timetable_solver import TimetableSolver
+
+    end_date = BENCHMARK_START + timedelta(weeks=university.params['weeks'], days=-3)
+    result = TimetableSolver(
+        university.admin, BENCHMARK_START, end_date, list(university.programs)
+    ).generate_timetable()
+
+    if not result['success']:
+        return {'error': result['error']}
+
+    stats = result['stats']
+    return {
+        'model_build_time': stats.get('model_build_time'),
+        'solve_time': stats.get('solver_wall_time'),
+        'persistence_time': stats.get('persistence_time'),
+        'sessions_placed': stats.get('total_sessions_planned'),
+        'details': stats,
+    }
+
+
+def bench_schedule_generator(university: SyntheticUniversity) -> dict:
+    """Générateur glouton (core/schedule_generator.py)"""
+    from core.schedule_generator import ScheduleGenerator
+
+    week_end = BENCHMARK_START + timedelta(weeks=university.params['weeks'], days=-3)
+    result = ScheduleGenerator().generate_full_schedule(BENCHMARK_START, week_end, university.admin)
+
+    return {
+        'sessions_placed': result['total_schedules'],
+        'conflicts': result['total_conflicts'],
+    }
+
+
+def bench_generation_view(university: SyntheticUniversity) -> dict:
+    """Vue API aléatoire (schedule/generation_views.generate_timetable)"""
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from schedule.generation_views import generate_timetable
+
+    request = APIRequestFactory().post(
+        '/api/schedules/generate/', {'program_ids': [p.id for p in university.programs]}, format='json'
+    )
+    force_authenticate(request, user=university.admin)
+    response = generate_timetable(request)
+
+    if response.status_code != 200:
+        return {'error': response.data.get('message')}
+
+    return {
+        'sessions_placed': response.data['stats']['schedules_created'],
+        'conflicts': response.data['stats']['conflicts_detected'],
+    }
+
+
+GENERATORS = {
+    'timetable_solver': bench_timetable_solver,
+    'schedule_generator': bench_schedule_generator,
+    'generation_view': bench_generation_view,
+}
+
+
+def _run_generator(name: str, university: SyntheticUniversity, queue):
+    """Exécuter un générateur (processus fils) et renvoyer ses mesures"""
+    measures = {'generator': name}
+    start = datetime.now()
+
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            measures.update(GENERATORS[name](university))
+        measures['query_count'] = len(queries.captured_queries)
+    except Exception as e:
+        measures['error'] = f"{type(e).__name__}: {e}"
+
+    measures['total_time'] = round((datetime.now() - start).total_seconds(), 3)
+    measures['peak_rss_kb'] = _peak_rss_kb()
+    queue.put(measures)
+
+
+def _run_in_child(name: str, university: SyntheticUniversity) -> dict:
+    """Exécuter un générateur dans un processus fils et attendre ses mesures
+    
+    Un fils qui meurt sans rien envoyer (signal, mémoire épuisée) ou qui dépasse
+    GENERATOR_TIMEOUT_SECONDS est signalé en erreur au lieu de bloquer le run.
+    """
+    context = multiprocessing.get_context('fork')
+    connections.close_all()
+    queue = context.Queue()
+    process = context.Process(target=_run_generator, args=(name, university, queue))
+    process.start()
+    
+    start = datetime.now()
+    measures = None
+    while measures is None:
+        try:
+            measures = queue.get(timeout=1)
+        except Empty:
+            elapsed = (datetime.now() - start).total_seconds()
+            if not process.is_alive():
+                # Dernière chance: les mesures ont pu arriver juste avant la fin du processus
+                try:
+                    measures = queue.get(timeout=1)
+                except Empty:
+                    measures = {'generator': name, 'error': f"Processus terminé sans résultat "
+                                                            f"(code de sortie {process.exitcode})"}
+            elif elapsed > GENERATOR_TIMEOUT_SECONDS:
+                process.terminate()
+                measures = {'generator': name, 'error': f"Délai dépassé ({GENERATOR_TIMEOUT_SECONDS}s)"}
+    
+    process.join()
+    if process.exitcode and 'error' not in measures:
+        measures['error'] = f"Code de sortie {process.exitcode}"
+    measures.setdefault('total_time', round((datetime.now() - start).total_seconds(), 3))
+    return measures
+
+
+def run_benchmarks(size: str, generators: list, seed: int = 42, **overrides) -> dict:
+    """Générer l'université synthétique puis mesurer chaque générateur"""
+    university = SyntheticUniversity(size, seed=seed, **overrides)
+
+    start = datetime.now()
+    counts = university.create()
+    setup_time = round((datetime.now() - start).total_seconds(), 3)
+
+    # Chaque générateur tourne dans un processus dédié (fork) pour isoler la
+    # mémoire de pointe; les connexions ne doivent pas être partagées. Sans
+    # fork (Windows), les générateurs tournent dans le processus courant.
+    fork = 'fork' in multiprocessing.get_all_start_methods()
+    results = []
+    for name in generators:
+        _reset_schedules()
+        if fork:
+            results.append(_run_in_child(name, university))
+        else:
+            queue = Queue()
+            _run_generator(name, university, queue)
+            results.append(queue.get_nowait())
+
+    return {
+        'size': size,
+        'seed': seed,
+        'params': university.params,
+        'dataset': counts,
+        'dataset_setup_time': setup_time,
+        'results': results,
+    }
+
+
+def _git_commit() -> str:
+    """Commit courant, pour comparer les runs entre eux"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks des générateurs d'emploi du temps")
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='Taille de l\'université')
+    parser.add_argument('--generators', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS),
+                        help='Générateurs à mesurer')
+    parser.add_argument('--seed', type=int, default=42, help='Graine du générateur synthétique')
+    parser.add_argument('--weeks', type=int, help='Nombre de semaines (remplace la taille prédéfinie)')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Fichier JSON de sortie')
+    parser.add_argument('--keepdb', action='store_true', help='Conserver la base de test entre deux runs')
+
+    args = parser.parse_args()
+    overrides = {'weeks': args.weeks} if args.weeks else {}
+
+    # Toujours travailler dans une base de test jetable
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        report = run_benchmarks(args.size, args.generators, seed=args.seed, **overrides)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    report.update({
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+    })
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print(f"📊 Benchmarks ({args.size}) écrits dans {args.output}")
+    for measures in report['results']:
+        status = measures.get('error') or f"{measures.get('sessions_placed')} séances"
+        print(f"  • {measures['generator']}: {measures['total_time']:.2f}s, "
+              f"{measures.get('query_count', '?')} requêtes - {status}")
+
+
+if __name__ == '__main__':
+    main()
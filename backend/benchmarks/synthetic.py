@@ -0,0 +1,198 @@
+"""
+Générateur d'universités synthétiques pour les benchmarks
+
+Crée en masse (bulk_create) départements, programmes, matières, enseignants,
+salles, étudiants et créneaux horaires (modèles de core.models).
+"""
+
+import random
+from datetime import time
+from typing import Dict
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.models import Department, Program, Room, Subject, Teacher, Student, TimeSlot
+
+User = get_user_model()
+
+# Tailles prédéfinies (par département sauf indication contraire)
+SIZES = {
+    'small': {
+        'departments': 2,
+        'programs_per_department': 2,
+        'subjects_per_program': 4,
+        'teachers_per_department': 6,
+        'rooms_per_department': 4,
+        'students_per_program': 20,
+        'slots_per_day': 4,
+        'weeks': 1,
+    },
+    'medium': {
+        'departments': 4,
+        'programs_per_department': 4,
+        'subjects_per_program': 6,
+        'teachers_per_department': 15,
+        'rooms_per_department': 8,
+        'students_per_program': 40,
+        'slots_per_day': 5,
+        'weeks': 2,
+    },
+    'large': {
+        'departments': 8,
+        'programs_per_department': 6,
+        'subjects_per_program': 8,
+        'teachers_per_department': 30,
+        'rooms_per_department': 15,
+        'students_per_program': 60,
+        'slots_per_day': 6,
+        'weeks': 4,
+    },
+}
+
+LEVELS = ['L1', 'L2', 'L3', 'M1', 'M2']
+SUBJECT_TYPES = ['lecture', 'td', 'lab']
+ROOM_TYPES = ['amphitheater', 'lecture', 'td', 'lab']
+DAYS = [0, 1, 2, 3, 4]  # Lundi à Vendredi
+
+# Horaires de début des créneaux de 2h (pause déjeuner 12h-14h)
+SLOT_START_HOURS = [8, 10, 14, 16, 18, 20]
+
+
+class SyntheticUniversity:
+    """Université synthétique reproductible (même graine -> mêmes données)"""
+
+    def __init__(self, size: str = 'small', seed: int = 42, **overrides):
+        if size not in SIZES:
+            raise ValueError(f"Taille inconnue: {size} (choix: {', '.join(SIZES)})")
+        self.size = size
+        self.params = {**SIZES[size], **overrides}
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.admin = None
+        self.programs = []
+        self.counts = {}
+
+    def create(self) -> Dict[str, int]:
+        """Créer toutes les données et retourner le nombre d'objets par type"""
+        p = self.params
+        rng = self.random
+        password = make_password('benchmark')
+
+        self.admin = User.objects.create(
+            email='admin@benchmark.local', username='benchmark_admin',
+            first_name='Admin', last_name='Benchmark', role='admin',
+            is_staff=True, is_superuser=True, password=password
+        )
+
+        departments = Department.objects.bulk_create([
+            Department(name=f"Département {d}", code=f"D{d:03d}")
+            for d in range(p['departments'])
+        ])
+
+        programs = Program.objects.bulk_create([
+            Program(
+                name=f"Programme {d}-{i}", code=f"P{d:03d}{i:02d}",
+                department=department, level=LEVELS[i % len(LEVELS)],
+                capacity=p['students_per_program']
+            )
+            for d, department in enumerate(departments)
+            for i in range(p['programs_per_department'])
+        ])
+        self.programs = programs
+
+        rooms = Room.objects.bulk_create([
+            Room(
+                name=f"Salle {d}-{i}", code=f"R{d:03d}{i:03d}",
+                room_type=ROOM_TYPES[i % len(ROOM_TYPES)],
+                capacity=rng.choice([30, 40, 60, 120]) if i % len(ROOM_TYPES) else 200,
+                department=department
+            )
+            for d, department in enumerate(departments)
+            for i in range(p['rooms_per_department'])
+        ])
+
+        subjects = Subject.objects.bulk_create([
+            Subject(
+                name=f"Matière {program.code}-{i}", code=f"S{program.code}{i:02d}",
+                department=program.department, subject_type=SUBJECT_TYPES[i % len(SUBJECT_TYPES)],
+                hours_per_week=rng.choice([2, 3, 4]), semester=1
+            )
+            for program in programs
+            for i in range(p['subjects_per_program'])
+        ])
+        SubjectProgram = Subject.program.through
+        SubjectProgram.objects.bulk_create([
+            SubjectProgram(subject_id=subject.id, program_id=program.id)
+            for program_index, program in enumerate(programs)
+            for subject in subjects[
+                program_index * p['subjects_per_program']:(program_index + 1) * p['subjects_per_program']
+            ]
+        ])
+
+        teacher_users = User.objects.bulk_create([
+            User(
+                email=f"teacher{d}.{i}@benchmark.local", username=f"teacher_{d}_{i}",
+                first_name=f"Enseignant{i}", last_name=f"D{d}", role='teacher',
+                department=department, password=password
+            )
+            for d, department in enumerate(departments)
+            for i in range(p['teachers_per_department'])
+        ])
+        teachers = Teacher.objects.bulk_create([
+            Teacher(
+                user=user, employee_id=f"T{index:05d}", specialization='Benchmark',
+                max_hours_per_week=rng.choice([12, 16, 20])
+            )
+            for index, user in enumerate(teacher_users)
+        ])
+
+        # Chaque matière est enseignable par 1 à 3 enseignants de son département
+        teachers_by_department = {}
+        for teacher, user in zip(teachers, teacher_users):
+            teachers_by_department.setdefault(user.department_id, []).append(teacher)
+        TeacherSubject = Teacher.subjects.through
+        links = []
+        for subject in subjects:
+            candidates = teachers_by_department[subject.department_id]
+            for teacher in rng.sample(candidates, min(len(candidates), rng.randint(1, 3))):
+                links.append(TeacherSubject(teacher_id=teacher.id, subject_id=subject.id))
+        TeacherSubject.objects.bulk_create(links)
+
+        student_users = User.objects.bulk_create([
+            User(
+                email=f"student{program.id}.{i}@benchmark.local", username=f"student_{program.id}_{i}",
+                first_name=f"Etudiant{i}", last_name=program.code, role='student',
+                program=program, password=password
+            )
+            for program in programs
+            for i in range(p['students_per_program'])
+        ])
+        Student.objects.bulk_create([
+            Student(
+                user=user, student_id=f"E{index:06d}", program_id=user.program_id,
+                enrollment_year=2024
+            )
+            for index, user in enumerate(student_users)
+        ])
+
+        time_slots = TimeSlot.objects.bulk_create([
+            TimeSlot(
+                day_of_week=day, start_time=time(hour, 0), end_time=time(hour + 2, 0),
+                name=f"{hour}h-{hour + 2}h", priority=rng.randint(1, 10)
+            )
+            for day in DAYS
+            for hour in SLOT_START_HOURS[:p['slots_per_day']]
+        ])
+
+        self.counts = {
+            'departments': len(departments),
+            'programs': len(programs),
+            'subjects': len(subjects),
+            'teachers': len(teachers),
+            'rooms': len(rooms),
+            'students': len(student_users),
+            'time_slots': len(time_slots),
+            'weeks': p['weeks'],
+        }
+        return self.counts
@@ -0,0 +1,195 @@
+# feasibility.py - Analyse de faisabilité avant résolution
+"""
+Analyse de faisabilité d'une instance avant de lancer le solveur
+
+Des bornes simples, calculées en quelques millisecondes sur les données
+collectées, détectent les demandes impossibles avant la résolution:
+
+    • effectifs des programmes face à la plus grande salle;
+    • séances requises face à la capacité salles × créneaux par type de salle;
+    • heures requises par les enseignants face à leur maximum hebdomadaire
+      et à leurs disponibilités.
+
+Comme dans le modèle, la demande porte sur toutes les semaines modélisées:
+les capacités hebdomadaires sont multipliées par le nombre de semaines.
+
+Les groupes de ressources sont testés avec la condition de Hall: la demande
+des affectations dont toutes les ressources possibles appartiennent au groupe
+ne peut dépasser la capacité du groupe. Chaque violation est une preuve
+d'infaisabilité, renvoyée sous forme de diagnostic exploitable.
+"""
+
+from typing import Dict, Iterable, List
+
+from core.problem_instance import ProblemInstance
+
+
+class InfeasibleProblemError(Exception):
+    """Demande impossible, accompagnée des diagnostics qui l'expliquent"""
+    
+    def __init__(self, message: str, diagnostics: List[Dict]):
+        super().__init__(message)
+        self.diagnostics = diagnostics
+
+
+def _diagnostic(code: str, message: str, **details) -> Dict:
+    """Construire un diagnostic sérialisable"""
+    return {'code': code, 'message': message, 'details': details}
+
+
+def _slot_minutes(instance: ProblemInstance, k: int) -> int:
+    """Durée d'un créneau en minutes"""
+    start, end = instance.slot_start[k], instance.slot_end[k]
+    return (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+
+
+def _room_types_label(instance: ProblemInstance, rooms: Iterable[int]) -> str:
+    """Libellé des types d'un groupe de salles"""
+    return ', '.join(sorted({str(instance.room_type[r]) for r in rooms}))
+
+
+def analyze_feasibility(instance: ProblemInstance, assignments: List[Dict],
+                        feasible_rooms: Dict[int, List[int]], feasible_slots: Dict[int, List[int]],
+                        unschedulable: List[Dict] = (), interval_model: bool = False,
+                        num_weeks: int = 1) -> List[Dict]:
+    """Détecter les demandes impossibles sans lancer le solveur
+    
+    Args:
+        instance: Données collectées
+        assignments: Affectations du solveur (indices denses, ``sessions_needed``,
+            ``session_minutes``, ``total_students``)
+        feasible_rooms / feasible_slots: Masques de faisabilité par affectation
+        unschedulable: Affectations écartées faute de salle, de créneau ou (modèle à
+            intervalles) de plage assez longue; chacune donne lieu à un diagnostic
+        interval_model: Capacités exprimées en minutes (séances de durée variable)
+            plutôt qu'en nombre de créneaux
+        num_weeks: Semaines modélisées (``sessions_needed`` est un total sur la période)
+    
+    Returns:
+        Liste de diagnostics {'code', 'message', 'details'}; vide si aucune
+        impossibilité n'est détectée
+    """
+    diagnostics = []
+    largest_room = max(instance.room_capacity, default=0)
+    
+    # 1. Programmes dont l'effectif dépasse toutes les salles
+    oversized_programs = set()
+    for program_id in instance.program_ids:
+        students = instance.student_counts.get(program_id, 0)
+        if students > largest_room:
+            oversized_programs.add(program_id)
+            diagnostics.append(_diagnostic(
+                'program_capacity',
+                f"Programme #{program_id}: {students} étudiants, mais la plus grande salle "
+                f"ne compte que {largest_room} places",
+                program_id=program_id, students=students, largest_room=largest_room
+            ))
+    
+    # 2. Affectations sans salle compatible ni enseignant disponible
+    for assignment in unschedulable:
+        subject_name = instance.subject_names[assignment['subject']]
+        if assignment.get('session_too_long'):
+            diagnostics.append(_diagnostic(
+                'session_length',
+                f"{subject_name}: aucune plage de la grille ne peut accueillir une séance "
+                f"de {assignment['session_minutes']} minutes",
+                subject_id=instance.subject_ids[assignment['subject']],
+                session_minutes=assignment['session_minutes']
+            ))
+        elif not assignment['teachers']:
+            diagnostics.append(_diagnostic(
+                'teacher_unavailable',
+                f"{subject_name}: aucun enseignant qualifié n'a de créneau disponible",
+                subject_id=instance.subject_ids[assignment['subject']]
+            ))
+        elif assignment['total_students'] > largest_room:
+            if oversized_programs.intersection(assignment['programs']):
+                continue  # Déjà signalé au niveau du programme
+            diagnostics.append(_diagnostic(
+                'room_capacity',
+                f"{subject_name}: {assignment['total_students']} étudiants (programmes regroupés), "
+                f"mais la plus grande salle ne compte que {largest_room} places",
+                subject_id=instance.subject_ids[assignment['subject']],
+                students=assignment['total_students'], largest_room=largest_room
+            ))
+        else:
+            room_types = ', '.join(assignment.get('room_types') or ())
+            diagnostics.append(_diagnostic(
+                'room_type',
+                f"{subject_name}: aucune salle de type {room_types} ne peut accueillir "
+                f"{assignment['total_students']} étudiants",
+                subject_id=instance.subject_ids[assignment['subject']],
+                room_types=list(assignment.get('room_types') or ()),
+                students=assignment['total_students']
+            ))
+    
+    schedulable = [a for a in assignments if a['id'] in feasible_rooms]
+    
+    def demand(assignment):
+        """Séances (ou minutes) requises sur la période"""
+        if interval_model:
+            return assignment['sessions_needed'] * assignment.get('session_minutes', 120)
+        return assignment['sessions_needed']
+    
+    def slot_capacity(slots):
+        """Capacité d'une salle ou d'un enseignant sur ces créneaux, sur la période"""
+        if interval_model:
+            return sum(_slot_minutes(instance, k) for k in slots) * num_weeks
+        return len(slots) * num_weeks
+    
+    unit = 'minutes' if interval_model else 'séances'
+    
+    # 3. Capacité salles × créneaux, par groupe de salles compatibles
+    room_sets = {a['id']: frozenset(feasible_rooms[a['id']]) for a in schedulable}
+    for rooms in set(room_sets.values()):
+        members = [a for a in schedulable if room_sets[a['id']] <= rooms]
+        slots = set().union(*(feasible_slots[a['id']] for a in members))
+        required = sum(demand(a) for a in members)
+        capacity = len(rooms) * slot_capacity(slots)
+        if required > capacity:
+            diagnostics.append(_diagnostic(
+                'room_type_capacity',
+                f"Salles de type {_room_types_label(instance, rooms)}: {required} {unit} requises "
+                f"pour {capacity} disponibles ({len(rooms)} salle(s) × {len(slots)} créneau(x) "
+                f"× {num_weeks} semaine(s))",
+                room_ids=sorted(instance.room_ids[r] for r in rooms),
+                subject_ids=[instance.subject_ids[a['subject']] for a in members],
+                required=required, capacity=capacity
+            ))
+    
+    # 4. Enseignants: heures maximales et disponibilités, par groupe d'enseignants qualifiés
+    teacher_sets = {a['id']: frozenset(a['teachers']) for a in schedulable}
+    for teachers in set(teacher_sets.values()):
+        if not teachers:
+            continue
+        members = [a for a in schedulable if teacher_sets[a['id']] <= teachers]
+        names = ', '.join(sorted(instance.teacher_names[t] for t in teachers))
+        teacher_ids = sorted(instance.teacher_ids[t] for t in teachers)
+        
+        required_hours = sum(
+            a['sessions_needed'] * a.get('session_minutes', 120) / 60 for a in members
+        )
+        max_hours = sum(instance.teacher_max_hours[t] for t in teachers) * num_weeks
+        if required_hours > max_hours:
+            diagnostics.append(_diagnostic(
+                'teacher_hours',
+                f"{names}: {required_hours:g}h requises pour un maximum de {max_hours}h "
+                f"sur {num_weeks} semaine(s)",
+                teacher_ids=teacher_ids,
+                subject_ids=[instance.subject_ids[a['subject']] for a in members],
+                required=required_hours, capacity=max_hours
+            ))
+        
+        required = sum(demand(a) for a in members)
+        available = sum(slot_capacity(instance.available_slots(t)) for t in teachers)
+        if required > available:
+            diagnostics.append(_diagnostic(
+                'teacher_availability',
+                f"{names}: {required} {unit} requises pour {available} disponibles "
+                f"sur {num_weeks} semaine(s)",
+                teacher_ids=teacher_ids,
+                subject_ids=[instance.subject_ids[a['subject']] for a in members],
+                required=required, capacity=available
+            ))
+    
+    return diagnostics
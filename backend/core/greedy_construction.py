@@ -0,0 +1,128 @@
+# greedy_construction.py - Construction gloutonne d'un emploi du temps
+"""
+Construction gloutonne sur un sous-problème sérialisable
+
+Même entrée que TimetableModel (identifiants et entiers uniquement), sans
+solveur: les affectations les plus contraintes sont placées en premier, sur
+les couples (salle, créneau) de plus forte priorité encore libres. Le
+résultat sert d'indice de solution à CP-SAT, ou de solution de repli pour
+les très grandes instances et les budgets épuisés sans solution.
+"""
+
+from typing import Dict, List, Tuple
+
+
+def _candidates(assignment: Dict, week: int, ranked: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Couples (poids, salle, créneau) à essayer pour une semaine"""
+    if assignment.get('fixed'):
+        room_priorities = dict(assignment['rooms'])
+        slot_priorities = dict(assignment['slots'])
+        return [
+            (slot_priorities[slot_id] * room_priorities[room_id], room_id, slot_id)
+            for room_id, slot_id, hint_week in assignment['hint'] if hint_week == week
+        ]
+    return ranked
+
+
+def greedy_construction(subproblem: Dict) -> Dict:
+    """Placer gloutonnement les séances d'un sous-problème
+    
+    Returns:
+        {
+            'selected': [(assignment_id, room_id, slot_id, week)],
+            'teachers': {assignment_id: teacher_id},
+            'objective': somme des poids placés,
+            'best_objective': majorant (chaque séance sur son meilleur couple),
+            'placed': séances placées, 'required': séances requises
+                (sessions_needed est un total sur les semaines, comme dans TimetableModel),
+            'num_assignments': nombre d'affectations du sous-problème,
+        }
+    """
+    num_weeks = subproblem['num_weeks']
+    teacher_max_hours = subproblem['teacher_max_hours']
+    
+    room_busy = set()      # (room_id, slot_id, week)
+    teacher_busy = set()   # (teacher_id, slot_id, week)
+    teacher_hours = {}     # (teacher_id, week) -> heures
+    
+    result = {
+        'selected': [], 'teachers': {}, 'objective': 0, 'best_objective': 0, 'placed': 0, 'required': 0,
+        'num_assignments': len(subproblem['assignments']),
+    }
+    
+    # Affectations figées d'abord, puis les moins de possibilités par séance
+    def options(assignment):
+        return len(assignment['rooms']) * len(assignment['slots']) / assignment['sessions_needed']
+    
+    order = sorted(
+        subproblem['assignments'],
+        key=lambda a: (not a.get('fixed'), options(a), a['id'])
+    )
+    
+    for assignment in order:
+        ranked = sorted(
+            (
+                (slot_priority * room_priority, room_id, slot_id)
+                for room_id, room_priority in assignment['rooms']
+                for slot_id, slot_priority in assignment['slots']
+            ),
+            key=lambda candidate: (-candidate[0], candidate[2], candidate[1])
+        )
+        hours_per_session = assignment['hours_per_session']
+        
+        def place(teacher_id):
+            """Placements possibles pour cet enseignant, sans les enregistrer"""
+            unavailable = set(assignment.get('unavailable', {}).get(teacher_id, ()))
+            max_hours = teacher_max_hours.get(teacher_id)
+            placements = []
+            remaining = assignment['sessions_needed']
+            
+            for week in range(num_weeks):
+                # Répartir le reste sur les semaines restantes (le déficit d'une semaine est reporté)
+                quota = remaining if assignment.get('fixed') else -(-remaining // (num_weeks - week))
+                hours = teacher_hours.get((teacher_id, week), 0)
+                used_slots = set()
+                for weight, room_id, slot_id in _candidates(assignment, week, ranked):
+                    if len(used_slots) == quota:
+                        break
+                    if max_hours is not None and hours + hours_per_session > max_hours:
+                        break
+                    if (slot_id in used_slots or slot_id in unavailable
+                            or (room_id, slot_id, week) in room_busy
+                            or (teacher_id, slot_id, week) in teacher_busy):
+                        continue
+                    placements.append((room_id, slot_id, week, weight))
+                    used_slots.add(slot_id)
+                    hours += hours_per_session
+                remaining -= len(used_slots)
+                if not remaining:
+                    break
+            
+            return placements
+        
+        # Enseignant publié d'abord; on garde le premier qui place toutes les séances
+        teachers = sorted(assignment['teachers'], key=lambda t: t != assignment.get('teacher_hint'))
+        required = assignment['sessions_needed']
+        best_teacher, best_placements = None, []
+        for teacher_id in teachers:
+            placements = place(teacher_id)
+            if best_teacher is None or len(placements) > len(best_placements):
+                best_teacher, best_placements = teacher_id, placements
+            if len(placements) == required:
+                break
+        
+        result['required'] += required
+        result['best_objective'] += required * (ranked[0][0] if ranked else 0)
+        if best_teacher is None:
+            continue
+        
+        result['teachers'][assignment['id']] = best_teacher
+        for room_id, slot_id, week, weight in best_placements:
+            room_busy.add((room_id, slot_id, week))
+            teacher_busy.add((best_teacher, slot_id, week))
+            teacher_hours[(best_teacher, week)] = teacher_hours.get((best_teacher, week), 0) + hours_per_session
+            result['selected'].append((assignment['id'], room_id, slot_id, week))
+            result['objective'] += weight
+            result['placed'] += 1
+    
+    return result
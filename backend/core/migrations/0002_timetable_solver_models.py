@@ -0,0 +1,110 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:15
+
+from django.conf import settings
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+import django.db.models.constraints
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='TimetableGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation_date', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('pending', 'En cours'), ('success', 'Réussi'), ('failed', 'Échoué'), ('optimizing', 'Optimisation')], default='pending', max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('total_sessions_planned', models.PositiveIntegerField(default=0)),
+                ('conflicts_resolved', models.PositiveIntegerField(default=0)),
+                ('optimization_score', models.FloatField(blank=True, help_text="Score d'optimisation (0-100)", null=True)),
+                ('task_id', models.CharField(blank=True, help_text='Identifiant de la tâche Celery', max_length=255)),
+                ('current_step', models.CharField(choices=[('queued', 'En attente'), ('collecting', 'Collecte des données'), ('building', 'Construction du modèle'), ('solving', 'Résolution'), ('persisting', 'Enregistrement'), ('done', 'Terminé')], default='queued', max_length=20)),
+                ('progress', models.PositiveIntegerField(default=0, help_text='Progression (0-100)')),
+                ('best_objective', models.FloatField(blank=True, help_text="Meilleure valeur d'objectif trouvée", null=True)),
+                ('objective_bound', models.FloatField(blank=True, help_text="Borne de l'objectif", null=True)),
+                ('fingerprint', models.CharField(blank=True, db_index=True, help_text='Empreinte canonique des entrées de la génération', max_length=64)),
+                ('solution', models.JSONField(blank=True, help_text='Séances générées, pour réutilisation', null=True)),
+                ('execution_log', models.TextField(blank=True)),
+                ('processing_time', models.FloatField(blank=True, help_text='Temps de génération en secondes', null=True)),
+                ('generated_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('programs', models.ManyToManyField(blank=True, to='core.program')),
+            ],
+            options={
+                'verbose_name': "Génération d'Emploi du Temps",
+                'verbose_name_plural': "Générations d'Emploi du Temps",
+                'ordering': ['-generation_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.IntegerField(choices=[(0, 'Lundi'), (1, 'Mardi'), (2, 'Mercredi'), (3, 'Jeudi'), (4, 'Vendredi'), (5, 'Samedi'), (6, 'Dimanche')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('name', models.CharField(help_text='Ex: Créneau 1, Matinée, etc.', max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('priority', models.IntegerField(default=1, help_text='Priorité du créneau (1=faible, 10=élevée)')),
+            ],
+            options={
+                'verbose_name': 'Créneau Horaire',
+                'verbose_name_plural': 'Créneaux Horaires',
+                'ordering': ['day_of_week', 'start_time'],
+                'unique_together': {('day_of_week', 'start_time', 'end_time')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Schedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('start_date', models.DateField(help_text='Date de début de cette session')),
+                ('end_date', models.DateField(help_text='Date de fin de cette session')),
+                ('session_number', models.PositiveIntegerField(default=1, help_text='Numéro de la séance')),
+                ('total_sessions', models.PositiveIntegerField(default=14, help_text='Nombre total de séances prévues')),
+                ('duration_minutes', models.PositiveIntegerField(default=90, help_text='Durée en minutes')),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('is_makeup', models.BooleanField(default=False, help_text='Séance de rattrapage')),
+                ('notes', models.TextField(blank=True)),
+                ('required_students', models.PositiveIntegerField(blank=True, help_text="Nombre d'étudiants attendus", null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('time_range', django.contrib.postgres.fields.ranges.IntegerRangeField(editable=False, help_text='Minutes depuis le début de la semaine', null=True)),
+                ('date_range', django.contrib.postgres.fields.ranges.DateRangeField(editable=False, help_text='Dates couvertes par la séance', null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_timetable_sessions', to=settings.AUTH_USER_MODEL)),
+                ('programs', models.ManyToManyField(related_name='timetable_sessions', to='core.program')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_sessions', to='core.room')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_sessions', to='core.subject')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_sessions', to='core.teacher')),
+                ('time_slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='core.timeslot')),
+            ],
+            options={
+                'verbose_name': "Séance d'Emploi du Temps",
+                'verbose_name_plural': "Séances d'Emploi du Temps",
+                'ordering': ['start_date', 'time_slot__start_time'],
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['time_range', 'date_range'], name='timetable_schedule_ranges_gist')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('is_active', True), ('is_cancelled', False)), deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], expressions=[('room', '='), ('time_range', '&&'), ('date_range', '&&')], name='timetable_schedule_room_no_overlap', violation_error_message='Conflit de salle détecté sur ce créneau.'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('is_active', True), ('is_cancelled', False)), deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], expressions=[('teacher', '='), ('time_range', '&&'), ('date_range', '&&')], name='timetable_schedule_teacher_no_overlap', violation_error_message='Conflit enseignant détecté sur ce créneau.'),
+        ),
+    ]
@@ -1,4 +1,9 @@
 from django.db import models
+from django.db.models import Deferrable
+from django.db.backends.postgresql.psycopg_any import DateRange, NumericRange
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, IntegerRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 
 class Department(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -141,3 +146,238 @@ class TeacherAvailability(models.Model):
 
     def __str__(self):
         return f"{self.teacher} - {self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
+
+
+class TimeSlot(models.Model):
+    """Créneaux horaires disponibles"""
+    DAY_CHOICES = (
+        (0, 'Lundi'),
+        (1, 'Mardi'),
+        (2, 'Mercredi'),
+        (3, 'Jeudi'),
+        (4, 'Vendredi'),
+        (5, 'Samedi'),
+        (6, 'Dimanche'),
+    )
+
+    day_of_week = models.IntegerField(choices=DAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    name = models.CharField(max_length=100, help_text="Ex: Créneau 1, Matinée, etc.")
+    is_active = models.BooleanField(default=True)
+    priority = models.IntegerField(default=1, help_text="Priorité du créneau (1=faible, 10=élevée)")
+
+    def __str__(self):
+        return f"{self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
+
+    @property
+    def duration_minutes(self):
+        """Durée du créneau en minutes"""
+        from datetime import datetime, timedelta
+        start = datetime.combine(datetime.today(), self.start_time)
+        end = datetime.combine(datetime.today(), self.end_time)
+        return int((end - start).total_seconds() / 60)
+
+    class Meta:
+        verbose_name = "Créneau Horaire"
+        verbose_name_plural = "Créneaux Horaires"
+        unique_together = ('day_of_week', 'start_time', 'end_time')
+        ordering = ['day_of_week', 'start_time']
+
+
+class Schedule(models.Model):
+    """Séance produite par le solveur (core.timetable_solver)
+
+    Table parallèle à schedule.Schedule, et non une copie: schedule.Schedule
+    décrit une séance hebdomadaire récurrente d'un seul programme (jour et
+    horaires libres, valable de week_start à week_end), saisie à la main ou
+    par les générateurs de l'application schedule. Le solveur CP-SAT produit
+    au contraire une séance par date, sur un créneau de la grille (TimeSlot),
+    partagée par les programmes regroupés; le démarrage à chaud et la
+    réparation relisent cette table.
+
+    Les contraintes d'exclusion portent sur chaque table séparément: une
+    salle occupée dans l'une n'est pas bloquée dans l'autre. Les deux
+    chaînes de génération ne doivent donc pas planifier la même période.
+    """
+    title = models.CharField(max_length=200)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='timetable_sessions')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='timetable_sessions')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='timetable_sessions')
+    programs = models.ManyToManyField(Program, related_name='timetable_sessions')
+    time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='sessions')
+    
+    # Dates spécifiques
+    start_date = models.DateField(help_text="Date de début de cette session")
+    end_date = models.DateField(help_text="Date de fin de cette session")
+    
+    # Métadonnées
+    session_number = models.PositiveIntegerField(default=1, help_text="Numéro de la séance")
+    total_sessions = models.PositiveIntegerField(default=14, help_text="Nombre total de séances prévues")
+    duration_minutes = models.PositiveIntegerField(default=90, help_text="Durée en minutes")
+    
+    # États
+    is_active = models.BooleanField(default=True)
+    is_cancelled = models.BooleanField(default=False)
+    is_makeup = models.BooleanField(default=False, help_text="Séance de rattrapage")
+    
+    # Informations complémentaires
+    notes = models.TextField(blank=True)
+    required_students = models.PositiveIntegerField(null=True, blank=True, help_text="Nombre d'étudiants attendus")
+    
+    # Métadonnées de gestion
+    created_by = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='created_timetable_sessions'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    # Intervalles matérialisés (voir sync_ranges) pour les contraintes d'exclusion
+    time_range = IntegerRangeField(null=True, editable=False, help_text="Minutes depuis le début de la semaine")
+    date_range = DateRangeField(null=True, editable=False, help_text="Dates couvertes par la séance")
+
+    class Meta:
+        verbose_name = "Séance d'Emploi du Temps"
+        verbose_name_plural = "Séances d'Emploi du Temps"
+        ordering = ['start_date', 'time_slot__start_time']
+        constraints = [
+            # Chevauchements rejetés par la base (btree_gist), vérifiés en fin d'instruction
+            ExclusionConstraint(
+                name='timetable_schedule_room_no_overlap',
+                expressions=[
+                    ('room', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                    ('date_range', RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(is_active=True, is_cancelled=False),
+                deferrable=Deferrable.IMMEDIATE,
+                violation_error_message='Conflit de salle détecté sur ce créneau.'
+            ),
+            ExclusionConstraint(
+                name='timetable_schedule_teacher_no_overlap',
+                expressions=[
+                    ('teacher', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                    ('date_range', RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(is_active=True, is_cancelled=False),
+                deferrable=Deferrable.IMMEDIATE,
+                violation_error_message='Conflit enseignant détecté sur ce créneau.'
+            ),
+        ]
+        indexes = [
+            GistIndex(fields=['time_range', 'date_range'], name='timetable_schedule_ranges_gist'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject.name} - {self.teacher.user.full_name} - {self.start_date}"
+
+    def sync_ranges(self, time_slot=None):
+        """Recalculer time_range et date_range à partir du créneau et des dates
+        
+        Appelé par save(); les écritures groupées passent le créneau déjà
+        chargé (TimeSlot ou SlotInfo) pour éviter une requête par séance.
+        """
+        # Import différé: core.models ne dépend pas de l'application schedule au chargement
+        from schedule.conflicts import week_minutes
+        
+        time_slot = time_slot or self.time_slot
+        self.time_range = NumericRange(*week_minutes(time_slot.day_of_week, time_slot.start_time, time_slot.end_time))
+        self.date_range = DateRange(self.start_date, self.end_date, '[]')
+
+    def validate_constraints(self, exclude=None):
+        # Les formulaires (ModelForm, admin) excluent time_range et date_range
+        # (editable=False), ce qui désactiverait les contraintes d'exclusion:
+        # ces champs sont dérivés des horaires, recalculés par clean()
+        if exclude:
+            exclude = set(exclude) - {'time_range', 'date_range'}
+        super().validate_constraints(exclude=exclude)
+
+    def save(self, *args, **kwargs):
+        self.sync_ranges()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'time_range', 'date_range'}
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        
+        # Vérifier que la date de fin >= date de début
+        if self.end_date < self.start_date:
+            raise ValidationError('La date de fin doit être postérieure à la date de début.')
+        
+        # Les conflits de salle et d'enseignant sont vérifiés par les contraintes
+        # d'exclusion (validate_constraints dans full_clean, puis la base à l'écriture)
+        if self.time_slot_id:
+            self.sync_ranges()
+
+    @property
+    def student_count(self):
+        """Nombre d'étudiants concernés par cette séance"""
+        return sum([program.students.filter(is_active=True).count() for program in self.programs.all()])
+
+    @property
+    def is_room_suitable(self):
+        """Vérifie si la salle est adaptée"""
+        return self.room.capacity >= self.student_count
+
+
+class TimetableGeneration(models.Model):
+    """Journal des générations d'emploi du temps"""
+    STATUS_CHOICES = (
+        ('pending', 'En cours'),
+        ('success', 'Réussi'),
+        ('failed', 'Échoué'),
+        ('optimizing', 'Optimisation'),
+    )
+    
+    STEP_CHOICES = (
+        ('queued', 'En attente'),
+        ('collecting', 'Collecte des données'),
+        ('building', 'Construction du modèle'),
+        ('solving', 'Résolution'),
+        ('persisting', 'Enregistrement'),
+        ('done', 'Terminé'),
+    )
+
+    generated_by = models.ForeignKey('authentication.User', on_delete=models.CASCADE)
+    generation_date = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    
+    # Paramètres
+    start_date = models.DateField()
+    end_date = models.DateField()
+    programs = models.ManyToManyField(Program, blank=True)
+    
+    # Résultats
+    total_sessions_planned = models.PositiveIntegerField(default=0)
+    conflicts_resolved = models.PositiveIntegerField(default=0)
+    optimization_score = models.FloatField(null=True, blank=True, help_text="Score d'optimisation (0-100)")
+    
+    # Suivi de l'exécution en arrière-plan
+    task_id = models.CharField(max_length=255, blank=True, help_text="Identifiant de la tâche Celery")
+    current_step = models.CharField(max_length=20, choices=STEP_CHOICES, default='queued')
+    progress = models.PositiveIntegerField(default=0, help_text="Progression (0-100)")
+    best_objective = models.FloatField(null=True, blank=True, help_text="Meilleure valeur d'objectif trouvée")
+    objective_bound = models.FloatField(null=True, blank=True, help_text="Borne de l'objectif")
+    
+    # Cache des solutions (voir core/solution_cache.py)
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True,
+                                   help_text="Empreinte canonique des entrées de la génération")
+    solution = models.JSONField(null=True, blank=True, help_text="Séances générées, pour réutilisation")
+    
+    # Logs
+    execution_log = models.TextField(blank=True)
+    processing_time = models.FloatField(null=True, blank=True, help_text="Temps de génération en secondes")
+
+    class Meta:
+        verbose_name = "Génération d'Emploi du Temps"
+        verbose_name_plural = "Générations d'Emploi du Temps"
+        ordering = ['-generation_date']
+
+    def __str__(self):
+        return f"Génération {self.id} - {self.get_status_display()}"
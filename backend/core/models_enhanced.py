@@ -219,127 +219,6 @@ class Student(models.Model):
         unique_together = ('program', 'student_id')
 
 
-class TimeSlot(models.Model):
-    """Créneaux horaires disponibles"""
-    DAY_CHOICES = (
-        (0, 'Lundi'),
-        (1, 'Mardi'),
-        (2, 'Mercredi'),
-        (3, 'Jeudi'),
-        (4, 'Vendredi'),
-        (5, 'Samedi'),
-        (6, 'Dimanche'),
-    )
-
-    day_of_week = models.IntegerField(choices=DAY_CHOICES)
-    start_time = models.TimeField()
-    end_time = models.TimeField()
-    name = models.CharField(max_length=100, help_text="Ex: Créneau 1, Matinée, etc.")
-    is_active = models.BooleanField(default=True)
-    priority = models.IntegerField(default=1, help_text="Priorité du créneau (1=faible, 10=élevée)")
-
-    def __str__(self):
-        return f"{self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
-
-    @property
-    def duration_minutes(self):
-        """Durée du créneau en minutes"""
-        from datetime import datetime, timedelta
-        start = datetime.combine(datetime.today(), self.start_time)
-        end = datetime.combine(datetime.today(), self.end_time)
-        return int((end - start).total_seconds() / 60)
-
-    class Meta:
-        verbose_name = "Créneau Horaire"
-        verbose_name_plural = "Créneaux Horaires"
-        unique_together = ('day_of_week', 'start_time', 'end_time')
-        ordering = ['day_of_week', 'start_time']
-
-
-class Schedule(models.Model):
-    """Emploi du temps - version améliorée"""
-    title = models.CharField(max_length=200)
-    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='schedules')
-    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='schedules')
-    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='schedules')
-    programs = models.ManyToManyField(Program, related_name='schedules')
-    time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='schedules')
-    
-    # Dates spécifiques
-    start_date = models.DateField(help_text="Date de début de cette session")
-    end_date = models.DateField(help_text="Date de fin de cette session")
-    
-    # Métadonnées
-    session_number = models.PositiveIntegerField(default=1, help_text="Numéro de la séance")
-    total_sessions = models.PositiveIntegerField(default=14, help_text="Nombre total de séances prévues")
-    duration_minutes = models.PositiveIntegerField(default=90, help_text="Durée en minutes")
-    
-    # États
-    is_active = models.BooleanField(default=True)
-    is_cancelled = models.BooleanField(default=False)
-    is_makeup = models.BooleanField(default=False, help_text="Séance de rattrapage")
-    
-    # Informations complémentaires
-    notes = models.TextField(blank=True)
-    required_students = models.PositiveIntegerField(null=True, blank=True, help_text="Nombre d'étudiants attendus")
-    
-    # Métadonnées de gestion
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_schedules')
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        verbose_name = "Séance d'Emploi du Temps"
-        verbose_name_plural = "Séances d'Emploi du Temps"
-        ordering = ['start_date', 'time_slot__start_time']
-
-    def __str__(self):
-        return f"{self.subject.name} - {self.teacher.user.get_full_name()} - {self.start_date}"
-
-    def clean(self):
-        from django.core.exceptions import ValidationError
-        
-        # Vérifier que la date de fin >= date de début
-        if self.end_date < self.start_date:
-            raise ValidationError('La date de fin doit être postérieure à la date de début.')
-        
-        # Vérifier les conflits de salles
-        room_conflicts = Schedule.objects.filter(
-            room=self.room,
-            time_slot=self.time_slot,
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date,
-            is_active=True,
-            is_cancelled=False
-        ).exclude(id=self.id if self.id else None)
-        
-        if room_conflicts.exists():
-            raise ValidationError(f'Conflit de salle détecté avec: {room_conflicts.first().title}')
-        
-        # Vérifier les conflits d'enseignants
-        teacher_conflicts = Schedule.objects.filter(
-            teacher=self.teacher,
-            time_slot=self.time_slot,
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date,
-            is_active=True,
-            is_cancelled=False
-        ).exclude(id=self.id if self.id else None)
-        
-        if teacher_conflicts.exists():
-            raise ValidationError(f'Conflit enseignant détecté avec: {teacher_conflicts.first().title}')
-
-    @property
-    def student_count(self):
-        """Nombre d'étudiants concernés par cette séance"""
-        return sum([program.students.filter(is_active=True).count() for program in self.programs.all()])
-
-    @property
-    def is_room_suitable(self):
-        """Vérifie si la salle est adaptée"""
-        return self.room.capacity >= self.student_count
-
-
 class ExcelImportLog(models.Model):
     """Journal des importations Excel"""
     STATUS_CHOICES = (
@@ -373,37 +252,4 @@ class ExcelImportLog(models.Model):
         return f"{self.filename} - {self.get_status_display()}"
 
 
-class TimetableGeneration(models.Model):
-    """Journal des générations d'emploi du temps"""
-    STATUS_CHOICES = (
-        ('pending', 'En cours'),
-        ('success', 'Réussi'),
-        ('failed', 'Échoué'),
-        ('optimizing', 'Optimisation'),
-    )
-
-    generated_by = models.ForeignKey(User, on_delete=models.CASCADE)
-    generation_date = models.DateTimeField(auto_now_add=True)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    
-    # Paramètres
-    start_date = models.DateField()
-    end_date = models.DateField()
-    programs = models.ManyToManyField(Program, blank=True)
-    
-    # Résultats
-    total_sessions_planned = models.PositiveIntegerField(default=0)
-    conflicts_resolved = models.PositiveIntegerField(default=0)
-    optimization_score = models.FloatField(null=True, blank=True, help_text="Score d'optimisation (0-100)")
-    
-    # Logs
-    execution_log = models.TextField(blank=True)
-    processing_time = models.FloatField(null=True, blank=True, help_text="Temps de génération en secondes")
-
-    class Meta:
-        verbose_name = "Génération d'Emploi du Temps"
-        verbose_name_plural = "Générations d'Emploi du Temps"
-        ordering = ['-generation_date']
-
-    def __str__(self):
-        return f"Génération {self.id} - {self.get_status_display()}"
+# TimeSlot, Schedule et TimetableGeneration sont enregistrés dans core/models.py
@@ -0,0 +1,311 @@
+# problem_instance.py - Instance compacte du problème d'emploi du temps
+"""
+Chargement en masse des données du solveur
+
+Toutes les entités nécessaires sont lues en un nombre fixe de requêtes puis
+rangées dans des tableaux indexés par des entiers denses (salles, créneaux,
+enseignants, matières). Le solveur ne lit plus que cette structure, qui peut
+être sauvegardée en JSON pour rejouer une génération hors ligne.
+"""
+
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime, date, time
+from typing import Dict, List, Tuple
+
+from django.db.models import Count
+
+from core.models import Room, Subject, Teacher, Student, TimeSlot, Schedule
+
+logger = logging.getLogger(__name__)
+
+# Créneau détaché de l'ORM (mêmes attributs que TimeSlot)
+SlotInfo = namedtuple('SlotInfo', ['id', 'day_of_week', 'start_time', 'end_time', 'priority'])
+
+# Priorité commune des salles dans l'objectif (le modèle Room n'en définit pas)
+ROOM_PRIORITY = 1
+
+
+class ProblemInstance:
+    """Données du problème indexées par des entiers denses
+    
+    Tableaux parallèles (l'indice dense d'une entité est sa position):
+        
+        salles      room_ids, room_capacity, room_type, room_priority
+        créneaux    slot_ids, slot_day, slot_start, slot_end, slot_priority
+        enseignants teacher_ids, teacher_names, teacher_max_hours,
+                    teacher_available (masque de bits sur les indices de créneaux)
+        matières    subject_ids, subject_names, subject_type, subject_hours,
+                    subject_programs (ids de programmes), subject_teachers (indices d'enseignants)
+    
+    ``student_counts`` donne le nombre d'étudiants actifs par programme,
+    ``unavailabilities`` les absences approuvées de la période et
+    ``published`` (optionnel) les séances publiées servant au démarrage à chaud.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, start_date: date, end_date: date, program_ids: List[int],
+                 rooms: List[Tuple], slots: List[Tuple], teachers: List[Tuple],
+                 subjects: List[Tuple], student_counts: Dict[int, int],
+                 unavailabilities: Dict = None, published: List[Tuple] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.program_ids = list(program_ids)
+        self.student_counts = student_counts
+        self.unavailabilities = unavailabilities or {'teacher': {}, 'room': {}}
+        self.published = published
+        
+        # Salles: (id, capacité, type, priorité)
+        self.room_ids = [row[0] for row in rooms]
+        self.room_capacity = [row[1] for row in rooms]
+        self.room_type = [row[2] for row in rooms]
+        self.room_priority = [row[3] for row in rooms]
+        
+        # Créneaux: (id, jour, début, fin, priorité)
+        self.slot_ids = [row[0] for row in slots]
+        self.slot_day = [row[1] for row in slots]
+        self.slot_start = [row[2] for row in slots]
+        self.slot_end = [row[3] for row in slots]
+        self.slot_priority = [row[4] for row in slots]
+        
+        # Enseignants: (id, nom, heures max, masque de disponibilité)
+        self.teacher_ids = [row[0] for row in teachers]
+        self.teacher_names = [row[1] for row in teachers]
+        self.teacher_max_hours = [row[2] for row in teachers]
+        self.teacher_available = [row[3] for row in teachers]
+        
+        # Matières: (id, nom, type, heures/semaine, programmes, enseignants)
+        self.subject_ids = [row[0] for row in subjects]
+        self.subject_names = [row[1] for row in subjects]
+        self.subject_type = [row[2] for row in subjects]
+        self.subject_hours = [row[3] for row in subjects]
+        self.subject_programs = [list(row[4]) for row in subjects]
+        self.subject_teachers = [list(row[5]) for row in subjects]
+        
+        # Index id -> entier dense
+        self.room_index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.slot_index = {slot_id: i for i, slot_id in enumerate(self.slot_ids)}
+        self.teacher_index = {teacher_id: i for i, teacher_id in enumerate(self.teacher_ids)}
+        self.subject_index = {subject_id: i for i, subject_id in enumerate(self.subject_ids)}
+    
+    @property
+    def num_rooms(self) -> int:
+        return len(self.room_ids)
+    
+    @property
+    def num_slots(self) -> int:
+        return len(self.slot_ids)
+    
+    @property
+    def num_teachers(self) -> int:
+        return len(self.teacher_ids)
+    
+    @property
+    def num_subjects(self) -> int:
+        return len(self.subject_ids)
+    
+    def slot(self, index: int) -> SlotInfo:
+        """Créneau détaché à partir de son indice dense"""
+        return SlotInfo(
+            self.slot_ids[index], self.slot_day[index], self.slot_start[index],
+            self.slot_end[index], self.slot_priority[index]
+        )
+    
+    def available_slots(self, teacher_index: int) -> List[int]:
+        """Indices des créneaux où l'enseignant est disponible"""
+        mask = self.teacher_available[teacher_index]
+        return [k for k in range(self.num_slots) if mask >> k & 1]
+    
+    @classmethod
+    def load(cls, program_ids: List[int], start_date: date, end_date: date,
+             include_published: bool = False) -> 'ProblemInstance':
+        """Charger l'instance en un nombre fixe de requêtes (9, ou 10 avec les séances publiées)
+        
+        Les salles n'ont pas de priorité propre: toutes reçoivent ROOM_PRIORITY.
+        """
+        # Import différé: core.timetable_solver importe ce module
+        from core.timetable_solver import (
+            load_teacher_unavailable_periods, load_unavailabilities, teacher_blocked_slots
+        )
+        
+        program_ids = list(program_ids)
+        
+        subjects = list(
+            Subject.objects.filter(program__id__in=program_ids)
+            .distinct()
+            .order_by('id')
+            .values_list('id', 'name', 'subject_type', 'hours_per_week')
+        )
+        subject_ids = [row[0] for row in subjects]
+        
+        programs_by_subject = {}
+        for subject_id, program_id in Subject.program.through.objects.filter(
+            subject_id__in=subject_ids, program_id__in=program_ids
+        ).values_list('subject_id', 'program_id'):
+            programs_by_subject.setdefault(subject_id, []).append(program_id)
+        
+        teacher_ids_by_subject = {}
+        for teacher_id, subject_id in Teacher.subjects.through.objects.filter(
+            subject_id__in=subject_ids, teacher__is_available=True
+        ).order_by('teacher_id').values_list('teacher_id', 'subject_id'):
+            teacher_ids_by_subject.setdefault(subject_id, []).append(teacher_id)
+        
+        rooms = [
+            (room_id, capacity, room_type, ROOM_PRIORITY)
+            for room_id, capacity, room_type in Room.objects.filter(is_available=True)
+            .order_by('id')
+            .values_list('id', 'capacity', 'room_type')
+        ]
+        
+        slots = list(
+            TimeSlot.objects.filter(is_active=True)
+            .order_by('day_of_week', 'start_time')
+            .values_list('id', 'day_of_week', 'start_time', 'end_time', 'priority')
+        )
+        slot_infos = [SlotInfo(*row) for row in slots]
+        full_mask = (1 << len(slots)) - 1
+        bit_by_slot = {slot.id: 1 << k for k, slot in enumerate(slot_infos)}
+        
+        teacher_ids = sorted({t for ids in teacher_ids_by_subject.values() for t in ids})
+        unavailable_periods = load_teacher_unavailable_periods(teacher_ids)
+        teachers = []
+        for teacher_id, first_name, last_name, max_hours in Teacher.objects.filter(
+            id__in=teacher_ids
+        ).order_by('id').values_list(
+            'id', 'user__first_name', 'user__last_name', 'max_hours_per_week'
+        ):
+            blocked_mask = 0
+            for slot_id in teacher_blocked_slots(unavailable_periods.get(teacher_id, []), slot_infos):
+                blocked_mask |= bit_by_slot[slot_id]
+            name = f"{first_name} {last_name}".strip()
+            teachers.append((teacher_id, name, max_hours, full_mask & ~blocked_mask))
+        
+        teacher_index = {row[0]: i for i, row in enumerate(teachers)}
+        subjects = [
+            (
+                subject_id, name, subject_type, hours,
+                programs_by_subject.get(subject_id, []),
+                [teacher_index[t] for t in teacher_ids_by_subject.get(subject_id, []) if t in teacher_index],
+            )
+            for subject_id, name, subject_type, hours in subjects
+        ]
+        
+        student_counts = dict(
+            Student.objects.filter(program_id__in=program_ids, is_active=True)
+            .values_list('program_id')
+            .annotate(total=Count('id'))
+        )
+        
+        unavailabilities = load_unavailabilities(start_date, end_date)
+        
+        published = None
+        if include_published:
+            published = list(
+                Schedule.objects.filter(
+                    start_date__gte=start_date,
+                    end_date__lte=end_date,
+                    programs__id__in=program_ids,
+                    is_active=True,
+                    is_cancelled=False
+                ).values_list('subject_id', 'teacher_id', 'room_id', 'time_slot_id', 'start_date').distinct()
+            )
+        
+        return cls(
+            start_date, end_date, program_ids, rooms, slots, teachers, subjects,
+            student_counts, unavailabilities, published
+        )
+    
+    def to_dict(self) -> Dict:
+        """Représentation JSON de l'instance"""
+        def periods(by_resource):
+            return {
+                str(resource_id): [[start.isoformat(), end.isoformat()] for start, end in items]
+                for resource_id, items in by_resource.items()
+            }
+        
+        return {
+            'version': self.VERSION,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'program_ids': self.program_ids,
+            'rooms': [
+                list(row) for row in zip(self.room_ids, self.room_capacity, self.room_type, self.room_priority)
+            ],
+            'slots': [
+                [slot_id, day, start.isoformat(), end.isoformat(), priority]
+                for slot_id, day, start, end, priority in zip(
+                    self.slot_ids, self.slot_day, self.slot_start, self.slot_end, self.slot_priority
+                )
+            ],
+            'teachers': [
+                list(row) for row in zip(
+                    self.teacher_ids, self.teacher_names, self.teacher_max_hours, self.teacher_available
+                )
+            ],
+            'subjects': [
+                list(row) for row in zip(
+                    self.subject_ids, self.subject_names, self.subject_type, self.subject_hours,
+                    self.subject_programs, self.subject_teachers
+                )
+            ],
+            'student_counts': {str(k): v for k, v in self.student_counts.items()},
+            'unavailabilities': {
+                'teacher': periods(self.unavailabilities['teacher']),
+                'room': periods(self.unavailabilities['room']),
+            },
+            'published': (
+                [[s, t, r, k, d.isoformat()] for s, t, r, k, d in self.published]
+                if self.published is not None else None
+            ),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProblemInstance':
+        """Reconstruire une instance à partir de sa représentation JSON"""
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Version d'instance non supportée: {data.get('version')}")
+        
+        def periods(by_resource):
+            return {
+                int(resource_id): [
+                    (datetime.fromisoformat(start), datetime.fromisoformat(end)) for start, end in items
+                ]
+                for resource_id, items in by_resource.items()
+            }
+        
+        published = data.get('published')
+        return cls(
+            date.fromisoformat(data['start_date']),
+            date.fromisoformat(data['end_date']),
+            data['program_ids'],
+            [tuple(row) for row in data['rooms']],
+            [
+                (slot_id, day, time.fromisoformat(start), time.fromisoformat(end), priority)
+                for slot_id, day, start, end, priority in data['slots']
+            ],
+            [tuple(row) for row in data['teachers']],
+            [tuple(row) for row in data['subjects']],
+            {int(k): v for k, v in data['student_counts'].items()},
+            {
+                'teacher': periods(data['unavailabilities']['teacher']),
+                'room': periods(data['unavailabilities']['room']),
+            },
+            (
+                [(s, t, r, k, date.fromisoformat(d)) for s, t, r, k, d in published]
+                if published is not None else None
+            ),
+        )
+    
+    def save(self, path: str):
+        """Sauvegarder l'instance sur disque (JSON)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        logger.info(f"💾 Instance sauvegardée: {path}")
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'ProblemInstance':
+        """Charger une instance sauvegardée avec save()"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,53 @@
+# room_matching.py - Affectation des salles par couplage biparti
+"""
+Affectation des salles dans un créneau
+
+Le choix de la salle à l'intérieur d'un créneau est un problème de couplage
+biparti entre séances et salles compatibles. On utilise des chemins
+augmentants (algorithme de Kuhn, cas simple de Hopcroft-Karp) en essayant
+les salles par priorité décroissante et les séances les plus contraintes
+en premier.
+"""
+
+from typing import Dict, Hashable, List, Tuple
+
+
+def match_rooms(sessions: Dict[Hashable, List[int]],
+                room_priority: Dict[int, int]) -> Tuple[Dict[Hashable, int], List[frozenset]]:
+    """Affecter une salle distincte à chaque séance d'un même créneau
+    
+    Args:
+        sessions: clé de séance -> identifiants des salles compatibles
+        room_priority: identifiant de salle -> priorité (plus élevée = préférée)
+    
+    Returns:
+        (clé de séance -> salle, ensembles de salles en déficit)
+        
+        Pour chaque séance sans salle, l'ensemble des salles visitées par la
+        recherche de chemin augmentant est un ensemble N(S) avec |N(S)| < |S|
+        (violation de la condition de Hall): il peut servir de coupe au modèle.
+    """
+    candidates = {
+        key: sorted(rooms, key=lambda room_id: -room_priority.get(room_id, 0))
+        for key, rooms in sessions.items()
+    }
+    owner = {}  # room_id -> clé de séance
+    
+    def augment(key, visited):
+        for room_id in candidates[key]:
+            if room_id in visited:
+                continue
+            visited.add(room_id)
+            if room_id not in owner or augment(owner[room_id], visited):
+                owner[room_id] = key
+                return True
+        return False
+    
+    deficient = []
+    # Séances les plus contraintes d'abord
+    for key in sorted(candidates, key=lambda k: len(candidates[k])):
+        visited = set()
+        if not augment(key, visited):
+            deficient.append(frozenset(visited))
+    
+    return {key: room_id for room_id, key in owner.items()}, deficient
@@ -4,8 +4,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.http import JsonResponse
 from datetime import datetime, date
-from .models import Program, Schedule
+from .models import Program
 from .schedule_generator import ScheduleGenerator
+from schedule.conflicts import find_conflicts
+from schedule.models import Schedule
 import json
 
 @api_view(['POST'])
@@ -21,54 +23,59 @@ def generate_automatic_schedule(request):
         week_start = datetime.strptime(data.get('week_start'), '%Y-%m-%d').date()
         week_end = datetime.strptime(data.get('week_end'), '%Y-%m-%d').date()
         replace_existing = data.get('replace_existing', False)
+        dry_run = data.get('dry_run', False)  # Calculer l'écart sans rien écrire
         program_ids = data.get('program_ids', [])  # Si vide, traiter tous les programmes
         
-        # Supprimer les emplois du temps existants si demandé
-        if replace_existing:
-            query = Schedule.objects.filter(week_start=week_start, week_end=week_end)
-            if program_ids:
-                query = query.filter(program_id__in=program_ids)
-            deleted_count = query.count()
-            query.delete()
-        else:
-            deleted_count = 0
-        
-        # Générer les nouveaux emplois du temps
         generator = ScheduleGenerator()
+        programs = Program.objects.filter(id__in=program_ids) if program_ids else Program.objects.all()
         
-        if program_ids:
-            # Générer pour les programmes spécifiés
-            programs = Program.objects.filter(id__in=program_ids)
-            all_results = []
-            total_schedules = 0
-            all_conflicts = []
+        if dry_run or replace_existing:
+            # Emploi du temps proposé en mémoire, comparé aux séances existantes de la période
+            final_result = generator.plan_schedule(programs, week_start, week_end, request.user)
+            diff = final_result['diff']
             
-            for program in programs:
-                result = generator.generate_schedule_for_program(
-                    program, week_start, week_end, request.user
-                )
-                all_results.append(result)
-                total_schedules += len(result['generated_schedules'])
-                all_conflicts.extend(result['conflicts'])
+            if dry_run:
+                return Response({
+                    'success': True,
+                    'message': 'Simulation terminée, aucune modification enregistrée',
+                    'data': {
+                        'diff': generator.describe_diff(diff),
+                        'conflicts': final_result['conflicts']
+                    }
+                }, status=status.HTTP_200_OK)
             
-            final_result = {
-                'total_schedules': total_schedules,
-                'total_conflicts': len(all_conflicts),
-                'results_by_program': all_results,
-                'conflicts': all_conflicts
-            }
+            # Appliquer l'écart en une seule transaction courte
+            applied = generator.apply_schedule_diff(diff)
+            deleted_count = applied['removed']
+            created_count = applied['added']
+        elif program_ids:
+            # Générer pour les programmes spécifiés
+            final_result = generator.generate_schedule_for_programs(
+                programs, week_start, week_end, request.user
+            )
+            applied = None
+            deleted_count = 0
+            created_count = final_result['total_schedules']
         else:
             # Générer pour tous les programmes
             final_result = generator.generate_full_schedule(week_start, week_end, request.user)
+            applied = None
+            deleted_count = 0
+            created_count = final_result['total_schedules']
         
         return Response({
             'success': True,
             'message': 'Emploi du temps généré avec succès',
             'data': {
                 'deleted_schedules': deleted_count,
-                'created_schedules': final_result['total_schedules'],
+                'created_schedules': created_count,
                 'conflicts': final_result['conflicts'],
-                'results_by_program': final_result['results_by_program']
+                'results_by_program': [
+                    # Les séances elles-mêmes ne sont pas sérialisables: leur nombre suffit
+                    {**result, 'generated_schedules': len(result['generated_schedules'])}
+                    for result in final_result['results_by_program']
+                ],
+                'diff': applied
             }
         }, status=status.HTTP_201_CREATED)
         
@@ -95,65 +102,28 @@ def check_schedule_conflicts(request):
             week_start__lte=week_end,
             week_end__gte=week_start,
             is_active=True
-        ).select_related('teacher', 'room', 'subject', 'program')
+        ).select_related('teacher__user', 'room', 'subject', 'program')
         
-        conflicts = []
-        
-        # Vérifier les conflits d'enseignants
-        teacher_schedules = {}
-        for schedule in schedules:
-            key = f"{schedule.teacher_id}_{schedule.day_of_week}"
-            if key not in teacher_schedules:
-                teacher_schedules[key] = []
-            teacher_schedules[key].append(schedule)
-        
-        for key, teacher_schedule_list in teacher_schedules.items():
-            teacher_id, day = key.split('_')
-            for i, schedule1 in enumerate(teacher_schedule_list):
-                for schedule2 in teacher_schedule_list[i+1:]:
-                    if (schedule1.start_time < schedule2.end_time and 
-                        schedule1.end_time > schedule2.start_time):
-                        conflicts.append({
-                            'type': 'teacher_conflict',
-                            'teacher': schedule1.teacher.user.full_name,
-                            'day': schedule1.get_day_of_week_display(),
-                            'schedule1': {
-                                'title': schedule1.title,
-                                'time': f"{schedule1.start_time} - {schedule1.end_time}"
-                            },
-                            'schedule2': {
-                                'title': schedule2.title,
-                                'time': f"{schedule2.start_time} - {schedule2.end_time}"
-                            }
-                        })
-        
-        # Vérifier les conflits de salles
-        room_schedules = {}
-        for schedule in schedules:
-            key = f"{schedule.room_id}_{schedule.day_of_week}"
-            if key not in room_schedules:
-                room_schedules[key] = []
-            room_schedules[key].append(schedule)
+        def describe(schedule):
+            return {
+                'title': schedule.title,
+                'time': f"{schedule.start_time} - {schedule.end_time}"
+            }
         
-        for key, room_schedule_list in room_schedules.items():
-            room_id, day = key.split('_')
-            for i, schedule1 in enumerate(room_schedule_list):
-                for schedule2 in room_schedule_list[i+1:]:
-                    if (schedule1.start_time < schedule2.end_time and 
-                        schedule1.end_time > schedule2.start_time):
-                        conflicts.append({
-                            'type': 'room_conflict',
-                            'room': schedule1.room.name,
-                            'day': schedule1.get_day_of_week_display(),
-                            'schedule1': {
-                                'title': schedule1.title,
-                                'time': f"{schedule1.start_time} - {schedule1.end_time}"
-                            },
-                            'schedule2': {
-                                'title': schedule2.title,
-                                'time': f"{schedule2.start_time} - {schedule2.end_time}"
-                            }
-                        })
+        # Conflits d'enseignants puis de salles (balayage par ressource et par jour)
+        conflicts = []
+        for conflict in find_conflicts(schedules, resources=('teacher', 'room')):
+            record = {'type': f'{conflict.resource}_conflict'}
+            if conflict.resource == 'teacher':
+                record['teacher'] = conflict.first.teacher.user.full_name
+            else:
+                record['room'] = conflict.first.room.name
+            record.update({
+                'day': conflict.first.get_day_of_week_display(),
+                'schedule1': describe(conflict.first),
+                'schedule2': describe(conflict.second)
+            })
+            conflicts.append(record)
         
         return Response({
             'success': True,
@@ -9,6 +9,8 @@ import os
 import django
 from datetime import datetime, time, timedelta
 from collections import defaultdict
+import heapq
+import logging
 import random
 
 # Configuration Django
@@ -17,8 +19,13 @@ django.setup()
 
 from core.models import Teacher, Room, Subject, Program
 from schedule.models import Schedule
-from django.core.exceptions import ValidationError
+from schedule.occupancy import OccupancyIndex
 from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
 
 class ScheduleGenerator:
     """Générateur intelligent d'emplois du temps"""
@@ -34,6 +41,10 @@ class ScheduleGenerator:
             'lab': ['lab'],
             'exam': ['amphitheater', 'lecture', 'td']
         }
+        
+        # Occupation de la période en mémoire (chargée une fois, mise à jour au fil des placements)
+        self.occupancy = None
+        self._rooms_by_department = None
     
     def _generate_time_slots(self):
         """Génère les créneaux horaires disponibles"""
@@ -59,20 +70,25 @@ class ScheduleGenerator:
         
         return slots
     
+    def _occupancy_for(self, week_start, week_end):
+        """Index d'occupation de la période (une requête au premier appel)"""
+        if self.occupancy is None or not self.occupancy.covers(week_start, week_end):
+            self.occupancy = OccupancyIndex.load(self.days, self.time_slots, week_start, week_end)
+        return self.occupancy
+    
+    def _department_rooms(self, department_id):
+        """Salles disponibles d'un département, par capacité décroissante (une requête au total)"""
+        if self._rooms_by_department is None:
+            self._rooms_by_department = defaultdict(list)
+            for room in Room.objects.filter(is_available=True).order_by('-capacity'):
+                self._rooms_by_department[room.department_id].append(room)
+        return self._rooms_by_department[department_id]
+    
     def check_teacher_availability(self, teacher, day, start_time, end_time, week_start, week_end):
         """Vérifie la disponibilité d'un enseignant"""
         # Vérifier les créneaux existants
-        existing_schedules = Schedule.objects.filter(
-            teacher=teacher,
-            day_of_week=day,
-            week_start__lte=week_end,
-            week_end__gte=week_start,
-            is_active=True
-        )
-        
-        for schedule in existing_schedules:
-            if (start_time < schedule.end_time and end_time > schedule.start_time):
-                return False
+        if not self._occupancy_for(week_start, week_end).teacher_free(teacher.id, day, start_time, end_time):
+            return False
         
         # Vérifier la charge horaire quotidienne
         daily_hours = self._calculate_daily_hours(teacher, day, week_start, week_end)
@@ -86,56 +102,27 @@ class ScheduleGenerator:
     
     def check_room_availability(self, room, day, start_time, end_time, week_start, week_end):
         """Vérifie la disponibilité d'une salle"""
-        return not Schedule.objects.filter(
-            room=room,
-            day_of_week=day,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-            week_start__lte=week_end,
-            week_end__gte=week_start,
-            is_active=True
-        ).exists()
+        return self._occupancy_for(week_start, week_end).room_free(room.id, day, start_time, end_time)
     
     def _calculate_daily_hours(self, teacher, day, week_start, week_end):
         """Calcule les heures déjà programmées pour un enseignant un jour donné"""
-        schedules = Schedule.objects.filter(
-            teacher=teacher,
-            day_of_week=day,
-            week_start__lte=week_end,
-            week_end__gte=week_start,
-            is_active=True
-        )
-        
-        total_hours = 0
-        for schedule in schedules:
-            duration = (datetime.combine(datetime.today(), schedule.end_time) - 
-                       datetime.combine(datetime.today(), schedule.start_time)).seconds / 3600
-            total_hours += duration
-        
-        return total_hours
+        return self._occupancy_for(week_start, week_end).daily_hours(teacher.id, day)
     
     def find_suitable_room(self, subject, day, start_time, end_time, week_start, week_end):
         """Trouve une salle adaptée au type de cours"""
         preferred_types = self.preferred_room_types.get(subject.subject_type, ['lecture'])
         
+        rooms = self._department_rooms(subject.department_id)
+        
         # Chercher d'abord dans les types préférés
         for room_type in preferred_types:
-            rooms = Room.objects.filter(
-                room_type=room_type,
-                is_available=True,
-                department=subject.department
-            ).order_by('-capacity')
-            
             for room in rooms:
+                if room.room_type != room_type:
+                    continue
                 if self.check_room_availability(room, day, start_time, end_time, week_start, week_end):
                     return room
         
         # Si aucune salle préférée, chercher dans toutes les salles du département
-        rooms = Room.objects.filter(
-            is_available=True,
-            department=subject.department
-        ).order_by('-capacity')
-        
         for room in rooms:
             if self.check_room_availability(room, day, start_time, end_time, week_start, week_end):
                 return room
@@ -165,76 +152,349 @@ class ScheduleGenerator:
         
         return None
     
-    @transaction.atomic
     def generate_schedule_for_program(self, program, week_start, week_end, created_by):
         """Génère l'emploi du temps pour un programme donné"""
-        print(f"Génération emploi du temps pour {program.name}...")
+        result = self.generate_schedule_for_programs(
+            Program.objects.filter(id=program.id), week_start, week_end, created_by
+        )
+        return result['results_by_program'][0]
+    
+    def _session_requests(self, programs):
+        """Séances à placer: une demande par couple (programme, matière)"""
+        programs = programs.prefetch_related(
+            Prefetch('subjects', queryset=Subject.objects.order_by('id')),
+            Prefetch('subjects__teachers', queryset=Teacher.objects.filter(is_available=True))
+        )
         
-        # Récupérer toutes les matières du programme
-        subjects = Subject.objects.filter(program=program)
-        generated_schedules = []
-        conflicts = []
+        requests = []
+        results = {}
+        for program in programs:
+            logger.info(f"Génération emploi du temps pour {program.name}...")
+            results[program.id] = {'generated_schedules': [], 'conflicts': [], 'program': program.name}
+            
+            for subject in program.subjects.all():
+                teachers = list(subject.teachers.all())
+                if not teachers:
+                    results[program.id]['conflicts'].append(f"Aucun enseignant disponible pour {subject.name}")
+                    continue
+                
+                # Salles comptées pour la contrainte: types préférés du département, sinon toutes
+                rooms = self._department_rooms(subject.department_id)
+                preferred_types = self.preferred_room_types.get(subject.subject_type, ['lecture'])
+                candidate_rooms = [room for room in rooms if room.room_type in preferred_types] or rooms
+                
+                weekly_sessions = self._calculate_weekly_sessions(subject)
+                requests.append({
+                    'program': program,
+                    'subject': subject,
+                    'teachers': teachers,
+                    'rooms': candidate_rooms,
+                    'sessions': weekly_sessions,
+                    'remaining': weekly_sessions,
+                })
+        
+        return requests, results
+    
+    def _cell_count(self, request, day, start_time, end_time, week_start, week_end):
+        """Couples (enseignant, salle) encore possibles sur un créneau d'un jour"""
+        free_rooms = sum(
+            1 for room in request['rooms']
+            if self.check_room_availability(room, day, start_time, end_time, week_start, week_end)
+        )
+        if not free_rooms:
+            return 0
+        free_teachers = sum(
+            1 for teacher in request['teachers']
+            if self.check_teacher_availability(teacher, day, start_time, end_time, week_start, week_end)
+        )
+        return free_rooms * free_teachers
+    
+    def _candidate_cells(self, request, week_start, week_end):
+        """Possibilités par case (jour, indice du créneau) de la grille"""
+        return {
+            (day, slot): self._cell_count(request, day, start_time, end_time, week_start, week_end)
+            for day in self.days
+            for slot, (start_time, end_time) in enumerate(self.time_slots)
+        }
+    
+    def _candidate_count(self, request, week_start, week_end):
+        """Nombre de couples (enseignant, jour, créneau, salle) encore possibles"""
+        return sum(self._candidate_cells(request, week_start, week_end).values())
+    
+    def generate_schedule_for_programs(self, programs, week_start, week_end, created_by):
+        """Génère l'emploi du temps de plusieurs programmes
         
-        for subject in subjects:
-            # Récupérer les enseignants pouvant enseigner cette matière
-            teachers = Teacher.objects.filter(subjects=subject, is_available=True)
+        Les séances sont placées en mémoire (voir _place_sessions) puis
+        écrites en une seule insertion groupée.
+        """
+        generated_schedules, results = self._place_sessions(programs, week_start, week_end, created_by)
+        for schedule in generated_schedules:
+            schedule.sync_ranges()
+        
+        # Écrire toutes les séances en une fois
+        with transaction.atomic():
+            Schedule.objects.bulk_create(generated_schedules)
+        
+        return self._summarize(generated_schedules, results)
+    
+    def _summarize(self, generated_schedules, results):
+        """Résumé d'une génération, par programme"""
+        all_results = list(results.values())
+        all_conflicts = [conflict for result in all_results for conflict in result['conflicts']]
+        return {
+            'total_schedules': len(generated_schedules),
+            'total_conflicts': len(all_conflicts),
+            'results_by_program': all_results,
+            'conflicts': all_conflicts
+        }
+    
+    def _place_sessions(self, programs, week_start, week_end, created_by):
+        """Place en mémoire les séances de plusieurs programmes, les plus contraintes d'abord
+        
+        Ordonnancement de type DSATUR sur l'ensemble des programmes: chaque
+        demande (programme, matière) est notée par ses possibilités restantes
+        par séance à placer (enseignants × créneaux × salles libres). La plus
+        contrainte est placée en premier. Les possibilités sont tenues par case
+        (jour, créneau): après un placement, seules les cases touchées des
+        demandes qui partagent l'enseignant (tout le jour, à cause de la charge
+        quotidienne) ou la salle (créneaux chevauchés) sont recomptées.
+        
+        Returns:
+            (séances non enregistrées, résultats par programme)
+        """
+        occupancy = self._occupancy_for(week_start, week_end)
+        requests, results = self._session_requests(programs)
+        
+        # Demandes touchées par l'occupation d'un enseignant ou d'une salle
+        by_teacher = defaultdict(set)
+        by_room = defaultdict(set)
+        for index, request in enumerate(requests):
+            for teacher in request['teachers']:
+                by_teacher[teacher.id].add(index)
+            for room in request['rooms']:
+                by_room[room.id].add(index)
+        
+        cells = [self._candidate_cells(request, week_start, week_end) for request in requests]
+        counts = [sum(request_cells.values()) for request_cells in cells]
+        versions = [0] * len(requests)
+        queue = []
+        
+        def push(index):
+            request = requests[index]
+            versions[index] += 1
+            score = counts[index] / request['remaining']
+            heapq.heappush(queue, (score, len(request['teachers']), index, versions[index]))
+        
+        def recount(index, touched):
+            for day, slot in touched:
+                start_time, end_time = self.time_slots[slot]
+                count = self._cell_count(requests[index], day, start_time, end_time, week_start, week_end)
+                counts[index] += count - cells[index][(day, slot)]
+                cells[index][(day, slot)] = count
+        
+        for index in range(len(requests)):
+            push(index)
+        
+        generated_schedules = []
+        while queue:
+            _, _, index, version = heapq.heappop(queue)
+            if version != versions[index]:
+                continue  # Note périmée
+            
+            request = requests[index]
+            program, subject = request['program'], request['subject']
+            session = request['sessions'] - request['remaining'] + 1
             
-            if not teachers.exists():
-                conflicts.append(f"Aucun enseignant disponible pour {subject.name}")
+            placed = None
+            for teacher in request['teachers']:
+                # Chercher un créneau pour cet enseignant (l'index garantit l'absence de conflit)
+                alternative = self.generate_alternative_slot(teacher, subject, week_start, week_end)
+                if alternative:
+                    placed = (teacher, alternative)
+                    break
+            
+            if placed is None:
+                # Plus aucune possibilité: les séances restantes sont en conflit
+                for missing in range(session, request['sessions'] + 1):
+                    results[program.id]['conflicts'].append(
+                        f"Impossible de programmer {subject.name} (session {missing})"
+                    )
                 continue
             
-            # Calculer le nombre de séances nécessaires par semaine
-            weekly_sessions = self._calculate_weekly_sessions(subject)
+            teacher, alternative = placed
+            schedule = Schedule(
+                title=f"{subject.name} - {program.name}",
+                subject=subject,
+                teacher=teacher,
+                room=alternative['room'],
+                program=program,
+                day_of_week=alternative['day'],
+                start_time=alternative['start_time'],
+                end_time=alternative['end_time'],
+                week_start=week_start,
+                week_end=week_end,
+                created_by=created_by
+            )
+            generated_schedules.append(schedule)
+            results[program.id]['generated_schedules'].append(schedule)
+            occupancy.add(
+                teacher.id, alternative['room'].id, alternative['day'],
+                alternative['start_time'], alternative['end_time']
+            )
+            logger.debug(
+                f"✅ {subject.name} ({program.name}) - {self._get_day_name(alternative['day'])} {alternative['start_time']}"
+            )
             
-            sessions_created = 0
-            for session in range(weekly_sessions):
-                success = False
-                exclude_slots = []
-                
-                for teacher in teachers:
-                    # Essayer de trouver un créneau pour cet enseignant
-                    for attempt in range(10):  # Maximum 10 tentatives
-                        alternative = self.generate_alternative_slot(
-                            teacher, subject, week_start, week_end, exclude_slots
-                        )
-                        
-                        if alternative:
-                            try:
-                                schedule = Schedule.objects.create(
-                                    title=f"{subject.name} - {program.name}",
-                                    subject=subject,
-                                    teacher=teacher,
-                                    room=alternative['room'],
-                                    program=program,
-                                    day_of_week=alternative['day'],
-                                    start_time=alternative['start_time'],
-                                    end_time=alternative['end_time'],
-                                    week_start=week_start,
-                                    week_end=week_end,
-                                    created_by=created_by
-                                )
-                                
-                                generated_schedules.append(schedule)
-                                sessions_created += 1
-                                success = True
-                                print(f"  ✅ {subject.name} - {self._get_day_name(alternative['day'])} {alternative['start_time']}")
-                                break
-                                
-                            except ValidationError as e:
-                                slot_id = f"{alternative['day']}_{alternative['start_time']}_{alternative['end_time']}"
-                                exclude_slots.append(slot_id)
-                                continue
-                    
-                    if success:
-                        break
-                
-                if not success:
-                    conflicts.append(f"Impossible de programmer {subject.name} (session {session + 1})")
+            # Recompter les cases touchées des demandes qui partagent l'enseignant ou la salle
+            request['remaining'] -= 1
+            day = alternative['day']
+            day_cells = [(day, slot) for slot in range(len(self.time_slots))]
+            overlapped = [
+                (day, slot) for slot, (start_time, end_time) in enumerate(self.time_slots)
+                if start_time < alternative['end_time'] and end_time > alternative['start_time']
+            ]
+            touched = {other: day_cells for other in by_teacher[teacher.id]}
+            for other in by_room[alternative['room'].id] - by_teacher[teacher.id]:
+                touched[other] = overlapped
+            
+            for other in touched.keys() | {index}:
+                if not requests[other]['remaining']:
+                    versions[other] += 1
+                    continue
+                recount(other, touched.get(other, ()))
+                push(other)
+        
+        return generated_schedules, results
+    
+    def plan_schedule(self, programs, week_start, week_end, created_by):
+        """Calcule sans écrire l'emploi du temps proposé et son écart avec l'existant
+        
+        Les séances actives des programmes sur la période sont considérées
+        comme remplacées: elles ne bloquent pas le placement et sont comparées
+        aux séances proposées (voir diff_schedules).
+        
+        Returns:
+            Résumé de génération, avec la clé 'diff' à passer à apply_schedule_diff
+        """
+        existing = list(Schedule.objects.filter(
+            program__in=programs,
+            week_start=week_start,
+            week_end=week_end,
+            is_active=True
+        ).select_related('subject').order_by('id'))
+        
+        self.occupancy = OccupancyIndex.load(
+            self.days, self.time_slots, week_start, week_end,
+            exclude_ids=[schedule.id for schedule in existing]
+        )
+        self._rooms_by_department = None
+        
+        generated_schedules, results = self._place_sessions(programs, week_start, week_end, created_by)
+        
+        # L'index reflète le plan, pas la base: le recharger au prochain appel
+        self.occupancy = None
+        
+        summary = self._summarize(generated_schedules, results)
+        summary['diff'] = self.diff_schedules(existing, generated_schedules)
+        return summary
+    
+    def diff_schedules(self, existing, proposed):
+        """Écart entre les séances existantes et proposées, par couple (programme, matière)
+        
+        Returns:
+            {
+                'added': séances proposées sans équivalent existant,
+                'moved': [(séance existante, séance proposée)] à déplacer,
+                'unchanged': séances existantes conservées telles quelles,
+                'removed': séances existantes sans équivalent proposé,
+            }
+        """
+        def placement(schedule):
+            return (schedule.teacher_id, schedule.room_id, schedule.day_of_week,
+                    schedule.start_time, schedule.end_time)
+        
+        existing_by_key = defaultdict(list)
+        for schedule in existing:
+            existing_by_key[(schedule.program_id, schedule.subject_id)].append(schedule)
+        proposed_by_key = defaultdict(list)
+        for schedule in proposed:
+            proposed_by_key[(schedule.program_id, schedule.subject_id)].append(schedule)
+        
+        diff = {'added': [], 'moved': [], 'unchanged': [], 'removed': []}
+        for key in list(existing_by_key) + [k for k in proposed_by_key if k not in existing_by_key]:
+            current = existing_by_key.get(key, [])
+            wanted = proposed_by_key.get(key, [])
+            
+            # Séances identiques d'abord, puis appariement des restantes dans l'ordre
+            remaining = []
+            for schedule in wanted:
+                match = next((old for old in current if placement(old) == placement(schedule)), None)
+                if match is None:
+                    remaining.append(schedule)
+                else:
+                    current.remove(match)
+                    diff['unchanged'].append(match)
+            
+            diff['moved'].extend(zip(current, remaining))
+            diff['added'].extend(remaining[len(current):])
+            diff['removed'].extend(current[len(remaining):])
+        
+        return diff
+    
+    def apply_schedule_diff(self, diff):
+        """Écrit un écart en une seule transaction courte (insertions et mises à jour groupées)"""
+        now = timezone.now()
+        moved = []
+        for schedule, proposed in diff['moved']:
+            schedule.teacher = proposed.teacher
+            schedule.room = proposed.room
+            schedule.day_of_week = proposed.day_of_week
+            schedule.start_time = proposed.start_time
+            schedule.end_time = proposed.end_time
+            schedule.updated_at = now
+            schedule.sync_ranges()
+            moved.append(schedule)
+        for schedule in diff['removed']:
+            schedule.is_active = False
+            schedule.updated_at = now
+        
+        for schedule in diff['added']:
+            schedule.sync_ranges()
+        
+        # Désactiver avant de déplacer: les contraintes d'exclusion ignorent les séances inactives
+        with transaction.atomic():
+            Schedule.objects.bulk_update(diff['removed'], ['is_active', 'updated_at'])
+            Schedule.objects.bulk_update(
+                moved, ['teacher', 'room', 'day_of_week', 'start_time', 'end_time', 'updated_at',
+                        'time_range', 'date_range']
+            )
+            Schedule.objects.bulk_create(diff['added'])
+        
+        return {key: len(diff[key]) for key in ('added', 'moved', 'unchanged', 'removed')}
+    
+    def describe_diff(self, diff):
+        """Version sérialisable d'un écart (réponse d'API)"""
+        def describe(schedule):
+            return {
+                'id': schedule.id,
+                'program_id': schedule.program_id,
+                'subject_id': schedule.subject_id,
+                'subject': schedule.subject.name,
+                'teacher_id': schedule.teacher_id,
+                'room_id': schedule.room_id,
+                'day_of_week': schedule.day_of_week,
+                'start_time': schedule.start_time.strftime('%H:%M'),
+                'end_time': schedule.end_time.strftime('%H:%M'),
+            }
         
         return {
-            'generated_schedules': generated_schedules,
-            'conflicts': conflicts,
-            'program': program.name
+            'added': [describe(schedule) for schedule in diff['added']],
+            'moved': [
+                {'id': schedule.id, 'from': describe(schedule), 'to': describe(proposed)}
+                for schedule, proposed in diff['moved']
+            ],
+            'unchanged': [schedule.id for schedule in diff['unchanged']],
+            'removed': [schedule.id for schedule in diff['removed']],
         }
     
     def _calculate_weekly_sessions(self, subject):
@@ -257,30 +517,25 @@ class ScheduleGenerator:
     
     def generate_full_schedule(self, week_start, week_end, created_by):
         """Génère l'emploi du temps complet pour tous les programmes"""
-        print("🚀 GÉNÉRATION AUTOMATIQUE DES EMPLOIS DU TEMPS")
-        print("=" * 60)
-        
-        all_results = []
-        all_conflicts = []
-        total_schedules = 0
+        logger.info("🚀 Génération automatique des emplois du temps")
         
         programs = Program.objects.all()
         
-        for program in programs:
-            result = self.generate_schedule_for_program(program, week_start, week_end, created_by)
-            all_results.append(result)
-            all_conflicts.extend(result['conflicts'])
-            total_schedules += len(result['generated_schedules'])
-        
-        print(f"\n📊 RÉSUMÉ:")
-        print(f"• Total programmes: {programs.count()}")
-        print(f"• Créneaux générés: {total_schedules}")
-        print(f"• Conflits détectés: {len(all_conflicts)}")
-        
-        if all_conflicts:
-            print(f"\n⚠️ CONFLITS:")
-            for i, conflict in enumerate(all_conflicts, 1):
-                print(f"  {i}. {conflict}")
+        # Recharger l'occupation: elle est ensuite partagée par tous les programmes
+        self.occupancy = OccupancyIndex.load(self.days, self.time_slots, week_start, week_end)
+        self._rooms_by_department = None
+        
+        result = self.generate_schedule_for_programs(programs, week_start, week_end, created_by)
+        all_results = result['results_by_program']
+        all_conflicts = result['conflicts']
+        total_schedules = result['total_schedules']
+        
+        logger.info(
+            f"📊 {len(all_results)} programme(s), {total_schedules} créneau(x) générés, "
+            f"{len(all_conflicts)} conflit(s) détecté(s)"
+        )
+        for i, conflict in enumerate(all_conflicts, 1):
+            logger.warning(f"⚠️ Conflit {i}: {conflict}")
         
         return {
             'total_schedules': total_schedules,
@@ -0,0 +1,92 @@
+# solution_cache.py - Réutilisation des générations identiques
+"""
+Cache des solutions d'emploi du temps
+
+Une génération est identifiée par l'empreinte canonique de ses entrées:
+instance chargée (programmes, matières, qualifications et disponibilités des
+enseignants, salles, créneaux, période, absences) et paramètres du solveur.
+Une génération réussie conserve ses séances; une demande de même empreinte
+les réécrit sans relancer le solveur.
+
+Les demandes identiques simultanées sont regroupées: la première réserve
+l'empreinte dans le cache Django (``cache.add`` est atomique), les suivantes
+attendent son résultat. Entre plusieurs workers, le cache configuré doit être
+partagé (Redis, Memcached); le cache local par défaut ne regroupe que les
+demandes d'un même processus.
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, Optional
+
+from django.core.cache import cache
+
+from core.models import TimetableGeneration
+from core.problem_instance import ProblemInstance
+
+INFLIGHT_KEY_PREFIX = 'timetable:inflight:'
+INFLIGHT_POLL_SECONDS = 2
+
+
+def problem_fingerprint(instance: ProblemInstance, parameters: Dict) -> str:
+    """Empreinte SHA-256 canonique d'une instance et des paramètres du solveur"""
+    data = instance.to_dict()
+    
+    # Rendre l'empreinte indépendante de l'ordre de chargement
+    data['program_ids'] = sorted(data['program_ids'])
+    data['unavailabilities'] = {
+        kind: {resource_id: sorted(periods) for resource_id, periods in by_resource.items()}
+        for kind, by_resource in data['unavailabilities'].items()
+    }
+    if data['published'] is not None:
+        data['published'] = sorted(data['published'])
+    
+    payload = json.dumps(
+        {'instance': data, 'parameters': parameters},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def find_cached_generation(fingerprint: str, exclude_id: int = None) -> Optional[TimetableGeneration]:
+    """Dernière génération réussie de même empreinte dont la solution est conservée"""
+    generations = TimetableGeneration.objects.filter(
+        fingerprint=fingerprint, status='success', solution__isnull=False
+    )
+    if exclude_id is not None:
+        generations = generations.exclude(id=exclude_id)
+    return generations.order_by('-generation_date').first()
+
+
+def claim_inflight(fingerprint: str, generation_id: int, timeout: float) -> Optional[int]:
+    """Réserver une empreinte
+    
+    Returns:
+        None si la réservation est obtenue, sinon l'ID de la génération en cours
+    """
+    key = INFLIGHT_KEY_PREFIX + fingerprint
+    if cache.add(key, generation_id, timeout=int(timeout)):
+        return None
+    owner = cache.get(key)
+    return None if owner in (None, generation_id) else owner
+
+
+def release_inflight(fingerprint: str, generation_id: int):
+    """Libérer une empreinte réservée par cette génération"""
+    key = INFLIGHT_KEY_PREFIX + fingerprint
+    if cache.get(key) == generation_id:
+        cache.delete(key)
+
+
+def wait_for_generation(generation_id: int, timeout: float) -> Optional[TimetableGeneration]:
+    """Attendre la fin d'une génération en cours; la retourner si elle a réussi"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        generation = TimetableGeneration.objects.filter(id=generation_id).first()
+        if generation is None or generation.status == 'failed':
+            return None
+        if generation.status == 'success':
+            return generation if generation.solution is not None else None
+        time.sleep(INFLIGHT_POLL_SECONDS)
+    return None
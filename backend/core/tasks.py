@@ -0,0 +1,55 @@
+"""
+Tâches Celery pour la génération d'emploi du temps
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Any
+
+from celery import shared_task
+
+from .models import TimetableGeneration
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def generate_timetable_task(self, generation_id: int, options: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Générer un emploi du temps en arrière-plan
+    
+    Args:
+        generation_id: ID du journal de génération créé par la vue
+        options: Options du solveur (template_week, excluded_dates, warm_start, fix_unaffected,
+            max_time_in_seconds, num_search_workers, relative_gap, two_phase, interval_model,
+            greedy_hint, use_cache, portfolio)
+    
+    Returns:
+        Dict avec les résultats de la génération
+    """
+    # Import différé: le solveur charge OR-Tools
+    from .timetable_solver import TimetableSolver
+    
+    options = dict(options or {})
+    options['excluded_dates'] = [
+        date.fromisoformat(d) for d in options.get('excluded_dates', [])
+    ]
+    
+    try:
+        generation = TimetableGeneration.objects.select_related('generated_by').get(pk=generation_id)
+    except TimetableGeneration.DoesNotExist:
+        logger.error(f"Journal de génération {generation_id} introuvable")
+        return {'success': False, 'error': 'Génération introuvable'}
+    
+    solver = TimetableSolver(
+        generation.generated_by,
+        generation.start_date,
+        generation.end_date,
+        list(generation.programs.all()),
+        generation_log=generation,
+        **options
+    )
+    result = solver.generate_timetable()
+    
+    logger.info(f"Génération {generation_id} terminée: {'succès' if result['success'] else 'échec'}")
+    return result
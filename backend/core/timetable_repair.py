@@ -0,0 +1,384 @@
+# timetable_repair.py - Réparation locale de l'emploi du temps publié
+"""
+Lorsqu'un enseignant devient indisponible ou qu'une salle est fermée en cours
+de semestre, seules les séances perturbées sont replanifiées, au lieu de
+relancer une génération complète qui supprime toutes les séances de la période.
+
+Le voisinage résolu se limite aux enseignants, salles et programmes concernés,
+dans les semaines concernées. Toutes les autres séances de ces semaines sont
+figées et ne servent qu'à calculer l'occupation.
+"""
+import logging
+import json
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional
+
+from ortools.sat.python import cp_model
+from django.db import transaction
+from django.db.models import Count
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.models import Room, Student, TimeSlot, Schedule, TimetableGeneration
+from core.timetable_solver import (
+    SUBJECT_ROOM_TYPES, load_teacher_unavailable_periods, load_unavailabilities, is_unavailable,
+    teacher_blocked_slots
+)
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Budget de temps d'une réparation
+REPAIR_MAX_TIME_SECONDS = 20
+
+# Coûts des mouvements (minimiser le nombre de changements visibles)
+COST_ROOM_CHANGE = 1
+COST_TIME_CHANGE = 3
+COST_UNRESOLVED = 1000
+
+
+def _week_start(day: date) -> date:
+    """Lundi de la semaine d'une date"""
+    return day - timedelta(days=day.weekday())
+
+
+class TimetableRepairer:
+    """Replanification locale des séances perturbées par CP-SAT"""
+    
+    def __init__(self, user: User, disrupted_ids: List[int],
+                 max_time_in_seconds: float = REPAIR_MAX_TIME_SECONDS):
+        self.user = user
+        self.disrupted_ids = set(disrupted_ids)
+        self.max_time_in_seconds = max_time_in_seconds
+        
+        self.movable = []     # Séances du voisinage (peuvent être déplacées)
+        self.candidates = {}  # schedule_id -> [(room, slot, date, coût)]
+        
+        self.stats = {
+            'disrupted_sessions': len(self.disrupted_ids),
+            'neighbourhood_sessions': 0,
+            'moved_sessions': 0,
+            'unresolved_sessions': 0,
+        }
+    
+    def repair(self) -> Dict:
+        """Construire le voisinage, le résoudre et appliquer les déplacements"""
+        start_time = datetime.now()
+        
+        disrupted = list(
+            Schedule.objects.filter(id__in=self.disrupted_ids, is_active=True, is_cancelled=False)
+            .select_related('teacher', 'room', 'time_slot', 'subject')
+            .prefetch_related('programs')
+        )
+        
+        if not disrupted:
+            return {'success': True, 'moved': [], 'unresolved': [], 'stats': self.stats}
+        
+        period_start = min(_week_start(s.start_date) for s in disrupted)
+        period_end = max(_week_start(s.start_date) for s in disrupted) + timedelta(days=6)
+        
+        generation_log = TimetableGeneration.objects.create(
+            generated_by=self.user,
+            status='optimizing',
+            start_date=period_start,
+            end_date=period_end
+        )
+        
+        try:
+            logger.info(f"🔧 Réparation de {len(disrupted)} séance(s) perturbée(s)...")
+            
+            occupancy = self._build_neighbourhood(disrupted, period_start, period_end)
+            self._build_candidates(occupancy, period_start, period_end)
+            moves, unresolved = self._solve()
+            
+            with transaction.atomic():
+                self._apply_moves(moves)
+            
+            generation_log.programs.set(
+                {program for session in self.movable for program in session.programs.all()}
+            )
+            generation_log.status = 'success'
+            generation_log.total_sessions_planned = len(moves)
+            generation_log.conflicts_resolved = len(self.disrupted_ids) - len(unresolved)
+            generation_log.processing_time = (datetime.now() - start_time).total_seconds()
+            generation_log.execution_log = json.dumps(self.stats, indent=2)
+            generation_log.save()
+            
+            logger.info(f"✅ Réparation terminée: {len(moves)} déplacement(s), "
+                        f"{len(unresolved)} séance(s) non replanifiée(s)")
+            
+            return {
+                'success': True,
+                'moved': [
+                    {
+                        'schedule_id': session.id,
+                        'room_id': room.id,
+                        'time_slot_id': slot.id,
+                        'date': session_date.isoformat(),
+                    }
+                    for session, room, slot, session_date in moves
+                ],
+                'unresolved': unresolved,
+                'stats': self.stats,
+                'generation_id': generation_log.id
+            }
+        
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la réparation: {str(e)}")
+            generation_log.status = 'failed'
+            generation_log.processing_time = (datetime.now() - start_time).total_seconds()
+            generation_log.execution_log = str(e)
+            generation_log.save()
+            
+            return {'success': False, 'error': str(e), 'generation_id': generation_log.id}
+    
+    def _build_neighbourhood(self, disrupted: List[Schedule], period_start: date,
+                             period_end: date) -> Dict[str, set]:
+        """Séparer les séances des semaines concernées en voisinage et séances figées"""
+        teacher_ids = {s.teacher_id for s in disrupted}
+        room_ids = {s.room_id for s in disrupted}
+        program_ids = {p.id for s in disrupted for p in s.programs.all()}
+        
+        week_sessions = (
+            Schedule.objects.filter(
+                start_date__gte=period_start,
+                start_date__lte=period_end,
+                is_active=True,
+                is_cancelled=False
+            )
+            .select_related('teacher', 'room', 'time_slot', 'subject')
+            .prefetch_related('programs')
+        )
+        
+        disrupted_weeks = {_week_start(s.start_date) for s in disrupted}
+        occupancy = {'teacher': set(), 'room': set(), 'program': set()}
+        self.movable = []
+        
+        for session in week_sessions:
+            session_programs = {p.id for p in session.programs.all()}
+            in_neighbourhood = (
+                session.id in self.disrupted_ids or (
+                    _week_start(session.start_date) in disrupted_weeks and (
+                        session.teacher_id in teacher_ids or
+                        session.room_id in room_ids or
+                        session_programs & program_ids
+                    )
+                )
+            )
+            
+            if in_neighbourhood:
+                self.movable.append(session)
+                continue
+            
+            # Séance figée: elle occupe ses ressources
+            key = (session.start_date, session.time_slot_id)
+            occupancy['teacher'].add((session.teacher_id,) + key)
+            occupancy['room'].add((session.room_id,) + key)
+            for program_id in session_programs:
+                occupancy['program'].add((program_id,) + key)
+        
+        self.stats['neighbourhood_sessions'] = len(self.movable)
+        return occupancy
+    
+    def _build_candidates(self, occupancy: Dict[str, set], period_start: date, period_end: date):
+        """Énumérer les placements réalisables de chaque séance du voisinage"""
+        rooms = list(Room.objects.filter(is_available=True))
+        time_slots = list(TimeSlot.objects.filter(is_active=True).order_by('day_of_week', 'start_time'))
+        unavailabilities = load_unavailabilities(period_start, period_end)
+        
+        program_ids = {p.id for session in self.movable for p in session.programs.all()}
+        students_per_program = dict(
+            Student.objects.filter(program_id__in=program_ids, is_active=True)
+            .values_list('program_id')
+            .annotate(total=Count('id'))
+        )
+        
+        unavailable_periods = load_teacher_unavailable_periods({session.teacher_id for session in self.movable})
+        blocked_slots_by_teacher = {}
+        self.candidates = {}
+        
+        for session in self.movable:
+            session_programs = [p.id for p in session.programs.all()]
+            total_students = sum(students_per_program.get(pid, 0) for pid in session_programs)
+            
+            allowed_types = SUBJECT_ROOM_TYPES.get(session.subject.subject_type)
+            session_rooms = [
+                room for room in rooms
+                if room.capacity >= total_students and (not allowed_types or room.room_type in allowed_types)
+            ]
+            
+            if session.teacher_id not in blocked_slots_by_teacher:
+                blocked_slots_by_teacher[session.teacher_id] = teacher_blocked_slots(
+                    unavailable_periods.get(session.teacher_id, []), time_slots
+                )
+            blocked = blocked_slots_by_teacher[session.teacher_id]
+            monday = _week_start(session.start_date)
+            
+            candidates = []
+            for slot in time_slots:
+                if slot.id in blocked:
+                    continue
+                session_date = monday + timedelta(days=slot.day_of_week)
+                key = (session_date, slot.id)
+                
+                if (session.teacher_id,) + key in occupancy['teacher']:
+                    continue
+                if any((pid,) + key in occupancy['program'] for pid in session_programs):
+                    continue
+                
+                same_time = slot.id == session.time_slot_id and session_date == session.start_date
+                
+                for room in session_rooms:
+                    if (room.id,) + key in occupancy['room']:
+                        continue
+                    if is_unavailable(unavailabilities, session.teacher_id, room.id, session_date, slot):
+                        continue
+                    
+                    if same_time and room.id == session.room_id:
+                        cost = 0
+                    elif same_time:
+                        cost = COST_ROOM_CHANGE
+                    else:
+                        cost = COST_TIME_CHANGE + (room.id != session.room_id) * COST_ROOM_CHANGE
+                    candidates.append((room, slot, session_date, cost))
+            
+            # Une séance voisine non perturbée peut toujours rester en place
+            if session.id not in self.disrupted_ids and not any(c[3] == 0 for c in candidates):
+                candidates.append((session.room, session.time_slot, session.start_date, 0))
+            
+            self.candidates[session.id] = candidates
+    
+    def _solve(self):
+        """Résoudre le modèle de voisinage et retourner (déplacements, non replanifiées)"""
+        model = cp_model.CpModel()
+        choice_vars = {}        # (schedule_id, index) -> var
+        unresolved_vars = {}    # schedule_id -> var
+        by_teacher = {}
+        by_room = {}
+        by_program = {}
+        cost_terms = []
+        
+        for session in self.movable:
+            options = []
+            for index, (room, slot, session_date, cost) in enumerate(self.candidates[session.id]):
+                var = model.NewBoolVar(f"repair_{session.id}_{index}")
+                choice_vars[(session.id, index)] = var
+                options.append(var)
+                
+                key = (session_date, slot.id)
+                by_teacher.setdefault((session.teacher_id,) + key, []).append(var)
+                by_room.setdefault((room.id,) + key, []).append(var)
+                for program in session.programs.all():
+                    by_program.setdefault((program.id,) + key, []).append(var)
+                if cost:
+                    cost_terms.append(var * cost)
+            
+            if session.id in self.disrupted_ids:
+                # Une séance perturbée sans placement possible reste non replanifiée
+                unresolved = model.NewBoolVar(f"unresolved_{session.id}")
+                unresolved_vars[session.id] = unresolved
+                cost_terms.append(unresolved * COST_UNRESOLVED)
+                model.Add(sum(options) + unresolved == 1)
+            else:
+                model.Add(sum(options) == 1)
+        
+        for group in (by_teacher, by_room, by_program):
+            for resource_vars in group.values():
+                if len(resource_vars) > 1:
+                    model.Add(sum(resource_vars) <= 1)
+        
+        model.Minimize(sum(cost_terms))
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        status = solver.Solve(model)
+        
+        self.stats['solver_status'] = solver.StatusName(status)
+        self.stats['solver_wall_time'] = round(solver.WallTime(), 3)
+        
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            raise Exception("Aucune réparation trouvée dans le budget de temps")
+        
+        moves = []
+        unresolved = []
+        for session in self.movable:
+            if session.id in unresolved_vars and solver.Value(unresolved_vars[session.id]):
+                unresolved.append(session.id)
+                continue
+            
+            for index, (room, slot, session_date, cost) in enumerate(self.candidates[session.id]):
+                if solver.Value(choice_vars[(session.id, index)]):
+                    if cost:
+                        moves.append((session, room, slot, session_date))
+                    break
+        
+        self.stats['moved_sessions'] = len(moves)
+        self.stats['unresolved_sessions'] = len(unresolved)
+        return moves, unresolved
+    
+    def _apply_moves(self, moves):
+        """Appliquer uniquement les séances déplacées"""
+        for session, room, slot, session_date in moves:
+            session.room = room
+            session.time_slot = slot
+            session.start_date = session_date
+            session.end_date = session_date
+            session.sync_ranges(slot)
+        
+        Schedule.objects.bulk_update(
+            [session for session, _, _, _ in moves],
+            ['room', 'time_slot', 'start_date', 'end_date', 'time_range', 'date_range']
+        )
+
+
+# Fonctions utilitaires
+
+def disrupted_sessions(teacher_id: int = None, room_id: int = None,
+                       start_date: date = None, end_date: date = None) -> List[int]:
+    """Séances actives d'un enseignant ou d'une salle sur une période
+    
+    Sans période, seule la semaine en cours est concernée (et non toutes les
+    séances passées et futures); une borne seule s'étend à sa semaine.
+    """
+    if start_date is None:
+        start_date = _week_start(end_date or timezone.localdate())
+    if end_date is None:
+        end_date = _week_start(start_date) + timedelta(days=6)
+    
+    sessions = Schedule.objects.filter(
+        is_active=True, is_cancelled=False, start_date__gte=start_date, start_date__lte=end_date
+    )
+    
+    if teacher_id:
+        sessions = sessions.filter(teacher_id=teacher_id)
+    if room_id:
+        sessions = sessions.filter(room_id=room_id)
+    
+    return list(sessions.values_list('id', flat=True))
+
+
+def repair_timetable(
+    user_id: int,
+    schedule_ids: List[int] = None,
+    teacher_id: int = None,
+    room_id: int = None,
+    start_date: date = None,
+    end_date: date = None,
+    max_time_in_seconds: float = REPAIR_MAX_TIME_SECONDS
+) -> Dict:
+    """Réparer l'emploi du temps autour de séances perturbées"""
+    try:
+        user = User.objects.get(id=user_id)
+        
+        if not schedule_ids:
+            if not teacher_id and not room_id:
+                return {'success': False, 'error': 'Aucune séance perturbée indiquée'}
+            schedule_ids = disrupted_sessions(teacher_id, room_id, start_date, end_date)
+        
+        repairer = TimetableRepairer(user, schedule_ids, max_time_in_seconds)
+        return repairer.repair()
+    
+    except User.DoesNotExist:
+        return {'success': False, 'error': 'Utilisateur introuvable'}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
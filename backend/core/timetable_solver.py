@@ -2,21 +2,32 @@
 import os
 import sys
 import django
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, time as dt_time
 import logging
-from typing import Dict, List, Tuple, Optional
+import math
+from typing import Callable, Dict, List, Tuple, Optional
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from queue import Empty
 
 # Configuration Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
 django.setup()
 
 from ortools.sat.python import cp_model
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, transaction
 from django.contrib.auth import get_user_model
-from core.models import (
-    Department, Program, Room, Subject, Teacher, Student,
-    TimeSlot, Schedule, TimetableGeneration
+from django.utils import timezone
+from core.models import Program, TeacherAvailability, TimeSlot, Schedule, TimetableGeneration
+from core.problem_instance import ProblemInstance, SlotInfo
+from schedule.models import Absence
+from core.feasibility import InfeasibleProblemError, analyze_feasibility
+from core.greedy_construction import greedy_construction
+from core.room_matching import match_rooms
+from core.solution_cache import (
+    claim_inflight, find_cached_generation, problem_fingerprint, release_inflight, wait_for_generation
 )
 
 User = get_user_model()
@@ -25,67 +36,1205 @@ User = get_user_model()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Types de salles compatibles avec chaque type de matière
+# (clés: Subject.SUBJECT_TYPE_CHOICES, valeurs: Room.ROOM_TYPE_CHOICES de core.models)
+SUBJECT_ROOM_TYPES = {
+    'lecture': ['amphitheater', 'lecture'],
+    'td': ['td', 'lecture'],
+    'lab': ['lab'],
+    'exam': ['amphitheater', 'lecture', 'td'],
+}
+
+
+# Paramètres par défaut du solveur
+SOLVER_MAX_TIME_SECONDS = 300  # 5 minutes max
+SOLVER_NUM_WORKERS = 4         # Parallélisation
+SOLVER_RELATIVE_GAP = 0.01     # Arrêt dès que la solution est à 1% de l'optimum
+
+# Plafonds appliqués aux paramètres fournis par les utilisateurs
+SOLVER_TIME_LIMIT_CAP = 900
+SOLVER_WORKERS_CAP = 16
+SOLVER_RELATIVE_GAP_CAP = 0.5
+
+# Au-delà de cette durée de résolution, l'instance est sauvegardée
+# (si TIMETABLE_INSTANCE_DUMP_DIR est configuré) pour être rejouée hors ligne
+SLOW_GENERATION_SECONDS = 60
+
+# Taille des lots pour l'écriture en masse des séances
+PERSIST_BATCH_SIZE = 1000
+
+# Modèle à intervalles: durée des séances par type de matière (minutes),
+# pas de placement des débuts de séance et durée d'une semaine modélisée
+SESSION_MINUTES = {
+    'lecture': 90,
+    'td': 90,
+    'lab': 180,
+    'exam': 120,
+}
+DEFAULT_SESSION_MINUTES = 120
+INTERVAL_GRANULARITY_MINUTES = 15
+WEEK_MINUTES = 7 * 24 * 60
+
+# Au-delà de ce nombre de variables, la construction gloutonne remplace CP-SAT
+# (surchargeable via settings.TIMETABLE_GREEDY_FALLBACK_VARIABLES)
+GREEDY_FALLBACK_VARIABLES = 2000000
+
+# Portefeuille de résolutions parallèles: configurations CP-SAT lancées chacune
+# dans un processus (surchargeable via settings.TIMETABLE_PORTFOLIO_CONFIGS)
+PORTFOLIO_CONFIGS = [
+    {'name': 'default', 'parameters': {'random_seed': 0}},
+    {'name': 'lns_only', 'parameters': {'random_seed': 1, 'use_lns_only': True}},
+    {'name': 'fixed_search', 'parameters': {'random_seed': 2, 'search_branching': cp_model.FIXED_SEARCH}},
+    {'name': 'portfolio_search', 'parameters': {'random_seed': 3, 'search_branching': cp_model.PORTFOLIO_SEARCH}},
+    {'name': 'core_based', 'parameters': {'random_seed': 4, 'optimize_with_core': True}},
+    {'name': 'linearization', 'parameters': {'random_seed': 5, 'linearization_level': 2}},
+]
+# Marge accordée aux processus au-delà de la limite de temps du solveur
+PORTFOLIO_GRACE_SECONDS = 30
+# Budget minimal d'un sous-problème lorsque le budget total est partagé
+PORTFOLIO_MIN_SECONDS = 1.0
+# Méthode de démarrage des processus du portefeuille: None pour celle de la
+# plateforme, ou 'spawn' (surchargeable via settings.TIMETABLE_PORTFOLIO_START_METHOD)
+PORTFOLIO_START_METHOD = None
+
+# Intervalle minimal entre deux écritures de l'objectif courant dans le journal
+PROGRESS_REPORT_SECONDS = 2
+
+# Explication d'une infaisabilité: temps total accordé à la réduction du noyau
+EXPLAIN_MAX_TIME_SECONDS = 30
+
+# Mode deux phases: nombre maximal de résolutions (créneaux) entre lesquelles
+# les déficits du couplage des salles sont ajoutés comme coupes
+TWO_PHASE_MAX_ROUNDS = 5
+
+
+def solver_budget(max_time_in_seconds: float = None, num_search_workers: int = None,
+                  relative_gap: float = None) -> Tuple[float, int, float]:
+    """Normaliser le budget du solveur en appliquant les valeurs par défaut et les plafonds"""
+    if max_time_in_seconds is None:
+        max_time_in_seconds = SOLVER_MAX_TIME_SECONDS
+    if num_search_workers is None:
+        num_search_workers = SOLVER_NUM_WORKERS
+    if relative_gap is None:
+        relative_gap = SOLVER_RELATIVE_GAP
+    
+    max_time_in_seconds, relative_gap = float(max_time_in_seconds), float(relative_gap)
+    # NaN traverserait min/max sans être plafonné
+    if not math.isfinite(max_time_in_seconds) or not math.isfinite(relative_gap):
+        raise ValueError("Budget du solveur invalide: max_time_in_seconds et relative_gap doivent être finis")
+    
+    return (
+        min(max(max_time_in_seconds, 1.0), SOLVER_TIME_LIMIT_CAP),
+        min(max(int(num_search_workers), 1), SOLVER_WORKERS_CAP),
+        min(max(relative_gap, 0.0), SOLVER_RELATIVE_GAP_CAP),
+    )
+
+
+def objective_gap(objective: float, bound: float) -> float:
+    """Écart relatif entre la meilleure solution et la borne de l'objectif"""
+    return abs(bound - objective) / max(1.0, abs(bound))
+
+
+def session_length(subject_type: str, hours_per_week: int) -> Tuple[int, int]:
+    """Durée d'une séance (minutes) et nombre de séances hebdomadaires d'une matière
+    
+    La durée dépend du type de matière, sans dépasser le volume hebdomadaire.
+    """
+    weekly_minutes = max(60, hours_per_week * 60)
+    minutes = min(SESSION_MINUTES.get(subject_type, DEFAULT_SESSION_MINUTES), weekly_minutes)
+    return minutes, max(1, round(weekly_minutes / minutes))
+
+
+def weekly_sessions(sessions_needed: int, num_weeks: int) -> List[int]:
+    """Répartir les séances d'une affectation (total sur la période) entre les semaines
+    
+    Le reste de la division va aux premières semaines: [3, 2] pour 5 séances
+    sur 2 semaines.
+    """
+    base, extra = divmod(sessions_needed, num_weeks)
+    return [base + (week < extra) for week in range(num_weeks)]
+
+
+def load_teacher_unavailable_periods(teacher_ids) -> Dict[int, List[Tuple[int, dt_time, dt_time]]]:
+    """Charger en une requête les plages déclarées indisponibles (TeacherAvailability) des enseignants"""
+    periods = {}
+    
+    for teacher_id, day, start_time, end_time in TeacherAvailability.objects.filter(
+        teacher_id__in=teacher_ids, is_available=False
+    ).values_list('teacher_id', 'day_of_week', 'start_time', 'end_time'):
+        periods.setdefault(teacher_id, []).append((day, start_time, end_time))
+    
+    return periods
+
+
+def teacher_blocked_slots(unavailable_periods: List[Tuple[int, dt_time, dt_time]], time_slots) -> set:
+    """Identifiants des créneaux qui chevauchent les plages indisponibles d'un enseignant"""
+    return {
+        slot.id
+        for day, start_time, end_time in unavailable_periods
+        for slot in time_slots
+        if slot.day_of_week == day and slot.start_time < end_time and slot.end_time > start_time
+    }
+
+
+def load_unavailabilities(start_date: date, end_date: date) -> Dict[str, Dict[int, List[Tuple[datetime, datetime]]]]:
+    """Charger en une requête les absences approuvées (enseignants, salles) d'une période"""
+    unavailabilities = {'teacher': {}, 'room': {}}
+    
+    absences = Absence.objects.filter(
+        absence_type__in=['teacher', 'room'],
+        is_approved=True,
+        start_datetime__date__lte=end_date,
+        end_datetime__date__gte=start_date
+    ).values_list('absence_type', 'teacher_id', 'room_id', 'start_datetime', 'end_datetime')
+    
+    for absence_type, teacher_id, room_id, start, end in absences:
+        resource_id = teacher_id if absence_type == 'teacher' else room_id
+        if resource_id is not None:
+            unavailabilities[absence_type].setdefault(resource_id, []).append((start, end))
+    
+    return unavailabilities
+
+
+def is_unavailable(unavailabilities: Dict, teacher_id: int, room_id: int,
+                   session_date: date, time_slot: TimeSlot) -> bool:
+    """Vérifier si l'enseignant ou la salle est absent pendant une séance"""
+    session_start = timezone.make_aware(datetime.combine(session_date, time_slot.start_time))
+    session_end = timezone.make_aware(datetime.combine(session_date, time_slot.end_time))
+    
+    periods = (
+        unavailabilities['teacher'].get(teacher_id, []) +
+        unavailabilities['room'].get(room_id, [])
+    )
+    return any(start < session_end and end > session_start for start, end in periods)
+
+
+def split_into_components(assignments: List[Dict]) -> List[List[Dict]]:
+    """Regrouper les affectations en composantes indépendantes
+    
+    Deux affectations sont liées si elles partagent un enseignant ou une salle
+    réalisable. Les composantes sont triées de la plus grande à la plus petite.
+    """
+    parent = {}
+    
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+    
+    for assignment in assignments:
+        node = ('assignment', assignment['id'])
+        # Modèle à intervalles: les programmes partagent aussi une contrainte
+        for program_id in assignment.get('programs', []):
+            union(node, ('program', program_id))
+        for teacher_id in assignment['teachers']:
+            union(node, ('teacher', teacher_id))
+        for room_id, _ in assignment['rooms']:
+            union(node, ('room', room_id))
+    
+    components = {}
+    for assignment in assignments:
+        components.setdefault(find(('assignment', assignment['id'])), []).append(assignment)
+    
+    return sorted(components.values(), key=len, reverse=True)
+
+
+class SolutionProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Remonter les valeurs d'objectif intermédiaires pendant la recherche
+    
+    Arrête la recherche dès que l'écart relatif à la borne passe sous
+    ``target_gap`` (0 = attendre l'optimum ou la limite de temps).
+    """
+    
+    def __init__(self, on_solution: Callable[[float, float], None] = None,
+                 target_gap: float = 0.0, min_interval: float = 1.0):
+        super().__init__()
+        self.on_solution = on_solution
+        self.target_gap = target_gap
+        self.min_interval = min_interval
+        self.stopped_early = False
+        self._last_report = None
+    
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        
+        if self.target_gap > 0 and objective_gap(objective, bound) <= self.target_gap:
+            self.stopped_early = True
+            self.StopSearch()
+        
+        if not self.on_solution:
+            return
+        
+        # Limiter la fréquence des remontées
+        now = datetime.now()
+        if self._last_report and (now - self._last_report).total_seconds() < self.min_interval:
+            return
+        self._last_report = now
+        self.on_solution(objective, bound)
+
+
+class TimetableModel:
+    """Modèle CP-SAT construit à partir d'un sous-problème sérialisable
+    
+    Le sous-problème ne contient que des identifiants et des entiers, ce qui
+    permet de le résoudre dans un processus séparé sans accès à la base:
+    
+        {
+            'assignments': [{'id', 'teachers': [teacher_id], 'sessions_needed', 'hours_per_session',
+                             'rooms': [(room_id, priorité)], 'slots': [(slot_id, priorité)],
+                             'unavailable': {teacher_id: [slot_id]} (optionnel),
+                             'hint': [(room_id, slot_id, week)] (optionnel),
+                             'teacher_hint': teacher_id (optionnel),
+                             'fixed': bool (optionnel)}],
+            'teacher_max_hours': {teacher_id: heures},
+            'num_weeks': nombre de semaines modélisées,
+            'two_phase': bool (optionnel),
+            'room_pools': [[room_id]] (optionnel, coupes du mode deux phases),
+            'explain': bool (optionnel, voir explain_infeasibility),
+        }
+    
+    En mode deux phases, les variables ne portent que sur les créneaux (salle
+    None) et la contrainte de salle devient une contrainte agrégée: dans chaque
+    créneau, les affectations dont les salles compatibles sont toutes dans un
+    même groupe de salles ne peuvent dépasser la taille de ce groupe. Les
+    salles concrètes sont ensuite choisies par couplage (voir assign_rooms).
+    
+    L'enseignant d'une affectation est une décision: parmi ``teachers``, une
+    variable de sélection désigne celui qui assure toutes les séances.
+    """
+    
+    def __init__(self, subproblem: Dict):
+        self.subproblem = subproblem
+        self.model = cp_model.CpModel()
+        self.schedule_vars = {}  # (assignment_id, room_id, slot_id, week) -> BoolVar
+        self.vars_by_assignment = {}  # assignment_id -> [(clé, BoolVar)]
+        self.teacher_vars = {}  # assignment_id -> {teacher_id: BoolVar, ou None si enseignant unique}
+        self._var_assignment = {}  # indice de variable -> assignment_id
+        self.assumptions = {}  # groupe de contraintes -> hypothèse (mode explication)
+        self.build_time = 0.0
+    
+    def build(self) -> 'TimetableModel':
+        """Créer les variables (tuples réalisables uniquement) et les contraintes"""
+        build_start = datetime.now()
+        num_weeks = self.subproblem['num_weeks']
+        two_phase = self.subproblem.get('two_phase', False)
+        
+        vars_by_assignment = {}
+        vars_by_teacher_slot = {}   # (teacher_id, slot_id, week) -> [var]
+        vars_by_room_slot = {}      # (room_id, slot_id, week) -> [var]
+        hours_by_teacher_week = {}  # (teacher_id, week) -> [var * heures]
+        objective_terms = []
+        
+        for assignment in self.subproblem['assignments']:
+            hint = set(assignment.get('hint', []))
+            if two_phase:
+                hint = {(None, slot_id, week) for _, slot_id, week in hint}
+            assignment_vars = []
+            keyed_vars = []
+            vars_by_slot = {}  # (slot_id, week) -> [var] (une par salle)
+            
+            for room_id, slot_id, week, weight in self._candidate_tuples(assignment, num_weeks, two_phase):
+                key = (assignment['id'], room_id, slot_id, week)
+                var = self.model.NewBoolVar(
+                    f"schedule_{assignment['id']}_{room_id}_{slot_id}_{week}"
+                )
+                self.schedule_vars[key] = var
+                self._var_assignment[var.Index()] = assignment['id']
+                
+                # Démarrage à chaud: partir de l'emploi du temps publié
+                if hint:
+                    self.model.AddHint(var, (room_id, slot_id, week) in hint)
+                
+                assignment_vars.append(var)
+                keyed_vars.append((key, var))
+                vars_by_slot.setdefault((slot_id, week), []).append(var)
+                vars_by_room_slot.setdefault((room_id, slot_id, week), []).append(var)
+                objective_terms.append(var * weight)
+            
+            vars_by_assignment[assignment['id']] = assignment_vars
+            self.vars_by_assignment[assignment['id']] = keyed_vars
+            
+            choice = self._teacher_choice(assignment)
+            unavailable = {
+                teacher_id: set(slot_ids)
+                for teacher_id, slot_ids in assignment.get('unavailable', {}).items()
+            }
+            
+            for (slot_id, week), slot_vars in vars_by_slot.items():
+                # Une affectation occupe au plus une salle par créneau
+                if len(slot_vars) > 1:
+                    placed = self.model.NewBoolVar(f"placed_{assignment['id']}_{slot_id}_{week}")
+                    self.model.Add(sum(slot_vars) == placed)
+                else:
+                    placed = slot_vars[0]
+                
+                for teacher_id, selected in choice.items():
+                    if slot_id in unavailable.get(teacher_id, ()):
+                        # Enseignant indisponible: ne peut être choisi si la séance tombe ici
+                        if selected is None:
+                            constraint = self.model.Add(placed == 0)
+                        else:
+                            constraint = self.model.AddImplication(selected, placed.Not())
+                        self._enforce(constraint, ('teacher', teacher_id))
+                        continue
+                    
+                    if selected is None:
+                        teaches = placed
+                    else:
+                        # teaches >= selected ET placed (suffit: n'apparaît que dans des <=)
+                        teaches = self.model.NewBoolVar(
+                            f"teaches_{assignment['id']}_{teacher_id}_{slot_id}_{week}"
+                        )
+                        self.model.AddBoolOr([selected.Not(), placed.Not(), teaches])
+                    
+                    vars_by_teacher_slot.setdefault((teacher_id, slot_id, week), []).append(teaches)
+                    hours_by_teacher_week.setdefault((teacher_id, week), []).append(
+                        teaches * assignment['hours_per_session']
+                    )
+        
+        # Contrainte 1: Chaque affectation doit avoir le bon nombre de sessions
+        for assignment in self.subproblem['assignments']:
+            self._enforce(
+                self.model.Add(sum(vars_by_assignment[assignment['id']]) == assignment['sessions_needed']),
+                ('assignment', assignment['id'])
+            )
+        
+        # Contrainte 2: Pas de conflit d'enseignant
+        # Un enseignant ne peut être que dans une salle à la fois
+        for (teacher_id, _, _), teacher_vars in vars_by_teacher_slot.items():
+            if len(teacher_vars) > 1:
+                self._enforce(self.model.Add(sum(teacher_vars) <= 1), ('teacher', teacher_id))
+        
+        # Contrainte 3: Pas de conflit de salle
+        # Une salle ne peut avoir qu'un cours à la fois
+        if two_phase:
+            self._add_room_pool_constraints(vars_by_room_slot)
+        else:
+            for (room_id, _, _), room_vars in vars_by_room_slot.items():
+                if len(room_vars) > 1:
+                    self._enforce(self.model.Add(sum(room_vars) <= 1), ('room', room_id))
+        
+        # Contraintes 4 et 5 (capacité des salles, disponibilités des enseignants):
+        # appliquées par construction via les masques de faisabilité, et par
+        # implication sur la sélection d'enseignant lorsque plusieurs sont possibles.
+        
+        # Contrainte 6: Limites horaires des enseignants
+        teacher_max_hours = self.subproblem['teacher_max_hours']
+        for (teacher_id, week), weekly_hours in hours_by_teacher_week.items():
+            if teacher_id in teacher_max_hours:
+                self._enforce(
+                    self.model.Add(sum(weekly_hours) <= teacher_max_hours[teacher_id]),
+                    ('teacher', teacher_id)
+                )
+        
+        # Objectif: Maximiser l'utilisation équilibrée des créneaux
+        # (favoriser les créneaux et salles de haute priorité)
+        # Inutile pour expliquer une infaisabilité
+        if not self.subproblem.get('explain'):
+            self.model.Maximize(sum(objective_terms))
+        
+        self.build_time = (datetime.now() - build_start).total_seconds()
+        return self
+    
+    def _enforce(self, constraint: cp_model.Constraint, group: Tuple[str, int]) -> cp_model.Constraint:
+        """Conditionner une contrainte à l'hypothèse de son groupe (mode explication)"""
+        if self.subproblem.get('explain'):
+            if group not in self.assumptions:
+                self.assumptions[group] = self.model.NewBoolVar(f"assume_{group[0]}_{group[1]}")
+            constraint.OnlyEnforceIf(self.assumptions[group])
+        return constraint
+    
+    def _teacher_choice(self, assignment: Dict) -> Dict:
+        """Créer les variables de sélection d'enseignant d'une affectation
+        
+        Avec un seul enseignant possible (ou une affectation figée sur son
+        enseignant publié), aucune variable n'est nécessaire.
+        """
+        teachers = assignment['teachers']
+        teacher_hint = assignment.get('teacher_hint')
+        if assignment.get('fixed') and teacher_hint in teachers:
+            teachers = [teacher_hint]
+        
+        if len(teachers) == 1:
+            choice = {teachers[0]: None}
+        else:
+            choice = {
+                teacher_id: self.model.NewBoolVar(f"teacher_{assignment['id']}_{teacher_id}")
+                for teacher_id in teachers
+            }
+            self.model.AddExactlyOne(choice.values())
+            if teacher_hint in choice:
+                for teacher_id, selected in choice.items():
+                    self.model.AddHint(selected, teacher_id == teacher_hint)
+        
+        self.teacher_vars[assignment['id']] = choice
+        return choice
+    
+    def _add_room_pool_constraints(self, vars_by_room_slot: Dict):
+        """Contraintes agrégées de capacité en salles (mode deux phases)
+        
+        Les groupes sont les ensembles de salles compatibles des affectations
+        (type et capacité), toutes les salles du sous-problème, et les coupes
+        issues des couplages précédents.
+        """
+        room_sets = {a['id']: frozenset(room_id for room_id, _ in a['rooms'])
+                     for a in self.subproblem['assignments']}
+        pools = set(room_sets.values())
+        pools.add(frozenset().union(*room_sets.values()))
+        pools.update(frozenset(pool) for pool in self.subproblem.get('room_pools', []))
+        
+        # Variables de placement regroupées par (créneau, semaine)
+        vars_by_slot = {}
+        for (_, slot_id, week), slot_vars in vars_by_room_slot.items():
+            vars_by_slot[(slot_id, week)] = slot_vars
+        
+        for pool in pools:
+            if not pool:
+                continue
+            members = {assignment_id for assignment_id, rooms in room_sets.items() if rooms <= pool}
+            for (slot_id, week), slot_vars in vars_by_slot.items():
+                pool_vars = [
+                    var for var in slot_vars if self._var_assignment[var.Index()] in members
+                ]
+                if len(pool_vars) > len(pool):
+                    self.model.Add(sum(pool_vars) <= len(pool))
+    
+    @staticmethod
+    def _candidate_tuples(assignment: Dict, num_weeks: int, two_phase: bool = False):
+        """Énumérer les tuples (salle, créneau, semaine, poids) d'une affectation
+        
+        Une affectation figée (non concernée par les modifications) ne peut
+        reprendre que ses placements publiés. En mode deux phases, la salle
+        vaut None et le poids utilise la meilleure priorité de salle possible.
+        """
+        room_priorities = dict(assignment['rooms'])
+        slot_priorities = dict(assignment['slots'])
+        
+        if two_phase:
+            best_room = max(room_priorities.values())
+            if assignment.get('fixed'):
+                slots = sorted({(slot_id, week) for _, slot_id, week in assignment['hint']})
+            else:
+                slots = [(slot_id, week) for slot_id, _ in assignment['slots'] for week in range(num_weeks)]
+            for slot_id, week in slots:
+                yield None, slot_id, week, slot_priorities[slot_id] * best_room
+            return
+        
+        if assignment.get('fixed'):
+            for room_id, slot_id, week in assignment['hint']:
+                yield room_id, slot_id, week, slot_priorities[slot_id] * room_priorities[room_id]
+            return
+        
+        for room_id, room_priority in assignment['rooms']:
+            for slot_id, slot_priority in assignment['slots']:
+                # Pondérer par la priorité du créneau et de la salle
+                weight = slot_priority * room_priority
+                for week in range(num_weeks):
+                    yield room_id, slot_id, week, weight
+    
+    def solve(self, max_time_in_seconds: float = SOLVER_MAX_TIME_SECONDS,
+              num_search_workers: int = SOLVER_NUM_WORKERS,
+              on_solution: Callable[[float, float], None] = None,
+              target_gap: float = 0.0, parameters: Dict = None) -> Dict:
+        """Résoudre le modèle et retourner les tuples retenus
+        
+        ``parameters`` surcharge des paramètres CP-SAT (graine, stratégie de
+        recherche...), voir PORTFOLIO_CONFIGS.
+        """
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max_time_in_seconds
+        solver.parameters.num_search_workers = num_search_workers
+        for name, value in (parameters or {}).items():
+            setattr(solver.parameters, name, value)
+        
+        callback = SolutionProgressCallback(on_solution, target_gap)
+        status = solver.Solve(self.model, callback)
+        found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        
+        result = {
+            'status': status,
+            'status_name': solver.StatusName(status),
+            'selected': [],
+            'teachers': {},
+            'num_assignments': len(self.subproblem['assignments']),
+            'num_variables': len(self.schedule_vars),
+            'build_time': self.build_time,
+            'wall_time': solver.WallTime(),
+            'branches': solver.NumBranches(),
+            'conflicts': solver.NumConflicts(),
+            'objective': solver.ObjectiveValue() if found else None,
+            'bound': solver.BestObjectiveBound() if found else None,
+            'gap': objective_gap(solver.ObjectiveValue(), solver.BestObjectiveBound()) if found else None,
+            'stopped_early': callback.stopped_early,
+        }
+        
+        if found:
+            result['selected'] = self._true_literals(solver)
+            result['teachers'] = self._selected_teachers(solver)
+        
+        return result
+    
+    def _true_literals(self, solver: cp_model.CpSolver) -> List[Tuple[int, int, int, int]]:
+        """Extraire les tuples retenus sans interroger chaque variable
+        
+        Le vecteur solution est copié une seule fois; chaque affectation est
+        parcourue jusqu'à avoir trouvé ses ``sessions_needed`` littéraux vrais.
+        """
+        values = solver.ResponseProto().solution
+        selected = []
+        
+        for assignment in self.subproblem['assignments']:
+            remaining = assignment['sessions_needed']
+            for key, var in self.vars_by_assignment[assignment['id']]:
+                if values[var.Index()]:
+                    selected.append(key)
+                    remaining -= 1
+                    if not remaining:
+                        break
+        
+        return selected
+    
+    def _selected_teachers(self, solver: cp_model.CpSolver) -> Dict[int, int]:
+        """Enseignant retenu pour chaque affectation: assignment_id -> teacher_id"""
+        values = solver.ResponseProto().solution
+        teachers = {}
+        
+        for assignment_id, choice in self.teacher_vars.items():
+            for teacher_id, selected in choice.items():
+                if selected is None or values[selected.Index()]:
+                    teachers[assignment_id] = teacher_id
+                    break
+        
+        return teachers
+
+
+class IntervalTimetableModel(TimetableModel):
+    """Modèle CP-SAT à intervalles optionnels (séances de durée variable)
+    
+    Chaque séance est un intervalle dont le début est choisi dans les plages
+    d'enseignement de la grille (union des créneaux de chaque jour, au pas de
+    INTERVAL_GRANULARITY_MINUTES). La salle est choisie parmi des intervalles
+    optionnels; les conflits s'expriment par AddNoOverlap par salle, par
+    enseignant et par programme. Le sous-problème contient en plus:
+    
+        'slot_times': {slot_id: (jour, début en minutes, fin en minutes)},
+        et pour chaque affectation 'session_minutes' et 'programs'.
+    
+    Les tuples retenus sont (assignment_id, room_id, (jour, début, fin), week).
+    """
+    
+    def __init__(self, subproblem: Dict):
+        super().__init__(subproblem)
+        self.sessions = []  # (assignment_id, week, start, {room_id: présence})
+        self.skipped = []   # affectations sans plage assez longue pour leurs séances
+    
+    def build(self) -> 'IntervalTimetableModel':
+        """Créer les intervalles et les contraintes NoOverlap"""
+        build_start = datetime.now()
+        num_weeks = self.subproblem['num_weeks']
+        slot_times = self.subproblem['slot_times']
+        starts_by_duration = {}
+        
+        intervals_by_room = {}
+        intervals_by_teacher = {}
+        intervals_by_program = {}
+        objective_terms = []
+        
+        for assignment in self.subproblem['assignments']:
+            duration = assignment['session_minutes']
+            if duration not in starts_by_duration:
+                starts_by_duration[duration] = self._week_starts(slot_times, duration)
+            week_starts = starts_by_duration[duration]
+            if not week_starts:
+                # Aucune plage assez longue: l'affectation est écartée et signalée
+                # (TimetableSolver les filtre en amont avec un diagnostic 'session_length')
+                logger.warning(
+                    f"⚠️ Affectation #{assignment['id']}: aucune plage de {duration} minutes dans la grille"
+                )
+                self.skipped.append(assignment['id'])
+                continue
+            
+            choice = self._teacher_choice(assignment)
+            hints = self._session_hints(assignment, slot_times)
+            room_priorities = dict(assignment['rooms'])
+            
+            # sessions_needed est un total sur les semaines, comme dans TimetableModel
+            for week, count in enumerate(weekly_sessions(assignment['sessions_needed'], num_weeks)):
+                offset = week * WEEK_MINUTES
+                domain = cp_model.Domain.FromValues([offset + start for start in week_starts])
+                previous_end = None
+                
+                for index in range(count):
+                    name = f"{assignment['id']}_{week}_{index}"
+                    start = self.model.NewIntVarFromDomain(domain, f"start_{name}")
+                    interval = self.model.NewFixedSizeIntervalVar(start, duration, f"session_{name}")
+                    
+                    # Briser les symétries: les séances d'une semaine sont ordonnées
+                    if previous_end is not None:
+                        self.model.Add(start >= previous_end)
+                    previous_end = start + duration
+                    
+                    # Programmes: une séance à la fois
+                    for program_id in assignment['programs']:
+                        intervals_by_program.setdefault(program_id, []).append(interval)
+                    
+                    # Enseignant: intervalle optionnel si le choix est ouvert
+                    for teacher_id, selected in choice.items():
+                        if selected is None:
+                            teacher_interval = interval
+                        else:
+                            teacher_interval = self.model.NewOptionalFixedSizeIntervalVar(
+                                start, duration, selected, f"teacher_{name}_{teacher_id}"
+                            )
+                        intervals_by_teacher.setdefault(teacher_id, []).append(teacher_interval)
+                    
+                    # Salle: un intervalle optionnel par salle compatible
+                    presences = {}
+                    for room_id, priority in assignment['rooms']:
+                        present = self.model.NewBoolVar(f"room_{name}_{room_id}")
+                        presences[room_id] = present
+                        intervals_by_room.setdefault(room_id, []).append(
+                            self.model.NewOptionalFixedSizeIntervalVar(
+                                start, duration, present, f"room_interval_{name}_{room_id}"
+                            )
+                        )
+                        objective_terms.append(present * priority)
+                        self.schedule_vars[(assignment['id'], room_id, index, week)] = present
+                    self.model.AddExactlyOne(presences.values())
+                    
+                    hint = hints.get((week, index))
+                    if hint:
+                        room_id, hinted_start = hint
+                        self.model.AddHint(start, offset + hinted_start)
+                        for candidate, present in presences.items():
+                            self.model.AddHint(present, candidate == room_id)
+                        if assignment.get('fixed') and room_id in room_priorities:
+                            self.model.Add(start == offset + hinted_start)
+                            self.model.Add(presences[room_id] == 1)
+                    
+                    self.sessions.append((assignment['id'], week, start, presences))
+        
+        # Indisponibilités des enseignants: intervalles fixes dans leur NoOverlap,
+        # une seule fois par enseignant et par semaine (deux intervalles fixes
+        # identiques dans un même NoOverlap rendraient le modèle infaisable)
+        blocked_by_teacher = {}
+        for assignment in self.subproblem['assignments']:
+            for teacher_id, slot_ids in assignment.get('unavailable', {}).items():
+                blocked_by_teacher.setdefault(teacher_id, set()).update(slot_ids)
+        
+        for teacher_id, slot_ids in blocked_by_teacher.items():
+            for slot_id in sorted(slot_ids):
+                day, slot_start, slot_end = slot_times[slot_id]
+                for week in range(num_weeks):
+                    begin = week * WEEK_MINUTES + day * 24 * 60 + slot_start
+                    intervals_by_teacher.setdefault(teacher_id, []).append(
+                        self.model.NewIntervalVar(
+                            begin, slot_end - slot_start, begin + slot_end - slot_start,
+                            f"blocked_{teacher_id}_{slot_id}_{week}"
+                        )
+                    )
+        
+        for intervals in (intervals_by_room, intervals_by_teacher, intervals_by_program):
+            for resource_intervals in intervals.values():
+                if len(resource_intervals) > 1:
+                    self.model.AddNoOverlap(resource_intervals)
+        
+        # Charge hebdomadaire: volume de chaque affectation selon sa répartition par semaine
+        teacher_max_hours = self.subproblem['teacher_max_hours']
+        load_by_teacher_week = {}
+        for assignment in self.subproblem['assignments']:
+            if assignment['id'] in self.skipped:
+                continue
+            counts = weekly_sessions(assignment['sessions_needed'], num_weeks)
+            for teacher_id, selected in self.teacher_vars.get(assignment['id'], {}).items():
+                for week, count in enumerate(counts):
+                    weekly_minutes = assignment['session_minutes'] * count
+                    load_by_teacher_week.setdefault((teacher_id, week), []).append(
+                        weekly_minutes if selected is None else selected * weekly_minutes
+                    )
+        for (teacher_id, _), load in load_by_teacher_week.items():
+            if teacher_id in teacher_max_hours:
+                self.model.Add(sum(load) <= teacher_max_hours[teacher_id] * 60)
+        
+        # Objectif: favoriser les salles de haute priorité
+        self.model.Maximize(sum(objective_terms))
+        
+        self.build_time = (datetime.now() - build_start).total_seconds()
+        return self
+    
+    def solve(self, *args, **kwargs) -> Dict:
+        """Résoudre le modèle; 'skipped' liste les affectations écartées à la construction"""
+        result = super().solve(*args, **kwargs)
+        result['skipped'] = list(self.skipped)
+        return result
+    
+    @staticmethod
+    def _week_starts(slot_times: Dict, duration: int) -> List[int]:
+        """Débuts possibles (minutes depuis lundi 0h) d'une séance dans la grille
+        
+        Les créneaux contigus ou chevauchants d'un même jour forment une plage.
+        """
+        windows_by_day = {}
+        for day, start, end in sorted(slot_times.values()):
+            windows = windows_by_day.setdefault(day, [])
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        
+        starts = []
+        for day, windows in windows_by_day.items():
+            for window_start, window_end in windows:
+                starts.extend(
+                    day * 24 * 60 + minute
+                    for minute in range(window_start, window_end - duration + 1, INTERVAL_GRANULARITY_MINUTES)
+                )
+        return starts
+    
+    @staticmethod
+    def _session_hints(assignment: Dict, slot_times: Dict) -> Dict[Tuple[int, int], Tuple[int, int]]:
+        """Placements publiés: (semaine, rang de séance) -> (room_id, début dans la semaine)"""
+        by_week = {}
+        for room_id, slot_id, week in assignment.get('hint', []):
+            day, start, _ = slot_times[slot_id]
+            by_week.setdefault(week, []).append((day * 24 * 60 + start, room_id))
+        
+        hints = {}
+        for week, placements in by_week.items():
+            for index, (start, room_id) in enumerate(sorted(placements)):
+                hints[(week, index)] = (room_id, start)
+        return hints
+    
+    def _true_literals(self, solver: cp_model.CpSolver) -> List[Tuple]:
+        """Extraire les séances: (assignment_id, room_id, (jour, début, fin), week)"""
+        durations = {a['id']: a['session_minutes'] for a in self.subproblem['assignments']}
+        selected = []
+        
+        for assignment_id, week, start, presences in self.sessions:
+            minute = solver.Value(start) - week * WEEK_MINUTES
+            day, begin = divmod(minute, 24 * 60)
+            room_id = next(room_id for room_id, present in presences.items() if solver.Value(present))
+            selected.append((assignment_id, room_id, (day, begin, begin + durations[assignment_id]), week))
+        
+        return selected
+
+
+def assign_rooms(subproblem: Dict, selected: List[Tuple]) -> Tuple[List[Tuple], int, List[List[int]]]:
+    """Phase 2: choisir les salles des placements (salle None) créneau par créneau
+    
+    Retourne (tuples avec salle, nombre de séances sans salle, coupes).
+    """
+    assignments = {a['id']: a for a in subproblem['assignments']}
+    room_priority = {room_id: priority for a in assignments.values() for room_id, priority in a['rooms']}
+    
+    by_slot = {}
+    for assignment_id, _, slot_id, week in selected:
+        by_slot.setdefault((slot_id, week), []).append(assignment_id)
+    
+    placed = []
+    unmatched = 0
+    cuts = set()
+    for (slot_id, week), assignment_ids in by_slot.items():
+        sessions = {}
+        for assignment_id in assignment_ids:
+            assignment = assignments[assignment_id]
+            if assignment.get('fixed'):
+                # Une affectation figée garde sa salle publiée
+                sessions[assignment_id] = [
+                    room_id for room_id, s, w in assignment['hint'] if s == slot_id and w == week
+                ]
+            else:
+                sessions[assignment_id] = [room_id for room_id, _ in assignment['rooms']]
+        
+        rooms, deficient = match_rooms(sessions, room_priority)
+        placed.extend((assignment_id, room_id, slot_id, week) for assignment_id, room_id in rooms.items())
+        unmatched += len(assignment_ids) - len(rooms)
+        cuts.update(pool for pool in deficient if pool)
+    
+    return placed, unmatched, [sorted(pool) for pool in cuts]
+
+
+def solve_two_phase(subproblem: Dict, max_time_in_seconds: float = SOLVER_MAX_TIME_SECONDS,
+                    num_search_workers: int = SOLVER_NUM_WORKERS,
+                    on_solution: Callable[[float, float], None] = None,
+                    target_gap: float = 0.0, parameters: Dict = None) -> Dict:
+    """Créneaux par CP-SAT puis salles par couplage, avec coupes si le couplage échoue"""
+    subproblem = dict(subproblem, room_pools=list(subproblem.get('room_pools', [])))
+    totals = {'build_time': 0.0, 'wall_time': 0.0, 'branches': 0, 'conflicts': 0}
+    unmatched = 0
+    
+    for round_number in range(1, TWO_PHASE_MAX_ROUNDS + 1):
+        result = TimetableModel(subproblem).build().solve(
+            max_time_in_seconds, num_search_workers, on_solution=on_solution, target_gap=target_gap,
+            parameters=parameters
+        )
+        for key in totals:
+            totals[key] += result[key]
+        
+        if result['status'] not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            break
+        
+        placed, unmatched, cuts = assign_rooms(subproblem, result['selected'])
+        result['selected'] = placed
+        if not cuts:
+            break
+        subproblem['room_pools'].extend(cuts)
+    
+    fallback = bool(unmatched) and result['status'] in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if fallback:
+        # Couplage toujours incomplet: le modèle complet (salles comprises) tranche
+        logger.warning(f"⚠️ {unmatched} séance(s) sans salle après {round_number} tour(s), "
+                       f"résolution avec le modèle complet")
+        result = TimetableModel(dict(subproblem, two_phase=False)).build().solve(
+            max_time_in_seconds, num_search_workers, on_solution=on_solution, target_gap=target_gap,
+            parameters=parameters
+        )
+        for key in totals:
+            totals[key] += result[key]
+        unmatched = 0
+    
+    result.update(totals)
+    result['two_phase_rounds'] = round_number
+    result['two_phase_fallback'] = fallback
+    result['unmatched_sessions'] = unmatched
+    return result
+
+
+def explain_infeasibility(subproblem: Dict,
+                          max_time_in_seconds: float = EXPLAIN_MAX_TIME_SECONDS) -> List[Tuple[str, int]]:
+    """Extraire un sous-ensemble infaisable minimal de groupes de contraintes
+    
+    Chaque groupe (séances d'une affectation, enseignant, salle) est conditionné
+    par une hypothèse CP-SAT. Le noyau renvoyé par
+    SufficientAssumptionsForInfeasibility est ensuite réduit par suppression:
+    un groupe est retiré tant que le modèle reste infaisable sans lui.
+    
+    Le modèle sur créneaux de la grille sert à l'explication (le mode deux
+    phases en est une relaxation); le modèle à intervalles n'est pas expliqué.
+    
+    Returns:
+        Groupes ('assignment', id), ('teacher', id) ou ('room', id); liste vide si
+        l'infaisabilité n'a pas pu être rattachée à des groupes dans le temps imparti
+    """
+    if subproblem.get('interval_model'):
+        return []
+    
+    timetable_model = TimetableModel({**subproblem, 'two_phase': False, 'explain': True}).build()
+    model = timetable_model.model
+    groups_by_index = {literal.Index(): group for group, literal in timetable_model.assumptions.items()}
+    explain_start = datetime.now()
+    
+    def infeasible_core(groups):
+        """Noyau des hypothèses si le modèle restreint à ces groupes est infaisable, sinon None"""
+        remaining = max_time_in_seconds - (datetime.now() - explain_start).total_seconds()
+        if remaining <= 0:
+            return None
+        model.ClearAssumptions()
+        model.AddAssumptions([timetable_model.assumptions[group] for group in groups])
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = remaining
+        # Le noyau n'est fiable qu'avec un seul worker
+        solver.parameters.num_search_workers = 1
+        if solver.Solve(model) != cp_model.INFEASIBLE:
+            return None
+        return {groups_by_index[index] for index in solver.SufficientAssumptionsForInfeasibility()}
+    
+    core = infeasible_core(list(timetable_model.assumptions))
+    if not core:
+        return []
+    core = sorted(core)
+    
+    # Réduction par suppression: un groupe est nécessaire si le retirer rend le modèle faisable
+    index = 0
+    while index < len(core):
+        candidate = core[:index] + core[index + 1:]
+        reduced = infeasible_core(candidate)
+        if reduced is None:
+            index += 1
+        else:
+            core = [group for group in candidate if group in reduced]
+    
+    return core
+
+
+def solve_subproblem(subproblem: Dict, max_time_in_seconds: float = SOLVER_MAX_TIME_SECONDS,
+                     num_search_workers: int = SOLVER_NUM_WORKERS, target_gap: float = 0.0,
+                     on_solution: Callable[[float, float], None] = None,
+                     parameters: Dict = None) -> Dict:
+    """Construire et résoudre un sous-problème (point d'entrée des processus de travail)"""
+    if subproblem.get('interval_model'):
+        return IntervalTimetableModel(subproblem).build().solve(
+            max_time_in_seconds, num_search_workers, on_solution=on_solution, target_gap=target_gap,
+            parameters=parameters
+        )
+    if subproblem.get('two_phase'):
+        return solve_two_phase(
+            subproblem, max_time_in_seconds, num_search_workers,
+            on_solution=on_solution, target_gap=target_gap, parameters=parameters
+        )
+    return TimetableModel(subproblem).build().solve(
+        max_time_in_seconds, num_search_workers, on_solution=on_solution, target_gap=target_gap,
+        parameters=parameters
+    )
+
+
+def _portfolio_worker(index: int, config: Dict, subproblem: Dict, max_time_in_seconds: float,
+                      num_search_workers: int, target_gap: float, queue):
+    """Processus du portefeuille: résoudre avec une configuration et publier le résultat"""
+    try:
+        result = solve_subproblem(
+            subproblem, max_time_in_seconds, num_search_workers,
+            target_gap=target_gap, parameters=config.get('parameters')
+        )
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    queue.put((index, result))
+
+
+def solve_portfolio(subproblem: Dict, max_time_in_seconds: float = SOLVER_MAX_TIME_SECONDS,
+                    num_search_workers: int = 1, target_gap: float = 0.0,
+                    configs: List[Dict] = None) -> Dict:
+    """Résoudre un sous-problème avec plusieurs configurations CP-SAT en parallèle
+    
+    Chaque configuration tourne dans son propre processus. La première qui
+    prouve l'optimalité (ou l'infaisabilité) ou atteint l'écart cible gagne,
+    et les autres processus sont arrêtés. À défaut, le meilleur objectif
+    obtenu dans le temps imparti est retenu.
+    
+    Le résultat est celui de solve_subproblem, complété de ``portfolio_config``
+    (nom de la configuration gagnante) et ``portfolio_runs`` (configurations
+    terminées, avec leur statut et leur temps).
+    
+    Les processus reçoivent le sous-problème sérialisé (identifiants et entiers
+    uniquement): aucune donnée ni connexion Django n'a besoin d'être héritée,
+    ce qui permet le démarrage 'spawn' (macOS, Windows).
+    """
+    configs = configs or PORTFOLIO_CONFIGS
+    context = multiprocessing.get_context(
+        getattr(settings, 'TIMETABLE_PORTFOLIO_START_METHOD', PORTFOLIO_START_METHOD)
+    )
+    
+    # Les processus fils ne doivent pas hériter des connexions ouvertes
+    connections.close_all()
+    
+    queue = context.Queue()
+    processes = [
+        context.Process(
+            target=_portfolio_worker,
+            args=(index, config, subproblem, max_time_in_seconds, num_search_workers, target_gap, queue),
+            daemon=True
+        )
+        for index, config in enumerate(configs)
+    ]
+    for process in processes:
+        process.start()
+    
+    def reached_target(result):
+        if result['status'] in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+            return True
+        return result['status'] == cp_model.FEASIBLE and result['gap'] <= target_gap
+    
+    def score(result):
+        # Solution trouvée d'abord, puis meilleur objectif
+        found = result['status'] in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        return (found, result['objective'] if found else 0)
+    
+    best = None
+    runs = []
+    try:
+        for _ in processes:
+            try:
+                index, result = queue.get(timeout=max_time_in_seconds + PORTFOLIO_GRACE_SECONDS)
+            except Empty:
+                break
+            if 'error' in result:
+                logger.warning(f"⚠️ Configuration {configs[index]['name']} en échec: {result['error']}")
+                continue
+            
+            result['portfolio_config'] = configs[index]['name']
+            runs.append({
+                'config': configs[index]['name'],
+                'status': result['status_name'],
+                'wall_time': round(result['wall_time'], 3),
+                'objective': result['objective'],
+            })
+            if best is None or score(result) > score(best):
+                best = result
+            if reached_target(result):
+                best = result
+                break
+    finally:
+        # Arrêter les configurations encore en cours
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+    
+    if best is None:
+        raise RuntimeError("Aucune configuration du portefeuille n'a abouti")
+    
+    best['portfolio_runs'] = runs
+    return best
+
 
 class TimetableSolver:
     """Solveur d'emploi du temps utilisant OR-Tools CP-SAT"""
     
-    def __init__(self, user: User, start_date: date, end_date: date, programs: List[Program] = None):
+    def __init__(self, user: User, start_date: date, end_date: date, programs: List[Program] = None,
+                 template_week: bool = False, excluded_dates: List[date] = None,
+                 decompose: bool = True, max_processes: int = None,
+                 warm_start: bool = False, fix_unaffected: bool = False,
+                 generation_log: TimetableGeneration = None,
+                 max_time_in_seconds: float = None, num_search_workers: int = None,
+                 relative_gap: float = None, instance: ProblemInstance = None,
+                 two_phase: bool = False, interval_model: bool = False,
+                 greedy_hint: bool = False, use_cache: bool = True, portfolio: bool = False):
         self.user = user
         self.start_date = start_date
         self.end_date = end_date
-        self.programs = programs or Program.objects.filter(is_active=True)
+        self.programs = programs or Program.objects.all()
         
-        # Données du problème
-        self.subjects = []
-        self.teachers = []
-        self.rooms = []
-        self.time_slots = []
-        self.assignments = []  # (subject, teacher, programs, duration_hours)
+        # Mode "semaine type": une seule semaine est résolue puis répliquée
+        # sur toute la période, les exceptions étant appliquées ensuite
+        self.template_week = template_week
+        self.excluded_dates = set(excluded_dates or [])
+        self.num_weeks = (end_date - start_date).days // 7 + 1
+        self.model_weeks = 1 if template_week else self.num_weeks
         
-        # Variables du modèle
-        self.model = cp_model.CpModel()
-        self.schedule_vars = {}  # Variables de planification
-        self.assignment_vars = {}  # Variables d'affectation
+        # Mode deux phases: créneaux par CP-SAT, puis salles par couplage
+        self.two_phase = two_phase
+        
+        # Modèle à intervalles: séances de durée variable selon le type de matière
+        self.interval_model = interval_model
+        
+        # Construction gloutonne passée en indices de solution à CP-SAT
+        self.greedy_hint = greedy_hint
+        
+        # Cache des solutions: une génération d'entrées identiques n'est pas résolue à nouveau
+        self.use_cache = use_cache
+        self.fingerprint = None
+        self.solution_rows = []  # Séances écrites, conservées dans le journal de génération
+        
+        # Décomposition en sous-problèmes indépendants résolus en parallèle
+        self.decompose = decompose
+        self.max_processes = max_processes
+        
+        # Portefeuille: plusieurs configurations CP-SAT en concurrence par sous-problème
+        self.portfolio = portfolio
+        
+        # Mode incrémental: l'emploi du temps publié sert de point de départ,
+        # et les affectations non concernées par les modifications peuvent être figées
+        self.warm_start = warm_start or fix_unaffected
+        self.fix_unaffected = fix_unaffected
+        
+        # Budget du solveur (plafonné côté serveur)
+        self.max_time_in_seconds, self.num_search_workers, self.relative_gap = solver_budget(
+            max_time_in_seconds, num_search_workers, relative_gap
+        )
+        
+        # Données du problème (chargées en masse, ou fournies pour un rejeu hors ligne)
+        self.instance = instance
+        self.assignments = []  # (matière, enseignants qualifiés, programmes, durée) en indices denses
+        
+        # Modèle
+        self.feasible_rooms = {}  # assignment_id -> indices des salles compatibles
+        self.feasible_slots = {}  # assignment_id -> indices des créneaux disponibles
+        self.teacher_blocked = {}  # assignment_id -> {enseignant: indices des créneaux bloqués}
+        self.subproblems = []  # Sous-problèmes indépendants (voir TimetableModel)
+        self.selected_teachers = {}  # assignment_id -> teacher_id choisi par le solveur
+        self.unschedulable = []  # Affectations sans salle ni créneau réalisable
+        self.diagnostics = []  # Causes d'infaisabilité (analyse préalable ou sous-ensemble minimal)
         
         # Statistiques
         self.stats = {
             'total_assignments': 0,
             'total_sessions_planned': 0,
             'conflicts_resolved': 0,
-            'optimization_score': 0
+            'optimization_score': 0,
+            'template_week': template_week,
+            'two_phase': two_phase,
+            'interval_model': interval_model,
+            'greedy_hint': greedy_hint,
+            'portfolio': portfolio,
+            'solver_budget': {
+                'max_time_in_seconds': self.max_time_in_seconds,
+                'num_search_workers': self.num_search_workers,
+                'relative_gap': self.relative_gap,
+            }
         }
         
-        self.generation_log = None
+        # Journal existant lorsque la génération est lancée en arrière-plan
+        self.generation_log = generation_log
     
     def generate_timetable(self) -> Dict:
         """Méthode principale de génération d'emploi du temps"""
         start_time = datetime.now()
         
         # Créer le log de génération
-        self.generation_log = TimetableGeneration.objects.create(
-            generated_by=self.user,
-            status='pending',
-            start_date=self.start_date,
-            end_date=self.end_date
-        )
-        self.generation_log.programs.set(self.programs)
+        if self.generation_log is None:
+            self.generation_log = TimetableGeneration.objects.create(
+                generated_by=self.user,
+                status='pending',
+                start_date=self.start_date,
+                end_date=self.end_date
+            )
+            self.generation_log.programs.set(self.programs)
         
         try:
             logger.info("🚀 Début de la génération d'emploi du temps")
             
             # 1. Collecter les données
+            self._report_progress('collecting', 5)
             self._collect_data()
             
+            # Entrées identiques à une génération réussie: réécrire sa solution
+            if self.use_cache and self._reuse_cached_solution():
+                processing_time = (datetime.now() - start_time).total_seconds()
+                self._update_generation_log('success', processing_time)
+                
+                return {
+                    'success': True,
+                    'message': 'Emploi du temps réutilisé (entrées identiques)',
+                    'stats': self.stats,
+                    'generation_id': self.generation_log.id
+                }
+            
             # 2. Créer le modèle de contraintes
+            self._report_progress('building', 20)
             self._create_constraint_model()
             
+            # Rejeter immédiatement les demandes impossibles
+            if self._check_feasibility():
+                raise InfeasibleProblemError(
+                    "Demande impossible: " + "; ".join(d['message'] for d in self.diagnostics),
+                    self.diagnostics
+                )
+            
             # 3. Résoudre le problème
+            self._report_progress('solving', 30)
             solution = self._solve_model()
+            self._dump_slow_instance()
             
-            if not solution:
-                raise Exception("Aucune solution trouvée pour ce problème d'emploi du temps")
+            if solution is None:
+                message = "Aucune solution trouvée pour ce problème d'emploi du temps"
+                if self.diagnostics:
+                    message += " - contraintes incompatibles: " + "; ".join(
+                        d['message'] for d in self.diagnostics
+                    )
+                raise InfeasibleProblemError(message, self.diagnostics)
             
             # 4. Créer les emplois du temps en base
+            self._report_progress('persisting', 90)
             with transaction.atomic():
                 self._create_schedules_from_solution(solution)
             
@@ -110,288 +1259,881 @@ class TimetableSolver:
             return {
                 'success': False,
                 'error': str(e),
+                'diagnostics': getattr(e, 'diagnostics', []),
                 'generation_id': self.generation_log.id
             }
+        
+        finally:
+            if self.fingerprint:
+                release_inflight(self.fingerprint, self.generation_log.id)
     
-    def _collect_data(self):
-        """Collecter toutes les données nécessaires"""
-        logger.info("📊 Collecte des données...")
+    def _cache_parameters(self) -> Dict:
+        """Paramètres du solveur qui entrent dans l'empreinte de la génération"""
+        return {
+            'template_week': self.template_week,
+            'excluded_dates': sorted(d.isoformat() for d in self.excluded_dates),
+            'warm_start': self.warm_start,
+            'fix_unaffected': self.fix_unaffected,
+            'two_phase': self.two_phase,
+            'interval_model': self.interval_model,
+            'greedy_hint': self.greedy_hint,
+            'portfolio': self.portfolio,
+            'solver_budget': self.stats['solver_budget'],
+        }
+    
+    def _reuse_cached_solution(self) -> bool:
+        """Réécrire la solution d'une génération de même empreinte, sans résoudre
+        
+        Si une génération identique est en cours, on attend son résultat plutôt
+        que de lancer une seconde résolution.
+        """
+        self.fingerprint = problem_fingerprint(self.instance, self._cache_parameters())
+        self.generation_log.fingerprint = self.fingerprint
+        self.generation_log.save(update_fields=['fingerprint'])
         
-        # Récupérer toutes les matières des programmes sélectionnés
-        self.subjects = Subject.objects.filter(
-            programs__in=self.programs,
-            is_active=True
-        ).distinct()
+        cached = find_cached_generation(self.fingerprint, exclude_id=self.generation_log.id)
+        if cached is None:
+            owner = claim_inflight(
+                self.fingerprint, self.generation_log.id, self.max_time_in_seconds + SLOW_GENERATION_SECONDS
+            )
+            if owner is None:
+                return False
+            logger.info(f"⏳ Génération identique en cours ({owner}): attente de son résultat")
+            cached = wait_for_generation(owner, self.max_time_in_seconds + SLOW_GENERATION_SECONDS)
+            if cached is None:
+                return False
         
-        # Récupérer tous les enseignants disponibles
-        self.teachers = Teacher.objects.filter(
-            is_available=True,
-            subjects__in=self.subjects
-        ).distinct()
+        logger.info(f"♻️ Solution de la génération {cached.id} réutilisée")
+        self._report_progress('persisting', 90)
+        persist_start = datetime.now()
         
-        # Récupérer toutes les salles disponibles
-        self.rooms = Room.objects.filter(is_available=True)
+        schedules = []
+        schedule_programs = []
+        for title, subject_id, teacher_id, room_id, slot_id, session_date, duration, program_ids in cached.solution:
+            schedules.append(Schedule(
+                title=title,
+                subject_id=subject_id,
+                teacher_id=teacher_id,
+                room_id=room_id,
+                time_slot_id=slot_id,
+                start_date=date.fromisoformat(session_date),
+                end_date=date.fromisoformat(session_date),
+                duration_minutes=duration,
+                created_by=self.user
+            ))
+            schedule_programs.append(program_ids)
         
-        # Récupérer tous les créneaux horaires
-        self.time_slots = TimeSlot.objects.filter(is_active=True).order_by('day_of_week', 'start_time')
+        with transaction.atomic():
+            self._write_schedules(schedules, schedule_programs)
+        
+        self.stats['cache_hit'] = cached.id
+        self.stats['optimization_score'] = cached.optimization_score
+        self.stats['total_sessions_planned'] = len(schedules)
+        self.stats['persistence_time'] = round((datetime.now() - persist_start).total_seconds(), 3)
+        return True
+    
+    def _collect_data(self):
+        """Collecter toutes les données nécessaires (nombre fixe de requêtes)"""
+        logger.info("📊 Collecte des données...")
+        
+        if self.instance is None:
+            load_start = datetime.now()
+            self.instance = ProblemInstance.load(
+                [program.id for program in self.programs], self.start_date, self.end_date,
+                include_published=self.warm_start
+            )
+            self.stats['instance_load_time'] = round((datetime.now() - load_start).total_seconds(), 3)
         
         # Créer les affectations (matière -> enseignant -> programmes)
         self._create_assignments()
         
+        instance = self.instance
         logger.info(f"📈 Données collectées:")
-        logger.info(f"  • {len(self.subjects)} matières")
-        logger.info(f"  • {len(self.teachers)} enseignants")
-        logger.info(f"  • {len(self.rooms)} salles")
-        logger.info(f"  • {len(self.time_slots)} créneaux")
+        logger.info(f"  • {instance.num_subjects} matières")
+        logger.info(f"  • {instance.num_teachers} enseignants")
+        logger.info(f"  • {instance.num_rooms} salles")
+        logger.info(f"  • {instance.num_slots} créneaux")
         logger.info(f"  • {len(self.assignments)} affectations à planifier")
     
     def _create_assignments(self):
-        """Créer les affectations matière-enseignant-programmes"""
+        """Créer une affectation par matière et groupe de programmes
+        
+        L'enseignant n'est pas fixé ici: le solveur le choisit parmi les
+        enseignants qualifiés (voir TimetableModel._teacher_choice).
+        """
+        instance = self.instance
         self.assignments = []
         assignment_id = 0
         
-        for subject in self.subjects:
-            # Récupérer les enseignants qui peuvent enseigner cette matière
-            subject_teachers = subject.teachers.filter(is_available=True)
+        for subject in range(instance.num_subjects):
+            # Enseignants disponibles qui peuvent enseigner cette matière
+            subject_teachers = instance.subject_teachers[subject]
             
-            if not subject_teachers.exists():
-                logger.warning(f"⚠️ Aucun enseignant disponible pour {subject.name}")
+            if not subject_teachers:
+                logger.warning(f"⚠️ Aucun enseignant disponible pour {instance.subject_names[subject]}")
                 continue
             
-            # Récupérer les programmes qui ont cette matière
-            subject_programs = subject.programs.filter(id__in=[p.id for p in self.programs])
+            # Programmes sélectionnés qui ont cette matière
+            subject_programs = instance.subject_programs[subject]
             
-            if not subject_programs.exists():
+            if not subject_programs:
                 continue
             
-            for teacher in subject_teachers:
-                # Calculer le nombre d'heures nécessaires
-                total_hours_needed = subject.hours_per_week
-                sessions_needed = max(1, total_hours_needed // 2)  # Sessions de 2h par défaut
-                
-                assignment = {
-                    'id': assignment_id,
-                    'subject': subject,
-                    'teacher': teacher,
-                    'programs': list(subject_programs),
-                    'sessions_needed': sessions_needed,
-                    'hours_per_session': 2,
-                    'total_hours': total_hours_needed
-                }
-                
-                self.assignments.append(assignment)
-                assignment_id += 1
+            # Calculer le nombre d'heures nécessaires (volume hebdomadaire)
+            total_hours_needed = instance.subject_hours[subject]
+            sessions_per_week = max(1, total_hours_needed // 2)  # Sessions de 2h par défaut
+            session_minutes = 120
+            if self.interval_model:
+                # Durée native selon le type de matière (1h, 1h30, 3h...)
+                session_minutes, sessions_per_week = session_length(
+                    instance.subject_type[subject], total_hours_needed
+                )
+            # sessions_needed est un total sur les semaines modélisées, dans tous les modes
+            sessions_needed = sessions_per_week * self.model_weeks
+            
+            assignment = {
+                'id': assignment_id,
+                'subject': subject,
+                'teachers': list(subject_teachers),
+                'programs': subject_programs,
+                'sessions_needed': sessions_needed,
+                'sessions_per_week': sessions_per_week,
+                'hours_per_session': 2,
+                'session_minutes': session_minutes,
+                'total_hours': total_hours_needed
+            }
+            
+            self.assignments.append(assignment)
+            assignment_id += 1
         
         self.stats['total_assignments'] = len(self.assignments)
+        self.stats['teacher_choices'] = sum(1 for a in self.assignments if len(a['teachers']) > 1)
     
     def _create_constraint_model(self):
-        """Créer le modèle de contraintes CP-SAT"""
+        """Préparer les sous-problèmes CP-SAT (espace de décision creux)"""
         logger.info("🔧 Création du modèle de contraintes...")
         
         # Variables de décision: schedule[assignment_id, room_id, slot_id, week] = 0 ou 1
-        num_weeks = (self.end_date - self.start_date).days // 7 + 1
+        # Seuls les tuples réalisables (capacité, type de salle, disponibilité
+        # de l'enseignant) reçoivent une variable. En mode semaine type, la
+        # dimension "semaine" est réduite à une seule semaine représentative.
+        self._build_feasibility_masks()
         
-        for assignment in self.assignments:
-            for room in self.rooms:
-                for time_slot in self.time_slots:
-                    for week in range(num_weeks):
-                        var_name = f"schedule_{assignment['id']}_{room.id}_{time_slot.id}_{week}"
-                        self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)] = \
-                            self.model.NewBoolVar(var_name)
+        published = self._load_published_solution() if self.warm_start else {}
         
-        # Contrainte 1: Chaque affectation doit avoir le bon nombre de sessions
-        for assignment in self.assignments:
-            sessions_vars = []
-            for room in self.rooms:
-                for time_slot in self.time_slots:
-                    for week in range(num_weeks):
-                        sessions_vars.append(
-                            self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)]
-                        )
-            
-            self.model.Add(sum(sessions_vars) == assignment['sessions_needed'])
+        instance = self.instance
+        assignments = [
+            {
+                'id': assignment['id'],
+                'teachers': [instance.teacher_ids[t] for t in assignment['teachers']],
+                'unavailable': {
+                    instance.teacher_ids[t]: [instance.slot_ids[k] for k in blocked]
+                    for t, blocked in self.teacher_blocked[assignment['id']].items() if blocked
+                },
+                'sessions_needed': assignment['sessions_needed'],
+                'hours_per_session': assignment['hours_per_session'],
+                'rooms': [
+                    (instance.room_ids[r], instance.room_priority[r])
+                    for r in self.feasible_rooms[assignment['id']]
+                ],
+                'slots': [
+                    (instance.slot_ids[k], instance.slot_priority[k])
+                    for k in self.feasible_slots[assignment['id']]
+                ],
+            }
+            for assignment in self.assignments
+        ]
         
-        # Contrainte 2: Pas de conflit d'enseignant
-        for teacher in self.teachers:
-            teacher_assignments = [a for a in self.assignments if a['teacher'] == teacher]
-            
-            for time_slot in self.time_slots:
-                for week in range(num_weeks):
-                    teacher_vars = []
-                    for assignment in teacher_assignments:
-                        for room in self.rooms:
-                            teacher_vars.append(
-                                self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)]
-                            )
-                    
-                    # Un enseignant ne peut être que dans une salle à la fois
-                    if teacher_vars:
-                        self.model.Add(sum(teacher_vars) <= 1)
+        if self.interval_model:
+            # Les programmes partagent une contrainte NoOverlap dans ce modèle
+            for entry, assignment in zip(assignments, self.assignments):
+                entry['programs'] = list(assignment['programs'])
+                entry['session_minutes'] = assignment['session_minutes']
         
-        # Contrainte 3: Pas de conflit de salle
-        for room in self.rooms:
-            for time_slot in self.time_slots:
-                for week in range(num_weeks):
-                    room_vars = []
-                    for assignment in self.assignments:
-                        room_vars.append(
-                            self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)]
-                        )
-                    
-                    # Une salle ne peut avoir qu'un cours à la fois
-                    self.model.Add(sum(room_vars) <= 1)
+        if published:
+            self._apply_published_solution(assignments, published)
         
-        # Contrainte 4: Capacité des salles
-        for assignment in self.assignments:
-            total_students = sum([
-                program.students.filter(is_active=True).count() 
-                for program in assignment['programs']
-            ])
-            
-            for room in self.rooms:
-                if total_students > room.capacity:
-                    # Interdire cette combinaison
-                    for time_slot in self.time_slots:
-                        for week in range(num_weeks):
-                            self.model.Add(
-                                self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)] == 0
-                            )
+        # Les affectations qui ne partagent ni enseignant ni salle (ni programme
+        # pour le modèle à intervalles) forment des problèmes indépendants
+        if self.decompose:
+            components = split_into_components(assignments)
+        else:
+            components = [assignments] if assignments else []
+        
+        teacher_max_hours = dict(zip(instance.teacher_ids, instance.teacher_max_hours))
+        self.subproblems = [
+            {
+                'assignments': component,
+                'teacher_max_hours': {
+                    teacher_id: teacher_max_hours[teacher_id]
+                    for a in component for teacher_id in a['teachers'] if teacher_id in teacher_max_hours
+                },
+                'num_weeks': self.model_weeks,
+                'two_phase': self.two_phase,
+                'interval_model': self.interval_model,
+            }
+            for component in components
+        ]
+        if self.interval_model:
+            slot_times = self._slot_times()
+            for subproblem in self.subproblems:
+                subproblem['slot_times'] = slot_times
+        
+        full_size = len(self.assignments) * instance.num_rooms * instance.num_slots * self.num_weeks
+        if self.interval_model:
+            # Une variable de début et une présence par salle compatible, par séance
+            created = sum(
+                a['sessions_needed'] * (1 + len(a['rooms'])) for a in assignments
+            )
+        else:
+            created = sum(
+                len(a['hint']) if a.get('fixed')
+                else (1 if self.two_phase else len(a['rooms'])) * len(a['slots']) * self.model_weeks
+                for a in assignments
+            )
+        self.stats['variables_full'] = full_size
+        self.stats['variables_created'] = created
+        self.stats['variables_pruned'] = full_size - created
+        self.stats['subproblems'] = len(self.subproblems)
+        self.stats['largest_subproblem'] = max(
+            (len(sp['assignments']) for sp in self.subproblems), default=0
+        )
+        
+        logger.info("✅ Modèle de contraintes préparé")
+        logger.info(f"  • {created} variables sur {full_size} possibles "
+                    f"({full_size - created} élaguées)")
+        logger.info(f"  • {len(self.subproblems)} sous-problème(s) indépendant(s)")
+    
+    def _load_published_solution(self) -> Dict[int, Dict]:
+        """Charger les séances publiées de la période
+        
+        Retourne assignment_id -> {'placements': [(room_id, slot_id, week)],
+        'teachers': {teacher_id: nombre de séances}}.
+        """
+        instance = self.instance
+        assignment_ids = {
+            instance.subject_ids[assignment['subject']]: assignment['id']
+            for assignment in self.assignments
+        }
+        
+        published = {}
+        for subject_id, teacher_id, room_id, slot_id, start_date in instance.published or []:
+            assignment_id = assignment_ids.get(subject_id)
+            if assignment_id is None:
+                continue
+            # En mode semaine type, toutes les occurrences se ramènent à la semaine 0
+            week = 0 if self.template_week else (start_date - self.start_date).days // 7
+            entry = published.setdefault(assignment_id, {'placements': [], 'teachers': {}})
+            entry['teachers'][teacher_id] = entry['teachers'].get(teacher_id, 0) + 1
+            if (room_id, slot_id, week) not in entry['placements']:
+                entry['placements'].append((room_id, slot_id, week))
+        
+        return published
+    
+    def _apply_published_solution(self, assignments: List[Dict], published: Dict[int, Dict]):
+        """Ajouter les indices de solution et figer les affectations inchangées"""
+        hints = 0
+        fixed = 0
+        
+        for assignment in assignments:
+            entry = published.get(assignment['id'])
+            if not entry:
+                continue
+            placements = entry['placements']
+            
+            # Enseignant publié: celui qui assurait le plus de séances
+            teacher_id = max(entry['teachers'], key=entry['teachers'].get)
+            if teacher_id in assignment['teachers']:
+                assignment['teacher_hint'] = teacher_id
+            
+            room_ids = {room_id for room_id, _ in assignment['rooms']}
+            slot_ids = {slot_id for slot_id, _ in assignment['slots']}
+            valid = [
+                (room_id, slot_id, week) for room_id, slot_id, week in placements
+                if room_id in room_ids and slot_id in slot_ids and week < self.model_weeks
+            ]
+            
+            assignment['hint'] = valid
+            hints += len(valid)
+            
+            # Une affectation est inchangée si son enseignant publié est toujours
+            # qualifié et si tous ses placements publiés restent réalisables et
+            # couvrent exactement le nombre de séances requis
+            if (self.fix_unaffected and len(entry['teachers']) == 1
+                    and 'teacher_hint' in assignment
+                    and len(valid) == len(placements)
+                    and len(valid) == assignment['sessions_needed']):
+                assignment['fixed'] = True
+                fixed += 1
+        
+        self.stats['warm_start_hints'] = hints
+        self.stats['fixed_assignments'] = fixed
+        logger.info(f"♻️ Démarrage à chaud: {hints} placements publiés, {fixed} affectations figées")
+    
+    def _slot_times(self) -> Dict[int, Tuple[int, int, int]]:
+        """Créneaux de la grille: slot_id -> (jour, début en minutes, fin en minutes)"""
+        instance = self.instance
+        return {
+            instance.slot_ids[k]: (
+                instance.slot_day[k],
+                instance.slot_start[k].hour * 60 + instance.slot_start[k].minute,
+                instance.slot_end[k].hour * 60 + instance.slot_end[k].minute,
+            )
+            for k in range(instance.num_slots)
+        }
+    
+    def _build_feasibility_masks(self):
+        """Précalculer, pour chaque affectation, les salles et créneaux réalisables"""
+        instance = self.instance
+        self.feasible_rooms = {}
+        self.feasible_slots = {}
+        self.teacher_blocked = {}
+        unschedulable = []
+        slot_times = self._slot_times() if self.interval_model else {}
+        session_fits = {}  # durée -> une plage de la grille peut l'accueillir
         
-        # Contrainte 5: Respect des disponibilités des enseignants
         for assignment in self.assignments:
-            teacher = assignment['teacher']
-            unavailable_slots = teacher.unavailable_slots_list
+            total_students = sum(
+                instance.student_counts.get(program_id, 0) for program_id in assignment['programs']
+            )
+            assignment['total_students'] = total_students
             
-            for unavailable_slot in unavailable_slots:
-                day = unavailable_slot.get('day', 0)
-                start_time = unavailable_slot.get('start_time', '00:00')
-                
-                # Trouver les créneaux correspondants
-                conflicting_slots = self.time_slots.filter(
-                    day_of_week=day,
-                    start_time__lte=start_time
+            # Masque salles: capacité suffisante et type compatible avec la matière
+            # (le type est une exigence: sans salle compatible, l'affectation est signalée)
+            allowed_types = SUBJECT_ROOM_TYPES.get(instance.subject_type[assignment['subject']])
+            assignment['room_types'] = allowed_types
+            rooms = [
+                r for r in range(instance.num_rooms)
+                if instance.room_capacity[r] >= total_students
+                and (not allowed_types or instance.room_type[r] in allowed_types)
+            ]
+            
+            # Masque créneaux: union des disponibilités des enseignants qualifiés
+            # (masques de bits); les enseignants sans aucun créneau sont écartés
+            assignment['teachers'] = [
+                t for t in assignment['teachers'] if instance.teacher_available[t]
+            ]
+            available = 0
+            for t in assignment['teachers']:
+                available |= instance.teacher_available[t]
+            slots = [k for k in range(instance.num_slots) if available >> k & 1]
+            
+            if not rooms or not slots:
+                logger.warning(
+                    f"⚠️ Aucun créneau réalisable pour {instance.subject_names[assignment['subject']]}"
                 )
-                
-                for slot in conflicting_slots:
-                    for room in self.rooms:
-                        for week in range(num_weeks):
-                            self.model.Add(
-                                self.schedule_vars[(assignment['id'], room.id, slot.id, week)] == 0
-                            )
+                unschedulable.append(assignment)
+                continue
+            
+            # Modèle à intervalles: la séance doit tenir dans une plage de la grille
+            if self.interval_model:
+                duration = assignment['session_minutes']
+                if duration not in session_fits:
+                    session_fits[duration] = bool(IntervalTimetableModel._week_starts(slot_times, duration))
+                if not session_fits[duration]:
+                    logger.warning(
+                        f"⚠️ Aucune plage de {duration} minutes pour {instance.subject_names[assignment['subject']]}"
+                    )
+                    assignment['session_too_long'] = True
+                    unschedulable.append(assignment)
+                    continue
+            
+            self.feasible_rooms[assignment['id']] = rooms
+            self.feasible_slots[assignment['id']] = slots
+            # Créneaux du masque où chaque enseignant n'est pas disponible
+            self.teacher_blocked[assignment['id']] = {
+                t: [k for k in slots if not instance.teacher_available[t] >> k & 1]
+                for t in assignment['teachers']
+            }
         
-        # Contrainte 6: Limites horaires des enseignants
-        for teacher in self.teachers:
-            teacher_assignments = [a for a in self.assignments if a['teacher'] == teacher]
-            
-            for week in range(num_weeks):
-                weekly_hours = []
-                for assignment in teacher_assignments:
-                    for room in self.rooms:
-                        for time_slot in self.time_slots:
-                            weekly_hours.append(
-                                self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)] *
-                                assignment['hours_per_session']
-                            )
-                
-                if weekly_hours:
-                    self.model.Add(sum(weekly_hours) <= teacher.max_hours_per_week)
+        if unschedulable:
+            self.assignments = [a for a in self.assignments if a['id'] in self.feasible_rooms]
+        self.unschedulable = unschedulable
+        self.stats['unschedulable_assignments'] = len(unschedulable)
+    
+    def _check_feasibility(self) -> List[Dict]:
+        """Analyse de faisabilité préalable (quelques millisecondes, sans solveur)"""
+        check_start = datetime.now()
+        self.diagnostics = analyze_feasibility(
+            self.instance, self.assignments, self.feasible_rooms, self.feasible_slots,
+            self.unschedulable, interval_model=self.interval_model, num_weeks=self.model_weeks
+        )
+        self.stats['feasibility_check_time'] = round((datetime.now() - check_start).total_seconds(), 4)
+        self.stats['diagnostics'] = self.diagnostics
         
-        # Objectif: Maximiser l'utilisation équilibrée des créneaux
-        objective_vars = []
+        for diagnostic in self.diagnostics:
+            logger.warning(f"🚫 {diagnostic['message']}")
+        return self.diagnostics
+    
+    def _solve_model(self) -> Optional[List[Tuple[int, int, int, int]]]:
+        """Résoudre les sous-problèmes, en parallèle lorsqu'il y en a plusieurs
         
-        # Favoriser les créneaux de haute priorité
-        for assignment in self.assignments:
-            for room in self.rooms:
-                for time_slot in self.time_slots:
-                    for week in range(num_weeks):
-                        # Pondérer par la priorité du créneau et de la salle
-                        weight = time_slot.priority * room.priority
-                        objective_vars.append(
-                            self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)] * weight
-                        )
+        La construction gloutonne (modèle sur grille uniquement) sert d'indices
+        de solution, et de repli lorsque l'instance dépasse la taille configurée
+        ou qu'un sous-problème épuise son budget sans solution.
+        """
+        greedy = None
+        fallback_size = getattr(settings, 'TIMETABLE_GREEDY_FALLBACK_VARIABLES', GREEDY_FALLBACK_VARIABLES)
+        
+        if not self.interval_model and self.stats.get('variables_created', 0) > fallback_size:
+            logger.warning(f"⚡ Instance trop grande ({self.stats['variables_created']} variables): "
+                           f"construction gloutonne")
+            greedy = self._greedy_construction()
+            results = [self._greedy_result(construction) for construction in greedy]
+            self.stats['fallback'] = 'size'
+        else:
+            if self.greedy_hint and not self.interval_model:
+                greedy = self._greedy_construction()
+                self._apply_greedy_hints(greedy)
+            
+            results = self._run_solver()
+            
+            timed_out = [i for i, r in enumerate(results) if r['status'] == cp_model.UNKNOWN]
+            if timed_out and not self.interval_model:
+                logger.warning(f"⏱️ {len(timed_out)} sous-problème(s) sans solution dans le budget: "
+                               f"repli sur la construction gloutonne")
+                greedy = greedy or self._greedy_construction()
+                for i in timed_out:
+                    results[i] = self._greedy_result(greedy[i], results[i])
+                self.stats['fallback'] = 'timeout'
         
-        self.model.Maximize(sum(objective_vars))
+        if self.stats.get('fallback'):
+            fallback = [r for r in results if r.get('greedy')]
+            self.stats['greedy_sessions_missing'] = sum(r['sessions_missing'] for r in fallback)
+            self.stats['greedy_quality'] = round(100 * (1 - objective_gap(
+                sum(r['objective'] for r in fallback), sum(r['bound'] for r in fallback)
+            )))
+            if self.stats['greedy_sessions_missing']:
+                logger.warning(f"⚠️ {self.stats['greedy_sessions_missing']} séance(s) non placée(s) "
+                               f"par la construction gloutonne")
         
-        logger.info("✅ Modèle de contraintes créé")
+        return self._collect_results(results)
     
-    def _solve_model(self) -> Optional[cp_model.CpSolver]:
-        """Résoudre le modèle"""
+    def _run_solver(self) -> List[Dict]:
+        """Lancer CP-SAT sur chaque sous-problème"""
         logger.info("🧮 Résolution du problème...")
         
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 300  # 5 minutes max
-        solver.parameters.num_search_workers = 4      # Parallélisation
+        cpu_count = os.cpu_count() or 1
+        processes = min(len(self.subproblems), self.max_processes or cpu_count)
         
-        status = solver.Solve(self.model)
+        if self.portfolio:
+            return self._run_portfolio(cpu_count)
         
-        if status == cp_model.OPTIMAL:
-            logger.info("🎯 Solution optimale trouvée")
-            self.stats['optimization_score'] = 100
-        elif status == cp_model.FEASIBLE:
-            logger.info("✅ Solution réalisable trouvée")
-            self.stats['optimization_score'] = 80
+        if processes <= 1:
+            results = []
+            for index, subproblem in enumerate(self.subproblems):
+                results.append(self._solve_with_progress(subproblem))
+                self._report_solve_progress(index + 1)
         else:
+            # Répartir les cœurs entre les processus
+            workers_per_process = max(1, min(self.num_search_workers, cpu_count // processes))
+            
+            # Les processus fils ne doivent pas hériter des connexions ouvertes
+            connections.close_all()
+            
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [
+                    pool.submit(solve_subproblem, subproblem, self.max_time_in_seconds,
+                                workers_per_process, self.relative_gap)
+                    for subproblem in self.subproblems
+                ]
+                # Suivre l'avancement au fil des sous-problèmes terminés
+                for done, _ in enumerate(as_completed(futures), start=1):
+                    self._report_solve_progress(done)
+                results = [future.result() for future in futures]
+        
+        return results
+    
+    def _solve_with_progress(self, subproblem: Dict) -> Dict:
+        """Résoudre un sous-problème en remontant l'objectif depuis le thread principal
+        
+        Le rappel de CP-SAT s'exécute dans un thread du solveur: il ne fait que
+        mémoriser la dernière valeur, écrite dans le journal par ce thread-ci
+        au plus une fois toutes les PROGRESS_REPORT_SECONDS.
+        """
+        latest = {}
+        
+        def on_solution(objective: float, bound: float):
+            latest['objective'] = (objective, bound)
+        
+        def flush():
+            reported = latest.pop('objective', None)
+            if reported is not None:
+                self._report_objective(*reported)
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                solve_subproblem, subproblem, self.max_time_in_seconds, self.num_search_workers,
+                target_gap=self.relative_gap, on_solution=on_solution
+            )
+            while True:
+                try:
+                    result = future.result(timeout=PROGRESS_REPORT_SECONDS)
+                    break
+                except TimeoutError:
+                    flush()
+        
+        flush()
+        return result
+    
+    def _run_portfolio(self, cpu_count: int) -> List[Dict]:
+        """Résoudre chaque sous-problème avec le portefeuille de configurations
+        
+        Les sous-problèmes passent l'un après l'autre (chacun occupe déjà les
+        cœurs avec ses configurations) et se partagent la limite de temps: chacun
+        reçoit le temps restant divisé par le nombre de sous-problèmes restants,
+        si bien que le temps laissé par un sous-problème vite résolu profite aux suivants.
+        """
+        configs = getattr(settings, 'TIMETABLE_PORTFOLIO_CONFIGS', PORTFOLIO_CONFIGS)
+        configs = configs[:max(1, self.max_processes or cpu_count)]
+        workers_per_config = max(1, min(self.num_search_workers, cpu_count // len(configs)))
+        
+        portfolio_start = datetime.now()
+        results = []
+        for index, subproblem in enumerate(self.subproblems):
+            remaining = self.max_time_in_seconds - (datetime.now() - portfolio_start).total_seconds()
+            budget = max(PORTFOLIO_MIN_SECONDS, remaining / (len(self.subproblems) - index))
+            results.append(solve_portfolio(
+                subproblem, budget, workers_per_config, self.relative_gap, configs
+            ))
+            self._report_solve_progress(index + 1)
+        
+        # Configurations gagnantes, pour ajuster les paramètres par défaut sur données réelles
+        self.stats['portfolio_winners'] = [r['portfolio_config'] for r in results]
+        self.stats['portfolio_runs'] = [r['portfolio_runs'] for r in results]
+        logger.info(f"🏁 Portefeuille: configuration(s) gagnante(s) {', '.join(self.stats['portfolio_winners'])}")
+        return results
+    
+    def _greedy_construction(self) -> List[Dict]:
+        """Construction gloutonne de chaque sous-problème (quelques millisecondes)"""
+        greedy_start = datetime.now()
+        greedy = [greedy_construction(subproblem) for subproblem in self.subproblems]
+        self.stats['greedy_time'] = round((datetime.now() - greedy_start).total_seconds(), 3)
+        self.stats['greedy_sessions_placed'] = sum(g['placed'] for g in greedy)
+        logger.info(f"🧱 Construction gloutonne: {self.stats['greedy_sessions_placed']} séances "
+                    f"en {self.stats['greedy_time']:.2f}s")
+        return greedy
+    
+    def _apply_greedy_hints(self, greedy: List[Dict]):
+        """Passer la construction gloutonne en indices (sans écraser l'emploi du temps publié)"""
+        for subproblem, construction in zip(self.subproblems, greedy):
+            placements = {}
+            for assignment_id, room_id, slot_id, week in construction['selected']:
+                placements.setdefault(assignment_id, []).append((room_id, slot_id, week))
+            
+            for assignment in subproblem['assignments']:
+                if assignment.get('hint') or assignment['id'] not in construction['teachers']:
+                    continue
+                assignment['hint'] = placements.get(assignment['id'], [])
+                assignment['teacher_hint'] = construction['teachers'][assignment['id']]
+    
+    def _greedy_result(self, construction: Dict, solved: Dict = None) -> Dict:
+        """Résultat de sous-problème équivalent à celui de CP-SAT, issu de la construction gloutonne
+        
+        La borne est le majorant de la construction (chaque séance sur son meilleur
+        couple salle/créneau): le score de qualité est donc 100 * (1 - écart).
+        """
+        solved = solved or {}
+        return {
+            'status': cp_model.FEASIBLE,
+            'status_name': 'GREEDY',
+            'greedy': True,
+            'selected': construction['selected'],
+            'teachers': construction['teachers'],
+            'num_assignments': construction['num_assignments'],
+            'num_variables': solved.get('num_variables', 0),
+            'build_time': solved.get('build_time', 0.0),
+            'wall_time': solved.get('wall_time', self.stats.get('greedy_time', 0.0)),
+            'branches': solved.get('branches', 0),
+            'conflicts': solved.get('conflicts', 0),
+            'objective': construction['objective'],
+            'bound': construction['best_objective'],
+            'gap': objective_gap(construction['objective'], construction['best_objective']),
+            'stopped_early': False,
+            'sessions_missing': construction['required'] - construction['placed'],
+            'two_phase_rounds': solved.get('two_phase_rounds', 0),
+            'unmatched_sessions': 0,
+        }
+    
+    def _collect_results(self, results: List[Dict]) -> Optional[List[Tuple[int, int, int, int]]]:
+        """Agréger les résultats des sous-problèmes (statistiques, score, solution)"""
+        self.stats['model_build_time'] = round(sum(r['build_time'] for r in results), 3)
+        self.stats['solver_wall_time'] = round(max((r['wall_time'] for r in results), default=0), 3)
+        self.stats['solver_branches'] = sum(r['branches'] for r in results)
+        self.stats['solver_conflicts'] = sum(r['conflicts'] for r in results)
+        self.stats['stopped_early'] = any(r['stopped_early'] for r in results)
+        if self.two_phase:
+            self.stats['two_phase_rounds'] = max((r['two_phase_rounds'] for r in results), default=0)
+            self.stats['unmatched_sessions'] = sum(r['unmatched_sessions'] for r in results)
+            self.stats['two_phase_fallbacks'] = sum(r.get('two_phase_fallback', False) for r in results)
+            if self.stats['unmatched_sessions']:
+                logger.warning(f"⚠️ {self.stats['unmatched_sessions']} séance(s) sans salle après couplage")
+        self.stats['subproblem_results'] = [
+            {
+                'assignments': r['num_assignments'],
+                'variables': r['num_variables'],
+                'status': r['status_name'],
+                'wall_time': round(r['wall_time'], 3),
+                'branches': r['branches'],
+                'gap': round(r['gap'], 4) if r['gap'] is not None else None,
+                'config': r.get('portfolio_config'),
+            }
+            for r in results
+        ]
+        
+        if any(r['status'] not in (cp_model.OPTIMAL, cp_model.FEASIBLE) for r in results):
             logger.error("❌ Aucune solution trouvée")
+            for subproblem, r in zip(self.subproblems, results):
+                if r['status'] == cp_model.INFEASIBLE:
+                    self._explain_infeasible(subproblem)
             return None
         
+        # Écart global: somme des objectifs rapportée à la somme des bornes
+        gap = objective_gap(
+            sum(r['objective'] for r in results),
+            sum(r['bound'] for r in results)
+        )
+        self.stats['relative_gap'] = round(gap, 4)
+        
+        if all(r['status'] == cp_model.OPTIMAL and not r.get('greedy') for r in results):
+            logger.info("🎯 Solution optimale trouvée")
+            self.stats['optimization_score'] = 100
+        else:
+            logger.info("✅ Solution réalisable trouvée")
+            self.stats['optimization_score'] = round(100 * (1 - gap))
+        
         logger.info(f"📊 Statistiques du solveur:")
-        logger.info(f"  • Temps de résolution: {solver.WallTime():.2f}s")
-        logger.info(f"  • Branches explorées: {solver.NumBranches()}")
-        logger.info(f"  • Conflits: {solver.NumConflicts()}")
+        logger.info(f"  • Temps de résolution: {self.stats['solver_wall_time']:.2f}s")
+        logger.info(f"  • Branches explorées: {self.stats['solver_branches']}")
+        logger.info(f"  • Conflits: {self.stats['solver_conflicts']}")
+        logger.info(f"  • Écart relatif: {gap:.2%}")
         
-        return solver
+        self.selected_teachers = {
+            assignment_id: teacher_id
+            for r in results for assignment_id, teacher_id in r['teachers'].items()
+        }
+        return [key for r in results for key in r['selected']]
     
-    def _create_schedules_from_solution(self, solver: cp_model.CpSolver):
+    def _explain_infeasible(self, subproblem: Dict):
+        """Ajouter aux diagnostics le sous-ensemble infaisable minimal d'un sous-problème"""
+        instance = self.instance
+        assignments_by_id = {assignment['id']: assignment for assignment in self.assignments}
+        room_types = dict(zip(instance.room_ids, instance.room_type))
+        
+        groups = explain_infeasibility(subproblem, min(self.max_time_in_seconds, EXPLAIN_MAX_TIME_SECONDS))
+        if not groups:
+            return
+        
+        labels = []
+        for kind, key in groups:
+            if kind == 'assignment':
+                assignment = assignments_by_id[key]
+                labels.append(
+                    f"{instance.subject_names[assignment['subject']]} "
+                    f"({assignment['sessions_per_week']} séance(s) par semaine)"
+                )
+            elif kind == 'teacher':
+                labels.append(instance.teacher_names[instance.teacher_index[key]])
+            else:
+                labels.append(f"salle #{key} ({room_types[key]})")
+        
+        self.diagnostics.append({
+            'code': 'infeasible_subset',
+            'message': "Ensemble minimal incompatible: " + ", ".join(labels),
+            'details': {'groups': [list(group) for group in groups]},
+        })
+        self.stats['diagnostics'] = self.diagnostics
+        logger.warning(f"🚫 {self.diagnostics[-1]['message']}")
+    
+    def _create_schedules_from_solution(self, solution: List[Tuple[int, int, int, int]]):
         """Créer les emplois du temps en base à partir de la solution"""
         logger.info("💾 Création des emplois du temps...")
+        persist_start = datetime.now()
+        
+        instance = self.instance
         
+        assignments_by_id = {assignment['id']: assignment for assignment in self.assignments}
+        unavailabilities = instance.unavailabilities if self.template_week else None
+        interval_slots = self._resolve_interval_slots(solution) if self.interval_model else {}
+        schedules = []
+        schedule_programs = []  # Programmes de chaque séance, dans le même ordre
+        sessions_skipped = 0
+        
+        for assignment_id, room_id, slot_id, model_week in solution:
+            assignment = assignments_by_id[assignment_id]
+            if self.interval_model:
+                # (jour, début, fin) en minutes -> créneau réel de même horaire
+                time_slot = interval_slots[slot_id]
+                slot_id = time_slot.id
+            else:
+                time_slot = instance.slot(instance.slot_index[slot_id])
+            subject_id = instance.subject_ids[assignment['subject']]
+            teacher_id = self.selected_teachers[assignment_id]
+            
+            # En mode semaine type, répliquer la séance sur chaque semaine
+            weeks = range(self.num_weeks) if self.template_week else [model_week]
+            
+            for week in weeks:
+                # Calculer la date de cette semaine
+                week_start = self.start_date + timedelta(weeks=week)
+                session_date = week_start + timedelta(days=time_slot.day_of_week)
+                
+                if self.template_week and self._is_session_excluded(
+                    teacher_id, room_id, time_slot, session_date, unavailabilities
+                ):
+                    sessions_skipped += 1
+                    continue
+                
+                # Préparer l'emploi du temps (écrit en masse plus bas)
+                schedules.append(Schedule(
+                    title=(
+                        f"{instance.subject_names[assignment['subject']]} - "
+                        f"{instance.teacher_names[instance.teacher_index[teacher_id]]}"
+                    ),
+                    subject_id=subject_id,
+                    teacher_id=teacher_id,
+                    room_id=room_id,
+                    time_slot_id=slot_id,
+                    start_date=session_date,
+                    end_date=session_date,
+                    duration_minutes=(
+                        assignment['session_minutes'] if self.interval_model
+                        else assignment['hours_per_session'] * 60
+                    ),
+                    created_by=self.user
+                ))
+                schedule_programs.append(assignment['programs'])
+        
+        self._write_schedules(schedules, schedule_programs)
+        
+        # Séances conservées dans le journal pour les générations identiques
+        self.solution_rows = [
+            [
+                schedule.title, schedule.subject_id, schedule.teacher_id, schedule.room_id,
+                schedule.time_slot_id, schedule.start_date.isoformat(), schedule.duration_minutes,
+                list(program_ids)
+            ]
+            for schedule, program_ids in zip(schedules, schedule_programs)
+        ]
+        
+        if self.template_week:
+            self.stats['sessions_skipped_exceptions'] = sessions_skipped
+        
+        self.stats['total_sessions_planned'] = len(schedules)
+        self.stats['persistence_time'] = round((datetime.now() - persist_start).total_seconds(), 3)
+        logger.info(f"✅ {len(schedules)} séances créées en {self.stats['persistence_time']:.2f}s")
+    
+    def _write_schedules(self, schedules: List[Schedule], schedule_programs: List[List[int]]):
+        """Remplacer les séances de la période par celles fournies (écriture en masse)"""
         # Supprimer les anciens emplois du temps pour cette période
         Schedule.objects.filter(
             start_date__gte=self.start_date,
             end_date__lte=self.end_date,
-            programs__in=self.programs
+            programs__in=self.instance.program_ids
         ).delete()
         
-        num_weeks = (self.end_date - self.start_date).days // 7 + 1
-        schedules_created = 0
+        # Intervalles des contraintes d'exclusion (bulk_create n'appelle pas save)
+        time_slots = TimeSlot.objects.in_bulk({schedule.time_slot_id for schedule in schedules})
+        for schedule in schedules:
+            schedule.sync_ranges(time_slots[schedule.time_slot_id])
         
-        for assignment in self.assignments:
-            for room in self.rooms:
-                for time_slot in self.time_slots:
-                    for week in range(num_weeks):
-                        var = self.schedule_vars[(assignment['id'], room.id, time_slot.id, week)]
-                        
-                        if solver.Value(var) == 1:
-                            # Calculer la date de cette semaine
-                            week_start = self.start_date + timedelta(weeks=week)
-                            session_date = week_start + timedelta(days=time_slot.day_of_week)
-                            
-                            # Créer l'emploi du temps
-                            schedule = Schedule.objects.create(
-                                title=f"{assignment['subject'].name} - {assignment['teacher'].user.get_full_name()}",
-                                subject=assignment['subject'],
-                                teacher=assignment['teacher'],
-                                room=room,
-                                time_slot=time_slot,
-                                start_date=session_date,
-                                end_date=session_date,
-                                duration_minutes=assignment['hours_per_session'] * 60,
-                                created_by=self.user
-                            )
-                            
-                            # Associer aux programmes
-                            schedule.programs.set(assignment['programs'])
-                            
-                            schedules_created += 1
-                            
-                            logger.debug(f"📅 Créé: {schedule.title} - {session_date} {time_slot}")
+        # Une insertion groupée pour les séances, une pour la table de liaison
+        Schedule.objects.bulk_create(schedules, batch_size=PERSIST_BATCH_SIZE)
+        
+        ScheduleProgram = Schedule.programs.through
+        ScheduleProgram.objects.bulk_create(
+            [
+                ScheduleProgram(schedule_id=schedule.id, program_id=program_id)
+                for schedule, program_ids in zip(schedules, schedule_programs)
+                for program_id in program_ids
+            ],
+            batch_size=PERSIST_BATCH_SIZE
+        )
+    
+    def _resolve_interval_slots(self, solution: List[Tuple]) -> Dict[Tuple[int, int, int], SlotInfo]:
+        """Associer chaque horaire (jour, début, fin) du modèle à intervalles à un TimeSlot
         
-        self.stats['total_sessions_planned'] = schedules_created
-        logger.info(f"✅ {schedules_created} séances créées")
+        Les horaires absents de la grille sont créés en masse comme créneaux
+        inactifs: ils portent la durée réelle des séances sans être proposés
+        aux autres générateurs.
+        """
+        times = {entry[2] for entry in solution}
+        
+        def to_time(minutes):
+            return dt_time(minutes // 60, minutes % 60)
+        
+        existing = {
+            (day, start.hour * 60 + start.minute, end.hour * 60 + end.minute): (slot_id, priority)
+            for slot_id, day, start, end, priority in TimeSlot.objects.values_list(
+                'id', 'day_of_week', 'start_time', 'end_time', 'priority'
+            )
+        }
+        
+        missing = [key for key in sorted(times) if key not in existing]
+        created = TimeSlot.objects.bulk_create([
+            TimeSlot(
+                name=f"Séance {to_time(start):%H:%M}-{to_time(end):%H:%M}",
+                day_of_week=day, start_time=to_time(start), end_time=to_time(end),
+                is_active=False
+            )
+            for day, start, end in missing
+        ])
+        for key, time_slot in zip(missing, created):
+            existing[key] = (time_slot.id, time_slot.priority)
+        
+        return {
+            key: SlotInfo(existing[key][0], key[0], to_time(key[1]), to_time(key[2]), existing[key][1])
+            for key in times
+        }
+    
+    def _is_session_excluded(self, teacher_id: int, room_id: int, time_slot: SlotInfo,
+                             session_date: date, unavailabilities: Dict) -> bool:
+        """Vérifier si une séance répliquée tombe sur une exception (férié, absence)"""
+        if session_date > self.end_date or session_date in self.excluded_dates:
+            return True
+        
+        return is_unavailable(unavailabilities, teacher_id, room_id, session_date, time_slot)
+    
+    def _dump_slow_instance(self):
+        """Sauvegarder l'instance d'une génération lente pour la rejouer hors ligne"""
+        dump_dir = getattr(settings, 'TIMETABLE_INSTANCE_DUMP_DIR', None)
+        if not dump_dir or self.stats.get('solver_wall_time', 0) < SLOW_GENERATION_SECONDS:
+            return
+        
+        os.makedirs(dump_dir, exist_ok=True)
+        path = os.path.join(dump_dir, f"instance_{self.generation_log.id}.json")
+        self.instance.save(path)
+        self.stats['instance_file'] = path
+    
+    def _report_progress(self, step: str, progress: int):
+        """Enregistrer l'étape en cours dans le journal de génération"""
+        if self.generation_log is None:
+            return
+        TimetableGeneration.objects.filter(pk=self.generation_log.pk).update(
+            current_step=step, progress=progress
+        )
+    
+    def _report_solve_progress(self, solved: int):
+        """Faire progresser la phase de résolution (30 % -> 90 %) par sous-problème"""
+        total = max(1, len(self.subproblems))
+        self._report_progress('solving', 30 + (60 * solved) // total)
+    
+    def _report_objective(self, objective: float, bound: float):
+        """Remonter la meilleure valeur d'objectif trouvée par CP-SAT"""
+        if self.generation_log is None:
+            return
+        TimetableGeneration.objects.filter(pk=self.generation_log.pk).update(
+            best_objective=objective, objective_bound=bound
+        )
     
     def _update_generation_log(self, status: str, processing_time: float, error_message: str = None):
         """Mettre à jour le log de génération"""
+        # Conserver l'étape atteinte et l'objectif remontés pendant la résolution
+        self.generation_log.refresh_from_db(fields=['current_step', 'best_objective', 'objective_bound'])
         self.generation_log.status = status
+        if status == 'success':
+            self.generation_log.current_step = 'done'
+        self.generation_log.progress = 100
         self.generation_log.processing_time = processing_time
         self.generation_log.total_sessions_planned = self.stats['total_sessions_planned']
         self.generation_log.conflicts_resolved = self.stats['conflicts_resolved']
@@ -400,7 +2142,9 @@ class TimetableSolver:
         if error_message:
             self.generation_log.execution_log = error_message
         else:
-            self.generation_log.execution_log = json.dumps(self.stats, indent=2)
+            self.generation_log.execution_log = json.dumps(self.stats, indent=2, default=str)
+        if status == 'success' and self.solution_rows:
+            self.generation_log.solution = self.solution_rows
         
         self.generation_log.save()
 
@@ -411,21 +2155,51 @@ def generate_timetable_for_programs(
     user_id: int, 
     start_date: date, 
     end_date: date, 
-    program_ids: List[int] = None
+    program_ids: List[int] = None,
+    template_week: bool = False,
+    excluded_dates: List[date] = None,
+    warm_start: bool = False,
+    fix_unaffected: bool = False,
+    max_time_in_seconds: float = None,
+    num_search_workers: int = None,
+    relative_gap: float = None,
+    two_phase: bool = False,
+    interval_model: bool = False,
+    greedy_hint: bool = False,
+    use_cache: bool = True,
+    portfolio: bool = False
 ) -> Dict:
-    """Générer un emploi du temps pour des programmes spécifiques"""
+    """Générer un emploi du temps pour des programmes spécifiques
+    
+    Une génération réussie d'empreinte identique (mêmes données et mêmes
+    paramètres) est réutilisée sans relancer le solveur, sauf si use_cache=False.
+    """
     try:
         user = User.objects.get(id=user_id)
         
         if program_ids:
-            programs = Program.objects.filter(id__in=program_ids, is_active=True)
+            programs = Program.objects.filter(id__in=program_ids)
         else:
-            programs = Program.objects.filter(is_active=True)
+            programs = Program.objects.all()
         
         if not programs.exists():
             return {'success': False, 'error': 'Aucun programme valide trouvé'}
         
-        solver = TimetableSolver(user, start_date, end_date, list(programs))
+        solver = TimetableSolver(
+            user, start_date, end_date, list(programs),
+            template_week=template_week,
+            excluded_dates=excluded_dates,
+            warm_start=warm_start,
+            fix_unaffected=fix_unaffected,
+            max_time_in_seconds=max_time_in_seconds,
+            num_search_workers=num_search_workers,
+            relative_gap=relative_gap,
+            two_phase=two_phase,
+            interval_model=interval_model,
+            greedy_hint=greedy_hint,
+            use_cache=use_cache,
+            portfolio=portfolio
+        )
         return solver.generate_timetable()
         
     except User.DoesNotExist:
@@ -453,22 +2227,126 @@ def quick_timetable_generation(user_id: int) -> Dict:
     return generate_timetable_for_programs(user_id, start_date, end_date)
 
 
+def replay_instance(path: str, template_week: bool = False, warm_start: bool = False,
+                    fix_unaffected: bool = False, max_time_in_seconds: float = None,
+                    num_search_workers: int = None, relative_gap: float = None,
+                    two_phase: bool = False, interval_model: bool = False,
+                    greedy_hint: bool = False, portfolio: bool = False) -> Dict:
+    """Rejouer hors ligne la résolution d'une instance sauvegardée (sans écriture en base)"""
+    instance = ProblemInstance.from_file(path)
+    solver = TimetableSolver(
+        None, instance.start_date, instance.end_date, instance.program_ids,
+        template_week=template_week,
+        warm_start=warm_start,
+        fix_unaffected=fix_unaffected,
+        max_time_in_seconds=max_time_in_seconds,
+        num_search_workers=num_search_workers,
+        relative_gap=relative_gap,
+        instance=instance,
+        two_phase=two_phase,
+        interval_model=interval_model,
+        greedy_hint=greedy_hint,
+        portfolio=portfolio
+    )
+    solver._collect_data()
+    solver._create_constraint_model()
+    solution = None if solver._check_feasibility() else solver._solve_model()
+    
+    return {
+        'success': solution is not None,
+        'sessions_placed': len(solution or []),
+        'diagnostics': solver.diagnostics,
+        'stats': solver.stats
+    }
+
+
 # Script principal
 if __name__ == '__main__':
     import argparse
     
     parser = argparse.ArgumentParser(description='Générer un emploi du temps avec OR-Tools')
-    parser.add_argument('--user-id', type=int, required=True, help='ID de l\'utilisateur')
+    parser.add_argument('--user-id', type=int, help='ID de l\'utilisateur')
     parser.add_argument('--start-date', type=str, help='Date de début (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, help='Date de fin (YYYY-MM-DD)')
     parser.add_argument('--programs', nargs='+', type=int, help='IDs des programmes')
+    parser.add_argument('--template-week', action='store_true',
+                        help='Résoudre une semaine type puis la répliquer sur la période')
+    parser.add_argument('--incremental', action='store_true',
+                        help="Partir de l'emploi du temps publié (indices de solution)")
+    parser.add_argument('--fix-unaffected', action='store_true',
+                        help='Figer les affectations non concernées par les modifications')
+    parser.add_argument('--max-time', type=float, help='Limite de temps du solveur (secondes)')
+    parser.add_argument('--workers', type=int, help='Nombre de workers CP-SAT')
+    parser.add_argument('--gap', type=float,
+                        help="Écart relatif à l'optimum suffisant pour arrêter la recherche (ex: 0.02)")
+    parser.add_argument('--two-phase', action='store_true',
+                        help='Résoudre les créneaux puis affecter les salles par couplage')
+    parser.add_argument('--interval', action='store_true',
+                        help='Modèle à intervalles: séances de 1h, 1h30 ou 3h selon le type de matière')
+    parser.add_argument('--greedy-hint', action='store_true',
+                        help='Partir d\'une construction gloutonne (indices de solution)')
+    parser.add_argument('--portfolio', action='store_true',
+                        help='Lancer plusieurs configurations CP-SAT en parallèle (la première à l\'écart cible gagne)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Résoudre même si une génération identique a déjà réussi')
+    parser.add_argument('--dump-instance', type=str,
+                        help="Sauvegarder l'instance chargée dans ce fichier puis quitter")
+    parser.add_argument('--replay', type=str,
+                        help='Rejouer hors ligne une instance sauvegardée (aucune écriture en base)')
     
     args = parser.parse_args()
     
+    if args.replay:
+        result = replay_instance(
+            args.replay,
+            template_week=args.template_week,
+            warm_start=args.incremental,
+            fix_unaffected=args.fix_unaffected,
+            max_time_in_seconds=args.max_time,
+            num_search_workers=args.workers,
+            relative_gap=args.gap,
+            two_phase=args.two_phase,
+            interval_model=args.interval,
+            greedy_hint=args.greedy_hint,
+            portfolio=args.portfolio
+        )
+        print(json.dumps(result, indent=2, default=str))
+        sys.exit(0 if result['success'] else 1)
+    
+    if args.user_id is None:
+        parser.error('--user-id est requis (sauf avec --replay)')
+    
+    if args.dump_instance:
+        if not (args.start_date and args.end_date):
+            parser.error('--dump-instance nécessite --start-date et --end-date')
+        programs = Program.objects.all()
+        if args.programs:
+            programs = programs.filter(id__in=args.programs)
+        ProblemInstance.load(
+            list(programs.values_list('id', flat=True)),
+            datetime.strptime(args.start_date, '%Y-%m-%d').date(),
+            datetime.strptime(args.end_date, '%Y-%m-%d').date(),
+            include_published=args.incremental or args.fix_unaffected
+        ).save(args.dump_instance)
+        sys.exit(0)
+    
     if args.start_date and args.end_date:
         start_date = datetime.strptime(args.start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date()
-        result = generate_timetable_for_programs(args.user_id, start_date, end_date, args.programs)
+        result = generate_timetable_for_programs(
+            args.user_id, start_date, end_date, args.programs,
+            template_week=args.template_week,
+            warm_start=args.incremental,
+            fix_unaffected=args.fix_unaffected,
+            max_time_in_seconds=args.max_time,
+            num_search_workers=args.workers,
+            relative_gap=args.gap,
+            two_phase=args.two_phase,
+            interval_model=args.interval,
+            greedy_hint=args.greedy_hint,
+            use_cache=not args.no_cache,
+            portfolio=args.portfolio
+        )
     else:
         result = quick_timetable_generation(args.user_id)
     
@@ -0,0 +1,254 @@
+# timetable_views.py - Génération CP-SAT en arrière-plan et réparation locale
+import json
+from datetime import datetime
+
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Program, TimetableGeneration
+from .tasks import generate_timetable_task
+from .timetable_repair import repair_timetable
+from .timetable_solver import solver_budget
+
+
+def parse_flag(data, key: str, default: bool = False) -> bool:
+    """Lire un booléen de la requête ("false", "0", "off" valent False, comme dans les sérialiseurs)"""
+    value = data.get(key)
+    if value in (None, ''):
+        return default
+    return serializers.BooleanField().to_internal_value(value)
+
+
+class TimetableGenerationView(APIView):
+    """Vue pour la génération automatique d'emplois du temps"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # Vérifier les permissions (admin seulement)
+        if getattr(request.user, 'role', None) != 'admin':
+            return Response(
+                {'error': 'Seuls les administrateurs peuvent générer des emplois du temps'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Paramètres
+        start_date_str = request.data.get('start_date')
+        end_date_str = request.data.get('end_date')
+        program_ids = request.data.get('program_ids', [])
+        excluded_dates_str = request.data.get('excluded_dates', [])
+        
+        if not start_date_str or not end_date_str:
+            return Response(
+                {'error': 'Dates de début et fin requises'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            template_week = parse_flag(request.data, 'template_week')
+            incremental = parse_flag(request.data, 'incremental')
+            fix_unaffected = parse_flag(request.data, 'fix_unaffected')
+            two_phase = parse_flag(request.data, 'two_phase')
+            interval_model = parse_flag(request.data, 'interval_model')
+            greedy_hint = parse_flag(request.data, 'greedy_hint')
+            use_cache = parse_flag(request.data, 'use_cache', default=True)
+            portfolio = parse_flag(request.data, 'portfolio')
+        except serializers.ValidationError:
+            return Response(
+                {'error': 'Options de génération invalides (booléens attendus)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Budget du solveur (optionnel, plafonné par le solveur)
+        try:
+            solver_options = {
+                key: cast(request.data[key])
+                for key, cast in (
+                    ('max_time_in_seconds', float),
+                    ('num_search_workers', int),
+                    ('relative_gap', float),
+                )
+                if request.data.get(key) not in (None, '')
+            }
+            solver_budget(**solver_options)  # Rejette NaN et l'infini
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Paramètres du solveur invalides (max_time_in_seconds, num_search_workers, relative_gap)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+            excluded_dates = [
+                datetime.strptime(d, '%Y-%m-%d').date() for d in excluded_dates_str
+            ]
+            
+            if end_date <= start_date:
+                return Response(
+                    {'error': 'La date de fin doit être postérieure à la date de début'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            if program_ids:
+                programs = Program.objects.filter(id__in=program_ids)
+            else:
+                programs = Program.objects.all()
+            
+            if not programs.exists():
+                return Response(
+                    {'error': 'Aucun programme valide trouvé'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Créer le journal puis lancer la génération en arrière-plan
+            generation = TimetableGeneration.objects.create(
+                generated_by=request.user,
+                status='pending',
+                start_date=start_date,
+                end_date=end_date
+            )
+            generation.programs.set(programs)
+            
+            try:
+                task = generate_timetable_task.delay(generation.id, {
+                    'template_week': template_week,
+                    'excluded_dates': [d.isoformat() for d in excluded_dates],
+                    'warm_start': incremental,
+                    'fix_unaffected': fix_unaffected,
+                    'two_phase': two_phase,
+                    'interval_model': interval_model,
+                    'greedy_hint': greedy_hint,
+                    'use_cache': use_cache,
+                    'portfolio': portfolio,
+                    **solver_options,
+                })
+            except Exception as e:
+                generation.status = 'failed'
+                generation.execution_log = f'Impossible de lancer la tâche: {str(e)}'
+                generation.save(update_fields=['status', 'execution_log'])
+                raise
+            
+            generation.task_id = task.id
+            generation.save(update_fields=['task_id'])
+            
+            return Response({
+                'success': True,
+                'message': 'Génération lancée en arrière-plan',
+                'generation_id': generation.id,
+                'task_id': task.id,
+                'status_url': reverse('timetable_generation_status', args=[generation.id])
+            }, status=status.HTTP_202_ACCEPTED)
+                
+        except ValueError as e:
+            return Response(
+                {'error': 'Format de date invalide (utilisez YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Erreur lors de la génération: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class TimetableGenerationStatusView(APIView):
+    """Vue pour suivre l'avancement d'une génération lancée en arrière-plan"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, generation_id):
+        generation = get_object_or_404(TimetableGeneration, id=generation_id)
+        
+        # Les non-admins ne voient que leurs propres générations
+        if getattr(request.user, 'role', None) != 'admin' and generation.generated_by_id != request.user.id:
+            return Response({'error': 'Accès refusé'}, status=status.HTTP_403_FORBIDDEN)
+        
+        data = {
+            'generation_id': generation.id,
+            'status': generation.status,
+            'status_display': generation.get_status_display(),
+            'current_step': generation.current_step,
+            'current_step_display': generation.get_current_step_display(),
+            'progress': generation.progress,
+            'best_objective': generation.best_objective,
+            'objective_bound': generation.objective_bound,
+            'total_sessions_planned': generation.total_sessions_planned,
+            'processing_time': generation.processing_time,
+        }
+        
+        if generation.status == 'success':
+            try:
+                data['stats'] = json.loads(generation.execution_log)
+            except ValueError:
+                data['stats'] = {}
+        elif generation.status == 'failed':
+            data['error'] = generation.execution_log
+        
+        return Response(data)
+
+
+class TimetableRepairView(APIView):
+    """Vue pour la réparation locale de l'emploi du temps (enseignant ou salle indisponible)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # Vérifier les permissions (admin seulement)
+        if getattr(request.user, 'role', None) != 'admin':
+            return Response(
+                {'error': 'Seuls les administrateurs peuvent réparer des emplois du temps'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        schedule_ids = request.data.get('schedule_ids', [])
+        teacher_id = request.data.get('teacher_id')
+        room_id = request.data.get('room_id')
+        start_date_str = request.data.get('start_date')
+        end_date_str = request.data.get('end_date')
+        
+        if not schedule_ids and not teacher_id and not room_id:
+            return Response(
+                {'error': 'Indiquez les séances perturbées, un enseignant ou une salle'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
+            
+            result = repair_timetable(
+                request.user.id,
+                schedule_ids=schedule_ids,
+                teacher_id=teacher_id,
+                room_id=room_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+            
+            if result['success']:
+                return Response({
+                    'success': True,
+                    'message': f"{len(result['moved'])} séance(s) déplacée(s)",
+                    'moved': result['moved'],
+                    'unresolved': result['unresolved'],
+                    'stats': result['stats'],
+                    'generation_id': result.get('generation_id')
+                })
+            else:
+                return Response({
+                    'success': False,
+                    'error': result['error'],
+                    'generation_id': result.get('generation_id')
+                }, status=status.HTTP_400_BAD_REQUEST)
+                
+        except ValueError:
+            return Response(
+                {'error': 'Format de date invalide (utilisez YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Erreur lors de la réparation: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
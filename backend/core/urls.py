@@ -1,6 +1,8 @@
 from django.urls import path
 from . import views
 from . import dashboard_views
+from . import schedule_api_views
+from . import timetable_views
 
 urlpatterns = [
     # Dashboard
@@ -36,4 +38,15 @@ urlpatterns = [
     # Teacher Availabilities
     path('teacher-availabilities/', views.TeacherAvailabilityListCreateView.as_view(), name='availability_list'),
     path('teacher-availabilities/<int:pk>/', views.TeacherAvailabilityDetailView.as_view(), name='availability_detail'),
-]
\ No newline at end of file
+    
+    # Génération automatique (ScheduleGenerator)
+    path('schedule/generate/', schedule_api_views.generate_automatic_schedule, name='generate_schedule'),
+    path('schedule/check-conflicts/', schedule_api_views.check_schedule_conflicts, name='generator_check_conflicts'),
+    path('schedule/statistics/', schedule_api_views.get_schedule_statistics, name='schedule_statistics'),
+    
+    # Génération CP-SAT en arrière-plan (TimetableSolver) et réparation locale
+    path('timetable/generate/', timetable_views.TimetableGenerationView.as_view(), name='timetable_generation'),
+    path('timetable/generate/<int:generation_id>/status/', timetable_views.TimetableGenerationStatusView.as_view(),
+         name='timetable_generation_status'),
+    path('timetable/repair/', timetable_views.TimetableRepairView.as_view(), name='timetable_repair'),
+]
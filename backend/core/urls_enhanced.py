@@ -44,6 +44,9 @@ urlpatterns = [
     
     # Génération automatique d'emploi du temps
     path('api/generate/timetable/', views.TimetableGenerationView.as_view(), name='timetable_generation'),
+    path('api/generate/timetable/<int:generation_id>/status/', views.TimetableGenerationStatusView.as_view(),
+         name='timetable_generation_status'),
+    path('api/generate/timetable/repair/', views.TimetableRepairView.as_view(), name='timetable_repair'),
     
     # ===== VUES FILTRÉES PAR RÔLE =====
     
@@ -1,5 +1,5 @@
 # views.py - Vues API améliorées pour AppGET
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -28,7 +28,7 @@ from .serializers_enhanced import (
 )
 from .permissions import IsAdminOrReadOnly, IsTeacherOrAdmin, IsOwnerOrAdmin
 from .import_excel import import_excel_file
-from .timetable_solver import generate_timetable_for_programs
+from .timetable_views import TimetableGenerationView, TimetableGenerationStatusView, TimetableRepairView
 from .export_utils import export_schedule_to_pdf, export_schedule_to_excel
 
 
@@ -711,73 +711,6 @@ class ExcelImportView(APIView):
             )
 
 
-class TimetableGenerationView(APIView):
-    """Vue pour la génération automatique d'emplois du temps"""
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request):
-        # Vérifier les permissions (admin seulement)
-        if getattr(request.user, 'role', None) != 'admin':
-            return Response(
-                {'error': 'Seuls les administrateurs peuvent générer des emplois du temps'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        # Paramètres
-        start_date_str = request.data.get('start_date')
-        end_date_str = request.data.get('end_date')
-        program_ids = request.data.get('program_ids', [])
-        
-        if not start_date_str or not end_date_str:
-            return Response(
-                {'error': 'Dates de début et fin requises'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            
-            if end_date <= start_date:
-                return Response(
-                    {'error': 'La date de fin doit être postérieure à la date de début'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Générer l'emploi du temps
-            result = generate_timetable_for_programs(
-                request.user.id,
-                start_date,
-                end_date,
-                program_ids if program_ids else None
-            )
-            
-            if result['success']:
-                return Response({
-                    'success': True,
-                    'message': 'Emploi du temps généré avec succès',
-                    'stats': result['stats'],
-                    'generation_id': result['generation_id']
-                }, status=status.HTTP_201_CREATED)
-            else:
-                return Response({
-                    'success': False,
-                    'error': result['error'],
-                    'generation_id': result.get('generation_id')
-                }, status=status.HTTP_400_BAD_REQUEST)
-                
-        except ValueError as e:
-            return Response(
-                {'error': 'Format de date invalide (utilisez YYYY-MM-DD)'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except Exception as e:
-            return Response(
-                {'error': f'Erreur lors de la génération: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-
 class ExportScheduleView(APIView):
     """Vue pour l'export d'emplois du temps en PDF/Excel"""
     permission_classes = [StudentPermission]
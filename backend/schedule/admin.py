@@ -3,7 +3,7 @@ from .models import Schedule, Absence, MakeupSession
 
 @admin.register(Schedule)
 class ScheduleAdmin(admin.ModelAdmin):
-    list_display = ('title', 'subject_name', 'teacher_name', 'room_name', 'program_name', 'day_name', 'time_range', 'week_period', 'is_active')
+    list_display = ('title', 'subject_name', 'teacher_name', 'room_name', 'program_name', 'day_name', 'hours', 'week_period', 'is_active')
     list_filter = ('day_of_week', 'is_active', 'subject', 'room', 'program', 'created_at')
     search_fields = ('title', 'subject__name', 'teacher__user__first_name', 'teacher__user__last_name', 'room__name')
     ordering = ('day_of_week', 'start_time', 'subject')
@@ -41,9 +41,9 @@ class ScheduleAdmin(admin.ModelAdmin):
         return obj.get_day_of_week_display()
     day_name.short_description = 'Jour'
     
-    def time_range(self, obj):
+    def hours(self, obj):
         return f"{obj.start_time} - {obj.end_time}"
-    time_range.short_description = 'Horaires'
+    hours.short_description = 'Horaires'
     
     def week_period(self, obj):
         return f"{obj.week_start} → {obj.week_end}"
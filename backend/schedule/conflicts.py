@@ -0,0 +1,113 @@
+"""
+Moteur de détection des conflits d'emploi du temps
+
+Les séances sont regroupées par ressource (enseignant, salle, programme), par
+jour et par période de validité (week_start, week_end). Seules les périodes
+qui se recouvrent sont comparées, elles-mêmes trouvées par balayage des
+dates: les lignes hebdomadaires d'une même séance récurrente ne se croisent
+jamais. Dans chaque groupe, les séances sont triées par heure de début puis
+balayées (sweep line): un tas des séances en cours, ordonné par heure de fin,
+ne garde que celles qui chevauchent la séance courante. Le coût est
+O(n log n + k) pour k conflits lorsque les périodes ne se recouvrent pas
+(une ligne par semaine), au lieu d'une comparaison deux à deux ou d'une
+requête par séance.
+
+Le moteur ne dépend pas de l'ORM: il lit les attributs ``<ressource>_id``,
+``day_of_week``, ``start_time``, ``end_time``, ``week_start`` et ``week_end``
+de n'importe quel objet (instance de Schedule enregistrée ou non).
+"""
+
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import time
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+RESOURCES = ('teacher', 'room', 'program')
+MINUTES_PER_DAY = 24 * 60
+
+# Deux séances qui se chevauchent sur une même ressource, le même jour
+Conflict = namedtuple('Conflict', ['resource', 'resource_id', 'day', 'first', 'second'])
+
+
+def week_minutes(day: int, start_time: time, end_time: time) -> Tuple[int, int]:
+    """Horaire d'une séance en minutes depuis le début de la semaine, [début, fin)"""
+    offset = day * MINUTES_PER_DAY
+    return (offset + start_time.hour * 60 + start_time.minute,
+            offset + end_time.hour * 60 + end_time.minute)
+
+
+def _period(schedule) -> Tuple:
+    """Période de validité (semaines) d'une séance"""
+    return schedule.week_start, schedule.week_end
+
+
+def _overlapping_periods(periods: Iterable[Tuple]) -> Iterator[Tuple[Tuple, Tuple]]:
+    """Couples de périodes qui se recouvrent (chaque période avec elle-même comprise)"""
+    active = []  # Tas (fin, période) des périodes en cours
+    
+    for period in sorted(periods):
+        while active and active[0][0] < period[0]:
+            heapq.heappop(active)
+        yield period, period
+        for _, other in active:
+            yield other, period
+        heapq.heappush(active, (period[1], period))
+
+
+def _time_overlaps(schedules: List) -> Iterator[Tuple]:
+    """Couples (séance antérieure, séance courante) qui se chevauchent dans la journée"""
+    schedules = sorted(schedules, key=lambda schedule: (schedule.start_time, schedule.end_time))
+    active = []  # Tas (fin, rang, séance) des séances en cours
+    
+    for rank, schedule in enumerate(schedules):
+        while active and active[0][0] <= schedule.start_time:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, schedule
+        heapq.heappush(active, (schedule.end_time, rank, schedule))
+
+
+def find_conflicts(schedules: Iterable, resources: Sequence[str] = RESOURCES) -> List[Conflict]:
+    """Tous les conflits entre séances, ressource par ressource (dans l'ordre de ``resources``)"""
+    schedules = list(schedules)
+    conflicts = []
+    
+    for resource in resources:
+        attribute = f'{resource}_id'
+        buckets = defaultdict(lambda: defaultdict(list))  # (ressource, jour) -> période -> séances
+        for schedule in schedules:
+            resource_id = getattr(schedule, attribute)
+            if resource_id is not None:
+                buckets[(resource_id, schedule.day_of_week)][_period(schedule)].append(schedule)
+        
+        for (resource_id, day), by_period in buckets.items():
+            for first_period, second_period in _overlapping_periods(by_period):
+                if first_period == second_period:
+                    pairs = _time_overlaps(by_period[first_period])
+                else:
+                    # Seuls les couples à cheval sur les deux périodes sont nouveaux
+                    pairs = (
+                        (other, schedule)
+                        for other, schedule in _time_overlaps(by_period[first_period] + by_period[second_period])
+                        if _period(other) != _period(schedule)
+                    )
+                conflicts.extend(Conflict(resource, resource_id, day, other, schedule) for other, schedule in pairs)
+    
+    return conflicts
+
+
+def candidate_conflicts(candidate, schedules: Iterable, resources: Sequence[str] = RESOURCES) -> List[Conflict]:
+    """Conflits d'une séance candidate avec des séances existantes
+    
+    Chaque conflit est normalisé en ``first=candidate``, ``second=séance existante``.
+    """
+    return [
+        conflict._replace(first=candidate, second=conflict.first if conflict.second is candidate else conflict.second)
+        for conflict in find_conflicts([candidate, *schedules], resources)
+        if conflict.first is candidate or conflict.second is candidate
+    ]
+
+
+def conflicting_ids(conflicts: Iterable[Conflict]) -> set:
+    """Identifiants des séances impliquées dans au moins un conflit"""
+    return {schedule.id for conflict in conflicts for schedule in (conflict.first, conflict.second)}
@@ -3,14 +3,56 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db import models
+from django.db import transaction
+from django.db.models import Prefetch
 from datetime import datetime, timedelta, time
-import random
+from collections import defaultdict
+import logging
 
 from core.models import Program, Teacher, Room, Subject
 from schedule.models import Schedule
+from schedule.occupancy import OccupancyIndex
 from authentication.models import User
 
+logger = logging.getLogger(__name__)
+
+
+def _allocate_subject(occupancy, program, teachers, rooms, sessions_needed, days_of_week, time_slots):
+    """Placer les séances d'une matière sur les créneaux libres
+    
+    Parcours déterministe des jours et des créneaux, une séance par jour au
+    plus: enseignant et programme libres, puis la plus petite salle libre qui
+    accueille le programme (salles triées par capacité croissante).
+    
+    Returns:
+        (enseignant qui place le plus de séances, [(jour, début, fin, salle)])
+    """
+    best_teacher, best_placements = teachers[0], []
+    for teacher in teachers:
+        placements = []
+        for day in days_of_week:
+            if len(placements) == sessions_needed:
+                break
+            for start_time, end_time in time_slots:
+                if not (occupancy.teacher_free(teacher.id, day, start_time, end_time)
+                        and occupancy.program_free(program.id, day, start_time, end_time)):
+                    continue
+                room = next((
+                    room for room in rooms
+                    if room.capacity >= program.capacity
+                    and occupancy.room_free(room.id, day, start_time, end_time)
+                ), None)
+                if room is not None:
+                    placements.append((day, start_time, end_time, room))
+                    break  # Une séance par jour
+        
+        if len(placements) > len(best_placements):
+            best_teacher, best_placements = teacher, placements
+        if len(placements) == sessions_needed:
+            break
+    
+    return best_teacher, best_placements
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -18,17 +60,13 @@ def generate_timetable(request):
     """
     Génère automatiquement un emploi du temps pour les programmes sélectionnés
     """
-    # Debug : afficher les données reçues
-    print(f"[DEBUG] Données reçues: {request.data}")
-    print(f"[DEBUG] Méthode: {request.method}")
-    print(f"[DEBUG] Content-Type: {request.content_type}")
+    logger.debug("Données reçues (%s): %s", request.content_type, request.data)
     
     data = request.data
     # Supporter les deux formats pour compatibilité
     selected_programs = data.get('programs', []) or data.get('program_ids', [])
     
-    print(f"[DEBUG] Programmes sélectionnés: {selected_programs}")
-    print(f"[DEBUG] Format reçu - programs: {data.get('programs')}, program_ids: {data.get('program_ids')}")
+    logger.debug("Programmes sélectionnés: %s", selected_programs)
     
     if not selected_programs:
         return Response({
@@ -59,99 +97,101 @@ def generate_timetable(request):
         week_start = today + timedelta(days=(7 - today.weekday()))
         week_end = week_start + timedelta(days=6)
         
+        # Charger en une fois programmes, matières, enseignants, salles et occupation de la semaine
+        programs = {
+            program.id: program
+            for program in Program.objects.filter(id__in=selected_programs).prefetch_related(
+                'subjects',
+                Prefetch('subjects__teachers', queryset=Teacher.objects.select_related('user').order_by('id'))
+            )
+        }
+        rooms_by_department = defaultdict(list)
+        for room in Room.objects.filter(
+            department_id__in={program.department_id for program in programs.values()},
+            is_available=True
+        ).order_by('capacity', 'id'):
+            rooms_by_department[room.department_id].append(room)
+        occupancy = OccupancyIndex.load(days_of_week, time_slots, week_start, week_end)
+        
+        new_schedules = []
         for program_id in selected_programs:
-            try:
-                program = Program.objects.get(id=program_id)
+            program = programs.get(int(program_id))
+            if program is None:
+                conflicts.append(f"Programme avec l'ID {program_id} non trouvé")
+                continue
+            
+            # Récupérer les matières du programme
+            subjects = program.subjects.all()
+            
+            if not subjects:
+                conflicts.append(f"Aucune matière trouvée pour le programme {program.name}")
+                continue
+            
+            rooms = rooms_by_department[program.department_id]
+            
+            for subject in subjects:
+                # Enseignants qualifiés pour cette matière
+                available_teachers = list(subject.teachers.all())
                 
-                # Récupérer les matières du programme
-                subjects = program.subjects.all()
+                if not available_teachers:
+                    conflicts.append(f"Aucun enseignant assigné à {subject.name}")
+                    continue
                 
-                if not subjects:
-                    conflicts.append(f"Aucune matière trouvée pour le programme {program.name}")
+                if not any(room.capacity >= program.capacity for room in rooms):
+                    conflicts.append(
+                        f"Aucune salle disponible pour {subject.name} ({program.capacity} places requises)"
+                    )
                     continue
                 
-                schedules_for_program = []
+                # Planifier selon les heures par semaine (2-3 créneaux par matière)
+                sessions_needed = min(subject.hours_per_week // 2, 3)
                 
-                for subject in subjects:
-                    # Trouver un enseignant disponible pour cette matière
-                    available_teachers = subject.teachers.all()
-                    
-                    if not available_teachers:
-                        conflicts.append(f"Aucun enseignant assigné à {subject.name}")
-                        continue
-                    
-                    teacher = random.choice(available_teachers)
+                teacher, placements = _allocate_subject(
+                    occupancy, program, available_teachers, rooms, sessions_needed, days_of_week, time_slots
+                )
+                
+                for session, (day, start_time, end_time, room) in enumerate(placements):
+                    occupancy.add(teacher.id, room.id, day, start_time, end_time, program_id=program.id)
                     
-                    # Planifier selon les heures par semaine (2-3 créneaux par matière)
-                    sessions_needed = min(subject.hours_per_week // 2, 3)
+                    schedule_title = f"{subject.name} - {program.name}"
+                    if session > 0:
+                        schedule_title += f" (Séance {session + 1})"
                     
-                    for session in range(sessions_needed):
-                        # Choisir un jour et un créneau aléatoirement
-                        day = random.choice(days_of_week)
-                        start_time, end_time = random.choice(time_slots)
-                        
-                        # Trouver une salle disponible
-                        available_rooms = Room.objects.filter(
-                            department=program.department,
-                            is_available=True
-                        )
-                        
-                        if not available_rooms:
-                            conflicts.append(f"Aucune salle disponible pour {subject.name}")
-                            continue
-                        
-                        room = random.choice(available_rooms)
-                        
-                        # Vérifier les conflits
-                        existing_schedule = Schedule.objects.filter(
-                            day_of_week=day,
-                            start_time=start_time,
-                            week_start=week_start,
-                            is_active=True
-                        ).filter(
-                            models.Q(room=room) | models.Q(teacher=teacher)
-                        ).first()
-                        
-                        if existing_schedule:
-                            conflicts.append(f"Conflit détecté pour {subject.name} le {get_day_name(day)} à {start_time}")
-                            continue
-                        
-                        # Créer l'emploi du temps
-                        schedule_title = f"{subject.name} - {program.name}"
-                        if session > 0:
-                            schedule_title += f" (Séance {session + 1})"
-                        
-                        schedule = Schedule.objects.create(
-                            title=schedule_title,
-                            subject=subject,
-                            teacher=teacher,
-                            room=room,
-                            program=program,
-                            day_of_week=day,
-                            start_time=start_time,
-                            end_time=end_time,
-                            week_start=week_start,
-                            week_end=week_end,
-                            created_by=request.user,
-                            is_active=True
-                        )
-                        
-                        schedules_for_program.append({
-                            'id': schedule.id,
-                            'title': schedule.title,
-                            'subject': subject.name,
-                            'teacher': teacher.user.full_name,
-                            'room': room.name,
-                            'day': get_day_name(day),
-                            'start_time': start_time.strftime('%H:%M'),
-                            'end_time': end_time.strftime('%H:%M')
-                        })
+                    new_schedules.append(Schedule(
+                        title=schedule_title,
+                        subject=subject,
+                        teacher=teacher,
+                        room=room,
+                        program=program,
+                        day_of_week=day,
+                        start_time=start_time,
+                        end_time=end_time,
+                        week_start=week_start,
+                        week_end=week_end,
+                        created_by=request.user,
+                        is_active=True
+                    ))
                 
-                generated_schedules.extend(schedules_for_program)
-                
-            except Program.DoesNotExist:
-                conflicts.append(f"Programme avec l'ID {program_id} non trouvé")
-                continue
+                for session in range(len(placements), sessions_needed):
+                    conflicts.append(f"Aucun créneau libre pour {subject.name} (séance {session + 1})")
+        
+        # Créer toutes les séances en une fois
+        for schedule in new_schedules:
+            schedule.sync_ranges()
+        with transaction.atomic():
+            Schedule.objects.bulk_create(new_schedules)
+        
+        for schedule in new_schedules:
+            generated_schedules.append({
+                'id': schedule.id,
+                'title': schedule.title,
+                'subject': schedule.subject.name,
+                'teacher': schedule.teacher.user.full_name,
+                'room': schedule.room.name,
+                'day': get_day_name(schedule.day_of_week),
+                'start_time': schedule.start_time.strftime('%H:%M'),
+                'end_time': schedule.end_time.strftime('%H:%M')
+            })
         
         # Statistiques
         success_count = len(generated_schedules)
@@ -0,0 +1,71 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, IntegerRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.backends.postgresql.psycopg_any import DateRange, NumericRange
+
+
+def fill_ranges(apps, schema_editor):
+    """Matérialiser time_range et date_range pour les séances existantes"""
+    from schedule.conflicts import week_minutes
+    
+    Schedule = apps.get_model('schedule', 'Schedule')
+    schedules = list(Schedule.objects.only(
+        'id', 'day_of_week', 'start_time', 'end_time', 'week_start', 'week_end'
+    ))
+    for schedule in schedules:
+        schedule.time_range = NumericRange(*week_minutes(schedule.day_of_week, schedule.start_time, schedule.end_time))
+        schedule.date_range = DateRange(schedule.week_start, schedule.week_end, '[]')
+    Schedule.objects.bulk_update(schedules, ['time_range', 'date_range'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """Non-chevauchement garanti par la base
+
+    Les contraintes échouent si des séances actives se chevauchent déjà:
+    les résoudre d'abord (POST schedule/check-conflicts/).
+    """
+
+    dependencies = [
+        ('schedule', '0002_alter_absence_approved_by_alter_absence_created_by_and_more'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='schedule',
+            name='time_range',
+            field=IntegerRangeField(editable=False, help_text='Minutes depuis le début de la semaine', null=True),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='date_range',
+            field=DateRangeField(editable=False, help_text='Période de validité', null=True),
+        ),
+        migrations.RunPython(fill_ranges, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=ExclusionConstraint(
+                condition=models.Q(('is_active', True)),
+                deferrable=models.Deferrable['IMMEDIATE'],
+                expressions=[('room', RangeOperators.EQUAL), ('time_range', RangeOperators.OVERLAPS), ('date_range', RangeOperators.OVERLAPS)],
+                name='schedule_room_no_overlap',
+                violation_error_message='Conflit de salle: la salle est déjà occupée sur ce créneau.',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=ExclusionConstraint(
+                condition=models.Q(('is_active', True)),
+                deferrable=models.Deferrable['IMMEDIATE'],
+                expressions=[('teacher', RangeOperators.EQUAL), ('time_range', RangeOperators.OVERLAPS), ('date_range', RangeOperators.OVERLAPS)],
+                name='schedule_teacher_no_overlap',
+                violation_error_message="Conflit enseignant: l'enseignant a déjà un cours sur ce créneau.",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=GistIndex(fields=['time_range', 'date_range'], name='schedule_ranges_gist'),
+        ),
+    ]
@@ -1,6 +1,12 @@
 from django.db import models
+from django.db.models import Deferrable
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, IntegerRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
+from django.db.backends.postgresql.psycopg_any import DateRange, NumericRange
 from core.models import Program, Room, Subject, Teacher
+from .conflicts import week_minutes
 
 User = get_user_model()
 
@@ -29,13 +35,70 @@ class Schedule(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_schedules')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    
+    # Intervalles matérialisés (voir sync_ranges) pour les contraintes d'exclusion
+    time_range = IntegerRangeField(null=True, editable=False, help_text="Minutes depuis le début de la semaine")
+    date_range = DateRangeField(null=True, editable=False, help_text="Période de validité")
 
     class Meta:
         ordering = ['day_of_week', 'start_time']
+        constraints = [
+            # Les chevauchements sont rejetés par la base, même en écritures concurrentes;
+            # vérifiées en fin d'instruction, un bulk_update peut échanger deux séances
+            ExclusionConstraint(
+                name='schedule_room_no_overlap',
+                expressions=[
+                    ('room', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                    ('date_range', RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(is_active=True),
+                deferrable=Deferrable.IMMEDIATE,
+                violation_error_message='Conflit de salle: la salle est déjà occupée sur ce créneau.'
+            ),
+            ExclusionConstraint(
+                name='schedule_teacher_no_overlap',
+                expressions=[
+                    ('teacher', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                    ('date_range', RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(is_active=True),
+                deferrable=Deferrable.IMMEDIATE,
+                violation_error_message='Conflit enseignant: l\'enseignant a déjà un cours sur ce créneau.'
+            ),
+        ]
+        indexes = [
+            GistIndex(fields=['time_range', 'date_range'], name='schedule_ranges_gist'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
 
+    def sync_ranges(self):
+        """Recalculer time_range et date_range
+        
+        Appelé par save(); les écritures groupées (bulk_create, bulk_update)
+        doivent l'appeler elles-mêmes.
+        """
+        self.time_range = NumericRange(*week_minutes(self.day_of_week, self.start_time, self.end_time))
+        self.date_range = DateRange(self.week_start, self.week_end, '[]')
+
+    def validate_constraints(self, exclude=None):
+        # Les formulaires (ModelForm, admin) excluent time_range et date_range
+        # (editable=False), ce qui désactiverait les contraintes d'exclusion:
+        # ces champs sont dérivés des horaires, recalculés par clean()
+        if exclude:
+            exclude = set(exclude) - {'time_range', 'date_range'}
+        super().validate_constraints(exclude=exclude)
+
+    def save(self, *args, **kwargs):
+        self.sync_ranges()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'time_range', 'date_range'}
+        super().save(*args, **kwargs)
+
     def clean(self):
         from django.core.exceptions import ValidationError
         
@@ -43,31 +106,9 @@ class Schedule(models.Model):
         if self.start_time >= self.end_time:
             raise ValidationError('L\'heure de début doit être antérieure à l\'heure de fin.')
         
-        # Check for room conflicts
-        room_conflicts = Schedule.objects.filter(
-            room=self.room,
-            day_of_week=self.day_of_week,
-            week_start=self.week_start,
-            week_end=self.week_end,
-            is_active=True
-        ).exclude(id=self.id if self.id else None)
-        
-        for conflict in room_conflicts:
-            if (self.start_time < conflict.end_time and self.end_time > conflict.start_time):
-                raise ValidationError(f'Conflit de salle avec {conflict.title}')
-        
-        # Check for teacher conflicts
-        teacher_conflicts = Schedule.objects.filter(
-            teacher=self.teacher,
-            day_of_week=self.day_of_week,
-            week_start=self.week_start,
-            week_end=self.week_end,
-            is_active=True
-        ).exclude(id=self.id if self.id else None)
-        
-        for conflict in teacher_conflicts:
-            if (self.start_time < conflict.end_time and self.end_time > conflict.start_time):
-                raise ValidationError(f'Conflit enseignant avec {conflict.title}')
+        # Les conflits de salle et d'enseignant sont vérifiés par les contraintes
+        # d'exclusion (validate_constraints dans full_clean, puis la base à l'écriture)
+        self.sync_ranges()
 
 class Absence(models.Model):
     ABSENCE_TYPE_CHOICES = (
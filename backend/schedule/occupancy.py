@@ -0,0 +1,105 @@
+"""
+Index d'occupation hebdomadaire en mémoire
+
+Les séances existantes d'une période sont chargées en une seule requête puis
+rangées dans des masques de bits par enseignant, par salle et par programme (un bit par
+couple jour × créneau de la grille), avec un compteur de minutes par
+enseignant et par jour. Les vérifications de disponibilité deviennent des
+opérations sur entiers, et l'index est mis à jour au fil des placements.
+"""
+
+from collections import defaultdict
+from datetime import date, time
+from typing import Iterable, List, Tuple
+
+from .models import Schedule
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class OccupancyIndex:
+    """Occupation des enseignants, des salles et des programmes sur une grille jours × créneaux"""
+    
+    def __init__(self, days: Iterable[int], time_slots: List[Tuple[time, time]]):
+        self.days = list(days)
+        self.time_slots = list(time_slots)
+        self.week_start = None
+        self.week_end = None
+        
+        # Créneaux de la grille par jour: (début, fin en minutes, bit)
+        self._grid = {}
+        bit = 0
+        for day in self.days:
+            self._grid[day] = []
+            for start_time, end_time in self.time_slots:
+                self._grid[day].append((_minutes(start_time), _minutes(end_time), 1 << bit))
+                bit += 1
+        
+        self.teacher_busy = defaultdict(int)      # teacher_id -> masque
+        self.room_busy = defaultdict(int)         # room_id -> masque
+        self.program_busy = defaultdict(int)      # program_id -> masque
+        self.teacher_minutes = defaultdict(int)   # (teacher_id, jour) -> minutes programmées
+    
+    @classmethod
+    def load(cls, days: Iterable[int], time_slots: List[Tuple[time, time]],
+             week_start: date, week_end: date, exclude_ids: Iterable[int] = ()) -> 'OccupancyIndex':
+        """Charger les séances actives qui chevauchent la période (une requête)
+        
+        ``exclude_ids`` écarte des séances destinées à être remplacées.
+        """
+        index = cls(days, time_slots)
+        index.week_start = week_start
+        index.week_end = week_end
+        
+        schedules = Schedule.objects.filter(
+            week_start__lte=week_end,
+            week_end__gte=week_start,
+            is_active=True
+        )
+        if exclude_ids:
+            schedules = schedules.exclude(id__in=exclude_ids)
+        
+        for teacher_id, room_id, program_id, day, start_time, end_time in schedules.values_list(
+            'teacher_id', 'room_id', 'program_id', 'day_of_week', 'start_time', 'end_time'
+        ):
+            index.add(teacher_id, room_id, day, start_time, end_time, program_id=program_id)
+        
+        return index
+    
+    def covers(self, week_start: date, week_end: date) -> bool:
+        """L'index a-t-il été chargé pour cette période ?"""
+        return self.week_start == week_start and self.week_end == week_end
+    
+    def mask(self, day: int, start_time: time, end_time: time) -> int:
+        """Bits des créneaux de la grille qui chevauchent l'intervalle"""
+        start, end = _minutes(start_time), _minutes(end_time)
+        mask = 0
+        for slot_start, slot_end, bit in self._grid.get(day, ()):
+            if start < slot_end and end > slot_start:
+                mask |= bit
+        return mask
+    
+    def add(self, teacher_id: int, room_id: int, day: int, start_time: time, end_time: time,
+            program_id: int = None):
+        """Enregistrer une séance (existante ou nouvellement placée)"""
+        mask = self.mask(day, start_time, end_time)
+        self.teacher_busy[teacher_id] |= mask
+        self.room_busy[room_id] |= mask
+        if program_id is not None:
+            self.program_busy[program_id] |= mask
+        self.teacher_minutes[(teacher_id, day)] += _minutes(end_time) - _minutes(start_time)
+    
+    def teacher_free(self, teacher_id: int, day: int, start_time: time, end_time: time) -> bool:
+        return not self.teacher_busy[teacher_id] & self.mask(day, start_time, end_time)
+    
+    def room_free(self, room_id: int, day: int, start_time: time, end_time: time) -> bool:
+        return not self.room_busy[room_id] & self.mask(day, start_time, end_time)
+    
+    def program_free(self, program_id: int, day: int, start_time: time, end_time: time) -> bool:
+        return not self.program_busy[program_id] & self.mask(day, start_time, end_time)
+    
+    def daily_hours(self, teacher_id: int, day: int) -> float:
+        """Heures déjà programmées pour un enseignant un jour donné"""
+        return self.teacher_minutes[(teacher_id, day)] / 60
@@ -14,6 +14,7 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 
 from .models import Schedule
+from .conflicts import conflicting_ids, find_conflicts
 from core.models import Department, Program, Room, Subject, Teacher
 from authentication.models import User
 
@@ -27,22 +28,11 @@ def optimization_stats(request):
     # Calculer les statistiques actuelles
     total_schedules = Schedule.objects.filter(is_active=True).count()
     
-    # Détecter les conflits (simplifié)
-    conflicts = 0
-    schedules = Schedule.objects.filter(is_active=True)
-    for schedule in schedules:
-        from django.db.models import Q
-        conflicts_count = Schedule.objects.filter(
-                    Q(room=schedule.room) | Q(teacher=schedule.teacher),
-            day_of_week=schedule.day_of_week,
-            week_start=schedule.week_start,
-            is_active=True
-        ).exclude(id=schedule.id).filter(
-            start_time__lt=schedule.end_time,
-            end_time__gt=schedule.start_time
-        ).count()
-        if conflicts_count > 0:
-            conflicts += 1
+    # Détecter les conflits: séances en conflit de salle ou d'enseignant (une requête, balayage)
+    schedules = Schedule.objects.filter(is_active=True).only(
+        'id', 'teacher_id', 'room_id', 'day_of_week', 'start_time', 'end_time', 'week_start', 'week_end'
+    )
+    conflicts = len(conflicting_ids(find_conflicts(schedules, resources=('room', 'teacher'))))
     
     # Calculer le taux d'occupation des salles
     total_rooms = Room.objects.count()
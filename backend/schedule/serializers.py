@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import Schedule, Absence, MakeupSession
 
@@ -18,6 +19,17 @@ class ScheduleSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('L\'heure de début doit être antérieure à l\'heure de fin.')
         
         return data
+    
+    def save(self, **kwargs):
+        # Les chevauchements sont rejetés à l'écriture par les contraintes d'exclusion
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as e:
+            for constraint in Schedule._meta.constraints:
+                if constraint.name in str(e):
+                    raise serializers.ValidationError(constraint.violation_error_message)
+            raise
 
 class AbsenceSerializer(serializers.ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.user.full_name', read_only=True)
@@ -10,7 +10,9 @@ urlpatterns = [
     path('schedules/<int:pk>/', views.ScheduleDetailView.as_view(), name='schedule_detail'),
     path('schedules/by-week/', views.get_schedule_by_week, name='schedule_by_week'),
     path('schedules/check-conflicts/', views.check_schedule_conflicts, name='check_conflicts'),
+    path('schedules/check-conflicts/batch/', views.check_schedule_conflicts_batch, name='check_conflicts_batch'),
     path('schedules/available-rooms/', views.available_rooms, name='available_rooms'),
+    path('schedules/room-availability/', views.room_availability, name='room_availability'),
     
     # Absences
     path('absences/', views.AbsenceListCreateView.as_view(), name='absence_list'),
@@ -1,80 +1,123 @@
-from datetime import datetime
+from datetime import datetime, time
 from django.db.models import Q
 from .models import Schedule
+from django.db.backends.postgresql.psycopg_any import DateRange, NumericRange
+from .conflicts import find_conflicts, week_minutes
+from .occupancy import OccupancyIndex
 from core.models import Room, TeacherAvailability
 from core.serializers import RoomSerializer
 
-def check_conflicts(teacher_id, room_id, day_of_week, start_time, end_time, week_start, week_end, exclude_id=None):
-    """Check for scheduling conflicts"""
-    conflicts = []
-    
-    # Convert string times to time objects if needed
+def _proposed_schedule(teacher_id, room_id, day_of_week, start_time, end_time, week_start, week_end):
+    """Build an unsaved Schedule from (possibly string) request parameters"""
+    # Convert string times and dates if needed
     if isinstance(start_time, str):
         start_time = datetime.strptime(start_time, '%H:%M').time()
     if isinstance(end_time, str):
         end_time = datetime.strptime(end_time, '%H:%M').time()
+    if isinstance(week_start, str):
+        week_start = datetime.strptime(week_start, '%Y-%m-%d').date()
+    if isinstance(week_end, str):
+        week_end = datetime.strptime(week_end, '%Y-%m-%d').date()
     
-    # Check room conflicts
-    room_conflicts = Schedule.objects.filter(
-        room_id=room_id,
-        day_of_week=day_of_week,
+    candidate = Schedule(
+        teacher_id=int(teacher_id) if teacher_id else None,
+        room_id=int(room_id) if room_id else None,
+        day_of_week=int(day_of_week),
+        start_time=start_time,
+        end_time=end_time,
         week_start=week_start,
-        week_end=week_end,
-        is_active=True
+        week_end=week_end
     )
+    candidate.sync_ranges()
+    return candidate
+
+def check_conflicts(teacher_id, room_id, day_of_week, start_time, end_time, week_start, week_end, exclude_id=None):
+    """Check for scheduling conflicts"""
+    return check_conflicts_batch([{
+        'teacher_id': teacher_id,
+        'room_id': room_id,
+        'day_of_week': day_of_week,
+        'start_time': start_time,
+        'end_time': end_time,
+        'week_start': week_start,
+        'week_end': week_end,
+        'exclude_id': exclude_id,
+    }])[0]
+
+def check_conflicts_batch(proposals):
+    """Check many proposed sessions at once, against the database and against each other
     
-    if exclude_id:
-        room_conflicts = room_conflicts.exclude(id=exclude_id)
-    
-    for conflict in room_conflicts:
-        if start_time < conflict.end_time and end_time > conflict.start_time:
-            conflicts.append({
-                'type': 'room',
-                'message': f'Conflit de salle avec le cours "{conflict.title}"',
-                'schedule': {
-                    'id': conflict.id,
-                    'title': conflict.title,
-                    'start_time': conflict.start_time.strftime('%H:%M'),
-                    'end_time': conflict.end_time.strftime('%H:%M')
-                }
-            })
+    Each proposal is a dict with the check_conflicts arguments (exclude_id is
+    optional: the schedule being edited). Occupancy and teacher availability
+    are loaded with one query each, then overlaps are found in memory.
     
-    # Check teacher conflicts
-    teacher_conflicts = Schedule.objects.filter(
-        teacher_id=teacher_id,
-        day_of_week=day_of_week,
-        week_start=week_start,
-        week_end=week_end,
+    Returns:
+        One conflict list per proposal, in order
+    """
+    candidates = [
+        _proposed_schedule(**{key: value for key, value in proposal.items() if key != 'exclude_id'})
+        for proposal in proposals
+    ]
+    excluded = {proposal['exclude_id'] for proposal in proposals if proposal.get('exclude_id')}
+    conflicts = [[] for _ in candidates]
+    
+    # Check room and teacher conflicts (one query, sweep line)
+    existing = Schedule.objects.filter(
+        Q(room_id__in={c.room_id for c in candidates if c.room_id})
+        | Q(teacher_id__in={c.teacher_id for c in candidates if c.teacher_id}),
+        day_of_week__in={c.day_of_week for c in candidates},
+        date_range__overlap=DateRange(
+            min(c.week_start for c in candidates), max(c.week_end for c in candidates), '[]'
+        ),
         is_active=True
-    )
+    ).exclude(id__in=excluded)
+    if len(candidates) == 1:
+        # Single check: let the GiST index narrow the rows to overlapping hours
+        existing = existing.filter(time_range__overlap=candidates[0].time_range)
     
-    if exclude_id:
-        teacher_conflicts = teacher_conflicts.exclude(id=exclude_id)
-    
-    for conflict in teacher_conflicts:
-        if start_time < conflict.end_time and end_time > conflict.start_time:
-            conflicts.append({
-                'type': 'teacher',
-                'message': f'Conflit enseignant avec le cours "{conflict.title}"',
-                'schedule': {
-                    'id': conflict.id,
-                    'title': conflict.title,
-                    'start_time': conflict.start_time.strftime('%H:%M'),
-                    'end_time': conflict.end_time.strftime('%H:%M')
-                }
-            })
+    messages = {
+        'room': ('Conflit de salle avec le cours "{}"', 'Conflit de salle avec la séance proposée n°{}'),
+        'teacher': ('Conflit enseignant avec le cours "{}"', 'Conflit enseignant avec la séance proposée n°{}'),
+    }
+    position = {id(candidate): index for index, candidate in enumerate(candidates)}
+    for conflict in find_conflicts([*candidates, *existing], resources=('room', 'teacher')):
+        first, second = position.get(id(conflict.first)), position.get(id(conflict.second))
+        for own, other_index, other in ((first, second, conflict.second), (second, first, conflict.first)):
+            if own is None:
+                continue
+            if other_index is None:
+                conflicts[own].append({
+                    'type': conflict.resource,
+                    'message': messages[conflict.resource][0].format(other.title),
+                    'schedule': {
+                        'id': other.id,
+                        'title': other.title,
+                        'start_time': other.start_time.strftime('%H:%M'),
+                        'end_time': other.end_time.strftime('%H:%M')
+                    }
+                })
+            else:
+                conflicts[own].append({
+                    'type': conflict.resource,
+                    'message': messages[conflict.resource][1].format(other_index + 1),
+                    'proposal': other_index
+                })
     
-    # Check teacher availability
+    # Check teacher availability (first matching availability per teacher and day)
     try:
-        availability = TeacherAvailability.objects.filter(
-            teacher_id=teacher_id,
-            day_of_week=day_of_week,
+        availabilities = {}
+        for availability in TeacherAvailability.objects.filter(
+            teacher_id__in={c.teacher_id for c in candidates},
+            day_of_week__in={c.day_of_week for c in candidates},
             is_available=True
-        ).first()
+        ).order_by('id'):
+            availabilities.setdefault((availability.teacher_id, availability.day_of_week), availability)
         
-        if availability:
-            if not (start_time >= availability.start_time and end_time <= availability.end_time):
-                conflicts.append({
+        for index, candidate in enumerate(candidates):
+            availability = availabilities.get((candidate.teacher_id, candidate.day_of_week))
+            if availability and not (candidate.start_time >= availability.start_time
+                                     and candidate.end_time <= availability.end_time):
+                conflicts[index].append({
                     'type': 'availability',
                     'message': f'L\'enseignant n\'est pas disponible à ces heures',
                     'available_hours': {
@@ -101,14 +144,16 @@ def get_available_rooms(day_of_week, start_time, end_time, week_start, week_end,
     if room_type:
         rooms = rooms.filter(room_type=room_type)
     
-    # Get rooms that have conflicts
+    if isinstance(week_start, str):
+        week_start = datetime.strptime(week_start, '%Y-%m-%d').date()
+    if isinstance(week_end, str):
+        week_end = datetime.strptime(week_end, '%Y-%m-%d').date()
+    
+    # Get rooms that have conflicts (range overlap, served by the GiST indexes)
     conflicted_rooms = Schedule.objects.filter(
-        day_of_week=day_of_week,
-        week_start=week_start,
-        week_end=week_end,
+        time_range__overlap=NumericRange(*week_minutes(int(day_of_week), start_time, end_time)),
+        date_range__overlap=DateRange(week_start, week_end, '[]'),
         is_active=True
-    ).filter(
-        Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
     ).values_list('room_id', flat=True)
     
     # Exclude conflicted rooms
@@ -116,6 +161,88 @@ def get_available_rooms(day_of_week, start_time, end_time, week_start, week_end,
     
     return RoomSerializer(available_rooms, many=True).data
 
+def _grid_time_slots(day_start, day_end, step_minutes):
+    """Time slots of the availability grid, as (start, end) time pairs"""
+    start = day_start.hour * 60 + day_start.minute
+    end = day_end.hour * 60 + day_end.minute
+    return [
+        (time(minute // 60, minute % 60), time((minute + step_minutes) // 60, (minute + step_minutes) % 60))
+        for minute in range(start, end - step_minutes + 1, step_minutes)
+    ]
+
+def _free_intervals(free_mask, time_slots):
+    """Run-length encode a per-day free mask into ['HH:MM', 'HH:MM'] intervals"""
+    intervals = []
+    run_start = None
+    for index, (start_time, end_time) in enumerate(time_slots + [(None, None)]):
+        if index < len(time_slots) and free_mask >> index & 1:
+            if run_start is None:
+                run_start = start_time
+        elif run_start is not None:
+            intervals.append([run_start.strftime('%H:%M'), time_slots[index - 1][1].strftime('%H:%M')])
+            run_start = None
+    return intervals
+
+def room_availability_matrix(week_start, week_end, room_type=None, department=None, min_capacity=None,
+                             day_start=time(8, 0), day_end=time(20, 0), step_minutes=30, as_intervals=False):
+    """Free-room matrix for a week: rooms x days x grid slots
+    
+    Occupancy is read with a single query into per-room bitsets (see
+    OccupancyIndex). For each room and day, ``free`` is either a bitmask
+    (bit k set = grid slot k free) or, with ``as_intervals``, the run-length
+    encoded free intervals. Bitmasks are hex strings ('0x...'): a fine grid
+    needs more than the 53 bits a JSON number keeps exact in JavaScript.
+    """
+    if isinstance(week_start, str):
+        week_start = datetime.strptime(week_start, '%Y-%m-%d').date()
+    if isinstance(week_end, str):
+        week_end = datetime.strptime(week_end, '%Y-%m-%d').date()
+    
+    rooms = Room.objects.filter(is_available=True)
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    if department:
+        rooms = rooms.filter(department_id=department)
+    if min_capacity:
+        rooms = rooms.filter(capacity__gte=min_capacity)
+    rooms = list(rooms.order_by('name'))
+    
+    days = [day for day, _ in Schedule.DAY_CHOICES]
+    time_slots = _grid_time_slots(day_start, day_end, step_minutes)
+    index = OccupancyIndex(days, time_slots)
+    
+    # One occupancy query for the whole matrix
+    for teacher_id, room_id, day, start_time, end_time in Schedule.objects.filter(
+        room_id__in=[room.id for room in rooms],
+        date_range__overlap=DateRange(week_start, week_end, '[]'),
+        is_active=True
+    ).values_list('teacher_id', 'room_id', 'day_of_week', 'start_time', 'end_time'):
+        index.add(teacher_id, room_id, day, start_time, end_time)
+    
+    day_mask = (1 << len(time_slots)) - 1
+    matrix = []
+    for room in rooms:
+        busy = index.room_busy[room.id]
+        free = [~(busy >> (position * len(time_slots))) & day_mask for position in range(len(days))]
+        matrix.append({
+            'id': room.id,
+            'name': room.name,
+            'code': room.code,
+            'room_type': room.room_type,
+            'capacity': room.capacity,
+            'free': [_free_intervals(mask, time_slots) for mask in free] if as_intervals else [hex(mask) for mask in free]
+        })
+    
+    return {
+        'week_start': week_start.strftime('%Y-%m-%d'),
+        'week_end': week_end.strftime('%Y-%m-%d'),
+        'days': days,
+        'slots': [
+            [start_time.strftime('%H:%M'), end_time.strftime('%H:%M')] for start_time, end_time in time_slots
+        ],
+        'rooms': matrix
+    }
+
 def generate_schedule_suggestions(conflicts):
     """Generate suggestions to resolve conflicts"""
     suggestions = []
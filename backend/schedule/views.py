@@ -11,7 +11,10 @@ from .serializers import (
     AbsenceSerializer,
     MakeupSessionSerializer,
 )
-from .utils import check_conflicts, get_available_rooms
+from .utils import check_conflicts, check_conflicts_batch, get_available_rooms, room_availability_matrix
+
+# Upper bound on proposed sessions checked by one batch request
+MAX_BATCH_CONFLICT_CHECKS = 200
 
 
 class ScheduleListCreateView(generics.ListCreateAPIView):
@@ -77,6 +80,49 @@ def check_schedule_conflicts(request):
         'conflicts': conflicts
     })
 
+@api_view(['POST'])
+def check_schedule_conflicts_batch(request):
+    """Check a list of proposed sessions in one request (drag-and-drop, bulk edit)
+    
+    Each session is checked against the database and against the other
+    proposed sessions; results are returned per session, in order.
+    """
+    sessions = request.data.get('sessions')
+    if not isinstance(sessions, list) or not sessions:
+        return Response({'error': 'Liste de séances requise'}, status=400)
+    if len(sessions) > MAX_BATCH_CONFLICT_CHECKS:
+        return Response({'error': f'Au plus {MAX_BATCH_CONFLICT_CHECKS} séances par requête'}, status=400)
+    
+    required = ('teacher', 'room', 'day_of_week', 'start_time', 'end_time', 'week_start', 'week_end')
+    for index, session in enumerate(sessions):
+        if not isinstance(session, dict) or any(session.get(field) in (None, '') for field in required):
+            return Response({'error': f'Séance {index}: paramètres manquants'}, status=400)
+    
+    try:
+        results = check_conflicts_batch([
+            {
+                'teacher_id': session['teacher'],
+                'room_id': session['room'],
+                'day_of_week': session['day_of_week'],
+                'start_time': session['start_time'],
+                'end_time': session['end_time'],
+                'week_start': session['week_start'],
+                'week_end': session['week_end'],
+                'exclude_id': session.get('schedule_id'),
+            }
+            for session in sessions
+        ])
+    except (TypeError, ValueError):
+        return Response({'error': 'Format de date ou d\'heure invalide'}, status=400)
+    
+    return Response({
+        'has_conflicts': any(results),
+        'results': [
+            {'index': index, 'has_conflicts': len(conflicts) > 0, 'conflicts': conflicts}
+            for index, conflicts in enumerate(results)
+        ]
+    })
+
 @api_view(['GET'])
 def get_schedule_by_week(request):
     """Get schedule for a specific week formatted for frontend - CORRIGÉ"""
@@ -455,6 +501,44 @@ def available_rooms(request):
     return Response(available)
 
 
+@api_view(['GET'])
+def room_availability(request):
+    """Weekly free-room matrix (rooms x days x time slots) in one response
+    
+    Query parameters: week_start (required), week_end (default: week_start + 6
+    days), room_type, department, min_capacity, step (grid minutes, default 30)
+    and format ('bitmask', default, as hex strings, or 'intervals').
+    """
+    week_start = request.GET.get('week_start')
+    if not week_start:
+        return Response({'error': 'Paramètres manquants'}, status=400)
+    
+    try:
+        week_start = datetime.strptime(week_start, '%Y-%m-%d').date()
+        week_end = request.GET.get('week_end')
+        week_end = datetime.strptime(week_end, '%Y-%m-%d').date() if week_end else week_start + timedelta(days=6)
+        department = int(request.GET.get('department') or 0) or None
+        min_capacity = int(request.GET.get('min_capacity') or 0)
+        step = int(request.GET.get('step') or 30)
+    except ValueError:
+        return Response({'error': 'Paramètres invalides'}, status=400)
+    
+    if week_end < week_start or not 5 <= step <= 240:
+        return Response({'error': 'Paramètres invalides'}, status=400)
+    
+    matrix = room_availability_matrix(
+        week_start=week_start,
+        week_end=week_end,
+        room_type=request.GET.get('room_type'),
+        department=department,
+        min_capacity=min_capacity,
+        step_minutes=step,
+        as_intervals=request.GET.get('format') == 'intervals'
+    )
+    
+    return Response(matrix)
+
+
 @api_view(['GET'])
 def get_schedule_by_week(request):
     """Get schedule for a specific week formatted for frontend"""
@@ -1 +1,4 @@
-# Django schedule management system
\ No newline at end of file
+# Django schedule management system
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
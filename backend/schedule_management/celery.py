@@ -0,0 +1,13 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+
+app = Celery('schedule_management')
+
+# Configuration lue depuis les settings Django (préfixe CELERY_)
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Découverte automatique des tasks.py des applications
+app.autodiscover_tasks()
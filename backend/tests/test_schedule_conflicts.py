@@ -0,0 +1,85 @@
+"""
+Tests du moteur de détection des conflits (balayage par ressource)
+"""
+
+import os
+import django
+from django.test import SimpleTestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from collections import namedtuple
+from datetime import date, time, timedelta
+from schedule.conflicts import candidate_conflicts, conflicting_ids, find_conflicts
+
+Session = namedtuple('Session', [
+    'id', 'teacher_id', 'room_id', 'program_id', 'day_of_week',
+    'start_time', 'end_time', 'week_start', 'week_end'
+])
+
+
+def make_session(session_id, teacher_id, room_id, day, start_time, end_time,
+                 week_start=date(2024, 9, 2), week_end=date(2024, 12, 20)):
+    """Construire une séance détachée de l'ORM pour les tests"""
+    return Session(session_id, teacher_id, room_id, None, day, start_time, end_time, week_start, week_end)
+
+
+class FindConflictsTest(SimpleTestCase):
+    """Tests de la détection des chevauchements par ressource"""
+    
+    def test_overlaps_are_reported_per_resource(self):
+        sessions = [
+            make_session(1, 10, 100, 1, time(8, 0), time(10, 0)),
+            make_session(2, 10, 101, 1, time(9, 0), time(11, 0)),   # même enseignant
+            make_session(3, 11, 100, 1, time(9, 30), time(10, 30)),  # même salle
+            make_session(4, 10, 100, 1, time(10, 0), time(11, 0)),  # contigu à 1: pas de conflit avec 1
+        ]
+        
+        conflicts = find_conflicts(sessions, resources=('teacher', 'room'))
+        pairs = {(c.resource, c.first.id, c.second.id) for c in conflicts}
+        
+        self.assertEqual(pairs, {
+            ('teacher', 1, 2), ('teacher', 2, 4),
+            ('room', 1, 3), ('room', 3, 4),
+        })
+        self.assertEqual(conflicting_ids(conflicts), {1, 2, 3, 4})
+    
+    def test_other_day_or_disjoint_period_is_not_a_conflict(self):
+        sessions = [
+            make_session(1, 10, 100, 1, time(8, 0), time(10, 0), week_end=date(2024, 10, 31)),
+            make_session(2, 10, 100, 2, time(8, 0), time(10, 0)),
+            make_session(3, 10, 100, 1, time(8, 0), time(10, 0), week_start=date(2024, 11, 4)),
+        ]
+        
+        self.assertEqual(find_conflicts(sessions), [])
+    
+    def test_weekly_rows_only_meet_overlapping_periods(self):
+        # Une ligne par semaine pour la même séance récurrente, plus une séance sur tout le semestre
+        weekly = [
+            make_session(week, 10, 100, 1, time(8, 0), time(10, 0),
+                         week_start=date(2024, 9, 2) + timedelta(weeks=week),
+                         week_end=date(2024, 9, 6) + timedelta(weeks=week))
+            for week in range(15)
+        ]
+        semester = make_session(99, 11, 100, 1, time(9, 0), time(11, 0), week_start=date(2024, 12, 2))
+        
+        conflicts = find_conflicts([*weekly, semester], resources=('room',))
+        
+        self.assertEqual(
+            sorted((c.first.id, c.second.id) for c in conflicts),
+            [(13, 99), (14, 99)]
+        )
+    
+    def test_candidate_conflicts_point_to_existing_sessions(self):
+        existing = [
+            make_session(1, 10, 100, 1, time(8, 0), time(10, 0)),
+            make_session(2, 11, 101, 1, time(8, 0), time(10, 0)),
+        ]
+        candidate = make_session(None, 12, 100, 1, time(9, 0), time(11, 0))
+        
+        conflicts = candidate_conflicts(candidate, existing, resources=('room', 'teacher'))
+        
+        self.assertEqual([(c.resource, c.second.id) for c in conflicts], [('room', 1)])
+        self.assertIs(conflicts[0].first, candidate)
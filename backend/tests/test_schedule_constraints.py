@@ -0,0 +1,131 @@
+"""
+Tests des contraintes d'exclusion de schedule.Schedule (PostgreSQL)
+"""
+
+import os
+import django
+from django.test import TestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from datetime import date, time
+from importlib import import_module
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.backends.postgresql.psycopg_any import DateRange, NumericRange
+from django.forms import modelform_factory
+from rest_framework import serializers
+from authentication.models import User
+from core.models import Department, Program, Room, Subject, Teacher
+from schedule.models import Schedule
+from schedule.serializers import ScheduleSerializer
+
+ranges_migration = import_module('schedule.migrations.0003_schedule_ranges_exclusion')
+
+
+class ScheduleConstraintTest(TestCase):
+    """Tests du non-chevauchement garanti par la base"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        cls.subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture', semester=1
+        )
+        cls.rooms = [
+            Room.objects.create(name=f'Salle {i}', code=f'S{i}', room_type='lecture', capacity=40,
+                                department=department)
+            for i in range(2)
+        ]
+        cls.teachers = [
+            Teacher.objects.create(
+                user=User.objects.create(email=f'prof{i}@test.local', username=f'prof{i}', role='teacher'),
+                employee_id=f'E{i}', specialization='Mathématiques'
+            )
+            for i in range(2)
+        ]
+    
+    def make_schedule(self, room, teacher, start, end, **kwargs):
+        values = {
+            'title': 'Algèbre', 'subject': self.subject, 'teacher': teacher, 'room': room,
+            'program': self.program, 'day_of_week': 0, 'start_time': start, 'end_time': end,
+            'week_start': date(2024, 9, 2), 'week_end': date(2024, 9, 6),
+        }
+        values.update(kwargs)
+        return Schedule(**values)
+    
+    def test_overlapping_room_is_rejected_by_the_database(self):
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0)).save()
+        
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_schedule(self.rooms[0], self.teachers[1], time(9, 0), time(11, 0)).save()
+    
+    def test_adjacent_and_inactive_sessions_do_not_conflict(self):
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0)).save()
+        
+        self.make_schedule(self.rooms[0], self.teachers[0], time(10, 0), time(12, 0)).save()
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0), is_active=False).save()
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0),
+                           week_start=date(2024, 9, 9), week_end=date(2024, 9, 13)).save()
+        
+        self.assertEqual(Schedule.objects.count(), 4)
+    
+    def test_model_form_reports_teacher_conflict(self):
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0)).save()
+        ScheduleForm = modelform_factory(Schedule, fields='__all__')
+        
+        form = ScheduleForm(data={
+            'title': 'Algèbre', 'subject': self.subject.id, 'teacher': self.teachers[0].id,
+            'room': self.rooms[1].id, 'program': self.program.id, 'day_of_week': 0,
+            'start_time': '09:00', 'end_time': '11:00', 'week_start': '2024-09-02',
+            'week_end': '2024-09-06', 'is_active': True,
+        })
+        
+        self.assertNotIn('time_range', form.fields)
+        self.assertFalse(form.is_valid())
+        self.assertIn(
+            "Conflit enseignant: l'enseignant a déjà un cours sur ce créneau.",
+            form.non_field_errors()
+        )
+    
+    def test_full_clean_ignores_the_session_itself(self):
+        schedule = self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0))
+        schedule.save()
+        
+        schedule.end_time = time(10, 30)
+        schedule.full_clean(exclude=['created_by', 'time_range', 'date_range'])
+        schedule.save()
+        
+        other = self.make_schedule(self.rooms[0], self.teachers[1], time(10, 0), time(11, 0))
+        with self.assertRaises(ValidationError):
+            other.full_clean(exclude=['created_by', 'time_range', 'date_range'])
+    
+    def test_serializer_maps_constraint_to_validation_error(self):
+        self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0)).save()
+        serializer = ScheduleSerializer(data={
+            'title': 'Algèbre', 'subject': self.subject.id, 'teacher': self.teachers[1].id,
+            'room': self.rooms[0].id, 'program': self.program.id, 'day_of_week': 0,
+            'start_time': '09:00', 'end_time': '11:00', 'week_start': '2024-09-02',
+            'week_end': '2024-09-06',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        
+        with self.assertRaises(serializers.ValidationError) as raised:
+            serializer.save()
+        
+        self.assertEqual(raised.exception.detail, ['Conflit de salle: la salle est déjà occupée sur ce créneau.'])
+    
+    def test_migration_fills_ranges_of_existing_sessions(self):
+        schedule = self.make_schedule(self.rooms[0], self.teachers[0], time(8, 0), time(10, 0), day_of_week=1)
+        schedule.save()
+        Schedule.objects.filter(pk=schedule.pk).update(time_range=None, date_range=None)
+        
+        ranges_migration.fill_ranges(apps, None)
+        
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.time_range, NumericRange(1440 + 480, 1440 + 600))
+        self.assertEqual(schedule.date_range, DateRange(date(2024, 9, 2), date(2024, 9, 7)))
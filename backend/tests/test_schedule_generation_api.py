@@ -0,0 +1,115 @@
+"""
+Tests des API de génération automatique (ScheduleGenerator et allocateur de generation_views)
+"""
+
+import os
+import django
+from django.test import TestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from rest_framework.test import APIClient
+from authentication.models import User
+from core.models import Department, Program, Room, Subject, Teacher
+from schedule.models import Schedule
+
+GENERATE_URL = '/api/core/schedule/generate/'
+TIMETABLE_URL = '/api/generate/timetable/'
+
+
+class GenerateAutomaticScheduleTest(TestCase):
+    """Tests de POST api/core/schedule/generate/"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture',
+            semester=1, hours_per_week=3
+        )
+        subject.program.add(cls.program)
+        cls.user = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        teacher = Teacher.objects.create(
+            user=User.objects.create(email='prof@test.local', username='prof', role='teacher'),
+            employee_id='E1', specialization='Mathématiques'
+        )
+        teacher.subjects.add(subject)
+        Room.objects.create(name='Salle A', code='SA', room_type='lecture', capacity=40, department=department)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def generate(self, **options):
+        payload = {'week_start': '2024-09-02', 'week_end': '2024-09-06', 'program_ids': [self.program.id]}
+        payload.update(options)
+        return self.client.post(GENERATE_URL, payload, format='json')
+    
+    def test_dry_run_writes_nothing(self):
+        response = self.generate(dry_run=True)
+        
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['data']['diff']['added']), 2)
+        self.assertFalse(Schedule.objects.exists())
+    
+    def test_replace_existing_reports_only_added_sessions(self):
+        first = self.generate(replace_existing=True)
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertEqual(first.data['data']['created_schedules'], 2)
+        
+        # Même proposition: rien à ajouter, rien à retirer
+        second = self.generate(replace_existing=True)
+        
+        self.assertEqual(second.status_code, 201, second.data)
+        self.assertEqual(second.data['data']['created_schedules'], 0)
+        self.assertEqual(second.data['data']['deleted_schedules'], 0)
+        self.assertEqual(second.data['data']['diff']['unchanged'], 2)
+        self.assertEqual(Schedule.objects.filter(is_active=True).count(), 2)
+
+
+class GenerateTimetableTest(TestCase):
+    """Tests de POST api/generate/timetable/ (allocateur déterministe)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(
+            name='Licence', code='L1INFO', department=cls.department, level='L1', capacity=30
+        )
+        cls.subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=cls.department, subject_type='lecture',
+            semester=1, hours_per_week=4
+        )
+        cls.subject.program.add(cls.program)
+        cls.user = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        teacher = Teacher.objects.create(
+            user=User.objects.create(email='prof@test.local', username='prof', role='teacher'),
+            employee_id='E1', specialization='Mathématiques'
+        )
+        teacher.subjects.add(cls.subject)
+        Room.objects.create(name='Petite salle', code='PS', room_type='lecture', capacity=20, department=cls.department)
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_subject_is_skipped_without_a_room_for_the_program(self):
+        response = self.client.post(TIMETABLE_URL, {'program_ids': [self.program.id]}, format='json')
+        
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['conflicts'], ['Aucune salle disponible pour Algèbre (30 places requises)'])
+        self.assertFalse(Schedule.objects.exists())
+    
+    def test_sessions_use_the_smallest_room_that_fits(self):
+        Room.objects.create(name='Amphi', code='AM', room_type='amphitheater', capacity=200, department=self.department)
+        Room.objects.create(name='Salle B', code='SB', room_type='lecture', capacity=40, department=self.department)
+        
+        response = self.client.post(TIMETABLE_URL, {'program_ids': [self.program.id]}, format='json')
+        
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['conflicts'], [])
+        self.assertEqual(set(Schedule.objects.values_list('room__code', flat=True)), {'SB'})
+        self.assertEqual(Schedule.objects.count(), 2)
@@ -0,0 +1,150 @@
+"""
+Tests de l'index d'occupation hebdomadaire et de l'écart de génération
+"""
+
+import os
+import django
+from django.test import SimpleTestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+import heapq
+from collections import defaultdict
+from datetime import date, time
+from unittest import mock
+from core.models import Program, Room, Subject, Teacher
+from core.schedule_generator import ScheduleGenerator
+from schedule.models import Schedule
+from schedule.occupancy import OccupancyIndex
+
+TIME_SLOTS = [
+    (time(8, 0), time(9, 30)),
+    (time(9, 30), time(11, 0)),
+    (time(11, 0), time(12, 30)),
+]
+
+
+class OccupancyIndexTest(SimpleTestCase):
+    """Tests des masques d'occupation par enseignant et par salle"""
+    
+    def setUp(self):
+        self.index = OccupancyIndex([1, 2], TIME_SLOTS)
+    
+    def test_added_session_blocks_teacher_and_room_on_same_day_only(self):
+        self.index.add(10, 100, 1, time(9, 30), time(11, 0))
+        
+        self.assertFalse(self.index.teacher_free(10, 1, time(9, 30), time(11, 0)))
+        self.assertFalse(self.index.room_free(100, 1, time(9, 30), time(11, 0)))
+        self.assertTrue(self.index.teacher_free(10, 1, time(8, 0), time(9, 30)))
+        self.assertTrue(self.index.teacher_free(10, 2, time(9, 30), time(11, 0)))
+        self.assertTrue(self.index.teacher_free(11, 1, time(9, 30), time(11, 0)))
+    
+    def test_off_grid_session_blocks_every_overlapping_slot(self):
+        self.index.add(10, 100, 1, time(9, 0), time(10, 0))
+        
+        self.assertFalse(self.index.room_free(100, 1, time(8, 0), time(9, 30)))
+        self.assertFalse(self.index.room_free(100, 1, time(9, 30), time(11, 0)))
+        self.assertTrue(self.index.room_free(100, 1, time(11, 0), time(12, 30)))
+    
+    def test_daily_hours_accumulate(self):
+        self.index.add(10, 100, 1, time(8, 0), time(9, 30))
+        self.index.add(10, 101, 1, time(11, 0), time(12, 30))
+        
+        self.assertEqual(self.index.daily_hours(10, 1), 3)
+        self.assertEqual(self.index.daily_hours(10, 2), 0)
+
+
+def make_schedule(schedule_id, subject_id, teacher_id, room_id, day, start_time, end_time):
+    """Construire une séance non enregistrée pour les tests"""
+    return Schedule(
+        id=schedule_id, program_id=1, subject_id=subject_id, teacher_id=teacher_id, room_id=room_id,
+        day_of_week=day, start_time=start_time, end_time=end_time
+    )
+
+
+class ScheduleDiffTest(SimpleTestCase):
+    """Tests de l'écart entre séances existantes et proposées"""
+    
+    def test_diff_classifies_unchanged_moved_added_and_removed(self):
+        existing = [
+            make_schedule(1, 10, 100, 1000, 1, time(8, 0), time(9, 30)),
+            make_schedule(2, 10, 100, 1000, 2, time(8, 0), time(9, 30)),
+            make_schedule(3, 11, 101, 1001, 1, time(8, 0), time(9, 30)),
+        ]
+        proposed = [
+            make_schedule(None, 10, 100, 1000, 2, time(8, 0), time(9, 30)),
+            make_schedule(None, 10, 100, 1000, 3, time(9, 30), time(11, 0)),
+            make_schedule(None, 12, 102, 1002, 1, time(8, 0), time(9, 30)),
+        ]
+        
+        diff = ScheduleGenerator().diff_schedules(existing, proposed)
+        
+        self.assertEqual([s.id for s in diff['unchanged']], [2])
+        self.assertEqual([(old.id, new.day_of_week) for old, new in diff['moved']], [(1, 3)])
+        self.assertEqual([s.subject_id for s in diff['added']], [12])
+        self.assertEqual([s.id for s in diff['removed']], [3])
+
+
+class PlaceSessionsOrderTest(SimpleTestCase):
+    """Tests de l'ordre de placement (demandes les plus contraintes d'abord)"""
+    
+    def setUp(self):
+        self.generator = ScheduleGenerator()
+        self.generator.days = [1, 2]
+        self.generator.time_slots = TIME_SLOTS
+        self.generator.max_hours_per_day = 3
+        self.generator.occupancy = OccupancyIndex(self.generator.days, TIME_SLOTS)
+        self.generator.occupancy.week_start = self.generator.occupancy.week_end = date(2024, 9, 2)
+        
+        lecture_rooms = [Room(id=i, name=f'Salle {i}', room_type='lecture', department_id=1) for i in (1, 2)]
+        lab = Room(id=3, name='Labo', room_type='lab', department_id=1)
+        self.generator._rooms_by_department = defaultdict(list, {1: lecture_rooms + [lab]})
+        teachers = [Teacher(id=i) for i in (1, 2, 3)]
+        program = Program(id=1, name='Licence')
+        
+        def request(subject_id, subject_type, teachers, rooms, sessions):
+            subject = Subject(id=subject_id, name=f'Matière {subject_id}', subject_type=subject_type,
+                              department_id=1)
+            return {'program': program, 'subject': subject, 'teachers': teachers, 'rooms': rooms,
+                    'sessions': sessions, 'remaining': sessions}
+        
+        # Possibilités par séance: 6 pour le TP, 8 pour le premier cours, 6 pour le second
+        self.requests = [
+            request(10, 'lecture', teachers[:2], lecture_rooms, 3),
+            request(11, 'lab', teachers[:1], [lab], 2),
+            request(12, 'lecture', teachers[2:], lecture_rooms, 2),
+        ]
+        self.results = {program.id: {'generated_schedules': [], 'conflicts': [], 'program': program.name}}
+    
+    def place(self):
+        scores = []
+        
+        def checked_push(queue, entry):
+            # La note incrémentale doit égaler un recomptage complet
+            score, _, index, _ = entry
+            request = self.requests[index]
+            scores.append(index)
+            self.assertEqual(
+                score, self.generator._candidate_count(request, date(2024, 9, 2), date(2024, 9, 2)) / request['remaining']
+            )
+            real_heappush(queue, entry)
+        
+        real_heappush = heapq.heappush
+        with mock.patch.object(self.generator, '_session_requests', return_value=(self.requests, self.results)), \
+                mock.patch('core.schedule_generator.heapq.heappush', side_effect=checked_push), \
+                mock.patch('builtins.print'):
+            generated, _ = self.generator._place_sessions(
+                Program.objects.none(), date(2024, 9, 2), date(2024, 9, 2), None
+            )
+        return generated, scores
+    
+    def test_most_constrained_request_is_placed_first(self):
+        generated, scores = self.place()
+        
+        self.assertEqual(generated[0].subject_id, 11)
+        self.assertEqual(len(generated), 7)
+        self.assertEqual(self.results[1]['conflicts'], [])
+        self.assertGreater(len(scores), len(self.requests))
+
@@ -0,0 +1,163 @@
+"""
+Tests des utilitaires de planning (conflits, matrice de disponibilité des salles)
+"""
+
+import os
+import django
+from django.test import SimpleTestCase, TestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from datetime import date, time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from authentication.models import User
+from core.models import Department, Program, Room, Subject, Teacher
+from schedule.models import Schedule
+from schedule.utils import _free_intervals, _grid_time_slots, check_conflicts, room_availability_matrix
+
+
+class FreeIntervalsTest(SimpleTestCase):
+    """Tests de l'encodage des créneaux libres en intervalles"""
+    
+    def setUp(self):
+        self.time_slots = _grid_time_slots(time(8, 0), time(10, 0), 30)
+    
+    def test_runs_of_free_slots_become_intervals(self):
+        # Créneaux 0, 1 et 3 libres: 8h-9h et 9h30-10h
+        self.assertEqual(_free_intervals(0b1011, self.time_slots), [['08:00', '09:00'], ['09:30', '10:00']])
+    
+    def test_empty_and_full_masks(self):
+        self.assertEqual(_free_intervals(0, self.time_slots), [])
+        self.assertEqual(_free_intervals(0b1111, self.time_slots), [['08:00', '10:00']])
+
+
+class RoomAvailabilityMatrixTest(TestCase):
+    """Tests de la matrice salles × jours × créneaux"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture', semester=1
+        )
+        teacher = Teacher.objects.create(
+            user=User.objects.create(email='prof@test.local', username='prof', role='teacher'),
+            employee_id='E1', specialization='Mathématiques'
+        )
+        cls.room = Room.objects.create(name='Salle A', code='SA', room_type='lecture', capacity=40,
+                                       department=department)
+        Schedule.objects.create(
+            title='Algèbre', subject=subject, teacher=teacher, room=cls.room, program=program,
+            day_of_week=1, start_time=time(9, 0), end_time=time(10, 0),
+            week_start=date(2024, 9, 2), week_end=date(2024, 9, 6)
+        )
+    
+    def test_fine_grid_masks_are_exact_hex_strings(self):
+        # Pas de 5 minutes: 144 créneaux par jour, au-delà des 53 bits d'un nombre JSON
+        matrix = room_availability_matrix('2024-09-02', '2024-09-06', step_minutes=5)
+        
+        slots = len(matrix['slots'])
+        self.assertEqual(slots, 144)
+        free = matrix['rooms'][0]['free']
+        self.assertEqual(free[0], hex((1 << slots) - 1))
+        # Mardi 9h-10h occupé: créneaux 12 à 23
+        tuesday = int(free[1], 16)
+        self.assertEqual(tuesday, ((1 << slots) - 1) & ~(((1 << 12) - 1) << 12))
+    
+    def test_intervals_format(self):
+        matrix = room_availability_matrix(date(2024, 9, 2), date(2024, 9, 6), as_intervals=True)
+        
+        self.assertEqual(matrix['rooms'][0]['free'][1], [['08:00', '09:00'], ['10:00', '20:00']])
+        self.assertEqual(matrix['rooms'][0]['free'][0], [['08:00', '20:00']])
+
+
+class ConflictCheckEndpointTest(TestCase):
+    """Tests des vérifications de conflits (séance seule et lot)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        cls.subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture', semester=1
+        )
+        cls.teachers = [
+            Teacher.objects.create(
+                user=User.objects.create(email=f'prof{i}@test.local', username=f'prof{i}', role='teacher'),
+                employee_id=f'E{i}', specialization='Mathématiques'
+            )
+            for i in range(2)
+        ]
+        cls.rooms = [
+            Room.objects.create(name=f'Salle {i}', code=f'S{i}', room_type='lecture', capacity=40,
+                                department=department)
+            for i in range(2)
+        ]
+        cls.user = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        cls.existing = Schedule.objects.create(
+            title='Algèbre', subject=cls.subject, teacher=cls.teachers[0], room=cls.rooms[0],
+            program=cls.program, day_of_week=0, start_time=time(8, 0), end_time=time(10, 0),
+            week_start=date(2024, 9, 2), week_end=date(2024, 9, 6)
+        )
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def proposal(self, teacher, room, start, end, **extra):
+        return {
+            'teacher': teacher.id, 'room': room.id, 'day_of_week': 0, 'start_time': start, 'end_time': end,
+            'week_start': '2024-09-02', 'week_end': '2024-09-06', **extra
+        }
+    
+    def test_single_check_filters_on_time_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            conflicts = check_conflicts(self.teachers[1].id, self.rooms[0].id, 0, '09:00', '11:00',
+                                        '2024-09-02', '2024-09-06')
+        
+        self.assertEqual([c['type'] for c in conflicts], ['room'])
+        self.assertIn('"time_range" &&', queries.captured_queries[0]['sql'])
+        self.assertEqual(check_conflicts(self.teachers[1].id, self.rooms[0].id, 0, '10:00', '12:00',
+                                         '2024-09-02', '2024-09-06'), [])
+    
+    def test_single_endpoint(self):
+        response = self.client.post('/api/schedule/schedules/check-conflicts/',
+                                    self.proposal(self.teachers[0], self.rooms[1], '09:00', '11:00'),
+                                    format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['has_conflicts'])
+        self.assertEqual(response.data['conflicts'][0]['schedule']['id'], self.existing.id)
+        
+        # La séance modifiée ne se gêne pas elle-même
+        response = self.client.post('/api/schedule/schedules/check-conflicts/',
+                                    self.proposal(self.teachers[0], self.rooms[0], '09:00', '11:00',
+                                                  schedule_id=self.existing.id),
+                                    format='json')
+        self.assertFalse(response.data['has_conflicts'])
+    
+    def test_batch_reports_conflicts_between_proposals(self):
+        response = self.client.post('/api/schedule/schedules/check-conflicts/batch/', {'sessions': [
+            self.proposal(self.teachers[1], self.rooms[1], '10:00', '12:00'),
+            self.proposal(self.teachers[1], self.rooms[0], '11:00', '13:00'),
+            self.proposal(self.teachers[0], self.rooms[1], '14:00', '16:00'),
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([(c['type'], c['proposal']) for c in results[0]['conflicts']], [('teacher', 1)])
+        self.assertEqual([(c['type'], c['proposal']) for c in results[1]['conflicts']], [('teacher', 0)])
+        self.assertFalse(results[2]['has_conflicts'])
+    
+    def test_batch_rejects_missing_fields(self):
+        response = self.client.post('/api/schedule/schedules/check-conflicts/batch/', {'sessions': [
+            {'teacher': self.teachers[0].id}
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+
@@ -0,0 +1,42 @@
+"""
+Tests du générateur d'universités synthétiques utilisé par les benchmarks
+"""
+
+import os
+import django
+from django.test import TestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from core.models import Program, Room, Subject, Teacher, Student, TimeSlot
+from benchmarks.synthetic import SyntheticUniversity
+
+
+class SyntheticUniversityTest(TestCase):
+    """Tests de la génération de données synthétiques"""
+    
+    def test_creates_requested_sizes(self):
+        university = SyntheticUniversity(
+            'small', departments=1, programs_per_department=2, subjects_per_program=3,
+            teachers_per_department=4, rooms_per_department=3, students_per_program=5
+        )
+        
+        counts = university.create()
+        
+        self.assertEqual(counts['programs'], 2)
+        self.assertEqual(Program.objects.count(), 2)
+        self.assertEqual(Subject.objects.count(), 6)
+        self.assertEqual(Teacher.objects.count(), 4)
+        self.assertEqual(Room.objects.count(), 3)
+        self.assertEqual(Student.objects.count(), 10)
+        self.assertEqual(TimeSlot.objects.count(), counts['time_slots'])
+        self.assertEqual(set(Student.objects.values_list('program_id', flat=True)),
+                         {program.id for program in university.programs})
+        # Chaque matière a au moins un enseignant
+        self.assertFalse(Subject.objects.filter(teachers__isnull=True).exists())
+    
+    def test_unknown_size(self):
+        with self.assertRaises(ValueError):
+            SyntheticUniversity('huge')
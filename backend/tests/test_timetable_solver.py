@@ -0,0 +1,761 @@
+"""
+Tests du solveur d'emploi du temps (modèle CP-SAT et décomposition)
+"""
+
+import os
+import threading
+import django
+from django.test import SimpleTestCase, TestCase, override_settings
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from unittest import mock
+from ortools.sat.python import cp_model
+from authentication.models import User
+from core.feasibility import analyze_feasibility
+from core.models import Department, Program, Room, Subject, Teacher, TeacherAvailability, TimeSlot, Schedule
+from core.greedy_construction import greedy_construction
+from core.problem_instance import ProblemInstance
+from core.room_matching import match_rooms
+from core.solution_cache import problem_fingerprint
+from core.timetable_repair import disrupted_sessions, repair_timetable
+from core.timetable_solver import (
+    TimetableSolver, TimetableModel, split_into_components, solve_subproblem, solver_budget,
+    session_length, explain_infeasibility, solve_portfolio, SUBJECT_ROOM_TYPES,
+    SOLVER_MAX_TIME_SECONDS, SOLVER_TIME_LIMIT_CAP, SOLVER_WORKERS_CAP, SOLVER_RELATIVE_GAP_CAP
+)
+from schedule.models import Absence
+
+
+def make_assignment(assignment_id, teacher_id, rooms, slots, sessions_needed=1):
+    """Construire une affectation sérialisable pour les tests"""
+    return {
+        'id': assignment_id,
+        'teachers': [teacher_id],
+        'sessions_needed': sessions_needed,
+        'hours_per_session': 2,
+        'rooms': [(room_id, 1) for room_id in rooms],
+        'slots': [(slot_id, 1) for slot_id in slots],
+    }
+
+
+class SplitIntoComponentsTest(SimpleTestCase):
+    """Tests de la décomposition en sous-problèmes indépendants"""
+
+    def test_shared_teacher_or_room_links_assignments(self):
+        assignments = [
+            make_assignment(1, teacher_id=10, rooms=[100], slots=[1]),
+            make_assignment(2, teacher_id=10, rooms=[101], slots=[1]),
+            make_assignment(3, teacher_id=11, rooms=[101], slots=[1]),
+            make_assignment(4, teacher_id=12, rooms=[102], slots=[1]),
+        ]
+
+        components = split_into_components(assignments)
+
+        self.assertEqual(len(components), 2)
+        self.assertEqual(sorted(a['id'] for a in components[0]), [1, 2, 3])
+        self.assertEqual([a['id'] for a in components[1]], [4])
+
+    def test_empty_input(self):
+        self.assertEqual(split_into_components([]), [])
+
+
+class TimetableModelTest(SimpleTestCase):
+    """Tests du modèle CP-SAT construit sur un sous-problème"""
+
+    def test_teacher_cannot_teach_twice_in_same_slot(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100, 101], slots=[1, 2]),
+                make_assignment(2, teacher_id=10, rooms=[100, 101], slots=[1, 2]),
+            ],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+        }
+
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+
+        self.assertIn(result['status'], (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.assertEqual(len(result['selected']), 2)
+        used_slots = [slot_id for _, _, slot_id, _ in result['selected']]
+        self.assertEqual(sorted(used_slots), [1, 2])
+
+    def test_only_feasible_tuples_get_variables(self):
+        subproblem = {
+            'assignments': [make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2, 3])],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 2,
+        }
+
+        model = TimetableModel(subproblem).build()
+
+        self.assertEqual(len(model.schedule_vars), 6)
+
+    def test_fixed_assignment_keeps_published_placement(self):
+        fixed = make_assignment(1, teacher_id=10, rooms=[100, 101], slots=[1, 2])
+        fixed['hint'] = [(101, 2, 0)]
+        fixed['fixed'] = True
+        subproblem = {
+            'assignments': [fixed, make_assignment(2, teacher_id=10, rooms=[100, 101], slots=[1, 2])],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+        }
+
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+
+        self.assertIn((1, 101, 2, 0), result['selected'])
+        # Même enseignant: l'autre affectation doit prendre l'autre créneau
+        other = [key for key in result['selected'] if key[0] == 2]
+        self.assertEqual(len(other), 1)
+        self.assertEqual(other[0][2], 1)
+
+
+class TeacherChoiceTest(SimpleTestCase):
+    """Tests du choix de l'enseignant par le solveur"""
+    
+    def test_one_teacher_is_chosen_and_sessions_are_not_duplicated(self):
+        assignment = make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2, 3], sessions_needed=2)
+        assignment['teachers'] = [10, 11]
+        # L'enseignant 10 n'est disponible qu'au créneau 3
+        assignment['unavailable'] = {10: [1, 2]}
+        subproblem = {
+            'assignments': [assignment],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        # Une seule affectation: 2 séances, pas 2 par enseignant qualifié
+        self.assertEqual(len(result['selected']), 2)
+        # Deux séances ne tiennent pas sur le seul créneau libre de l'enseignant 10
+        self.assertEqual(result['teachers'], {1: 11})
+    
+    def test_teacher_load_limits_the_choice(self):
+        assignment = make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2], sessions_needed=2)
+        assignment['teachers'] = [10, 11]
+        subproblem = {
+            'assignments': [assignment],
+            'teacher_max_hours': {10: 2, 11: 20},
+            'num_weeks': 1,
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        # 2 séances de 2h dépassent la charge de l'enseignant 10
+        self.assertEqual(result['teachers'], {1: 11})
+
+
+class TwoPhaseTest(SimpleTestCase):
+    """Tests du mode deux phases (créneaux puis couplage des salles)"""
+    
+    def test_matching_prefers_priority_and_reports_deficit(self):
+        rooms, deficient = match_rooms(
+            {'a': [100, 101], 'b': [100], 'c': [100]},
+            {100: 1, 101: 5}
+        )
+        
+        self.assertEqual(len(rooms), 2)
+        self.assertEqual(rooms['a'], 101)
+        # 'b' et 'c' se disputent la seule salle 100
+        self.assertEqual(deficient, [frozenset({100})])
+    
+    def test_rooms_are_assigned_after_slot_model(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2]),
+                make_assignment(2, teacher_id=11, rooms=[100, 101], slots=[1]),
+                make_assignment(3, teacher_id=12, rooms=[100, 101], slots=[1, 2]),
+            ],
+            'teacher_max_hours': {10: 20, 11: 20, 12: 20},
+            'num_weeks': 1,
+            'two_phase': True,
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        self.assertEqual(result['unmatched_sessions'], 0)
+        self.assertEqual(len(result['selected']), 3)
+        occupied = [(room_id, slot_id) for _, room_id, slot_id, _ in result['selected']]
+        self.assertEqual(len(set(occupied)), 3)
+        self.assertNotIn(None, [room_id for room_id, _ in occupied])
+    
+    def test_unmatched_sessions_fall_back_to_the_full_model(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2]),
+                make_assignment(2, teacher_id=11, rooms=[100], slots=[1, 2]),
+            ],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+            'two_phase': True,
+        }
+        
+        # Couplage qui échoue à chaque tour: les coupes n'aboutissent jamais
+        with mock.patch('core.timetable_solver.assign_rooms',
+                        side_effect=lambda _, selected: (selected[:1], 1, [[100]])):
+            result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        self.assertIn(result['status'], (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.assertTrue(result['two_phase_fallback'])
+        self.assertEqual(result['unmatched_sessions'], 0)
+        self.assertEqual(sorted(slot_id for _, room_id, slot_id, _ in result['selected'] if room_id == 100), [1, 2])
+
+
+class IntervalModelTest(SimpleTestCase):
+    """Tests du modèle à intervalles (séances de durée variable)"""
+    
+    def test_session_length_by_subject_type(self):
+        self.assertEqual(session_length('lab', 3), (180, 1))
+        self.assertEqual(session_length('lecture', 3), (90, 2))
+        self.assertEqual(session_length('exam', 2), (120, 1))
+        # La séance ne dépasse pas le volume hebdomadaire
+        self.assertEqual(session_length('lab', 2), (120, 1))
+    
+    def test_sessions_of_a_program_do_not_overlap(self):
+        tp = make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2])
+        tp.update({'programs': [7], 'session_minutes': 180})
+        lecture = make_assignment(2, teacher_id=11, rooms=[101], slots=[1, 2])
+        lecture.update({'programs': [7], 'session_minutes': 90})
+        subproblem = {
+            'assignments': [tp, lecture],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+            'interval_model': True,
+            # Lundi 8h-10h et 10h-13h: une seule plage de 5h
+            'slot_times': {1: (0, 480, 600), 2: (0, 600, 780)},
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        self.assertIn(result['status'], (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        sessions = sorted(times for _, _, times, _ in result['selected'])
+        self.assertEqual(len(sessions), 2)
+        (_, first_start, first_end), (_, second_start, second_end) = sessions
+        self.assertLessEqual(first_end, second_start)
+        self.assertEqual({first_end - first_start, second_end - second_start}, {90, 180})
+        # Toutes les séances tiennent dans la plage de la matinée
+        self.assertGreaterEqual(first_start, 480)
+        self.assertLessEqual(second_end, 780)
+    
+    def test_unavailability_shared_by_assignments_is_blocked_once(self):
+        assignments = []
+        for assignment_id in (1, 2):
+            assignment = make_assignment(assignment_id, teacher_id=10, rooms=[100 + assignment_id], slots=[1, 2])
+            assignment.update({'programs': [assignment_id], 'session_minutes': 90, 'unavailable': {10: [2]}})
+            assignments.append(assignment)
+        subproblem = {
+            'assignments': assignments,
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+            'interval_model': True,
+            # Lundi 8h-12h, puis 14h-16h indisponible pour l'enseignant
+            'slot_times': {1: (0, 480, 720), 2: (0, 840, 960)},
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        self.assertIn(result['status'], (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.assertEqual(len(result['selected']), 2)
+        for _, _, (_, start, end), _ in result['selected']:
+            self.assertLessEqual(end, 840)
+    
+    def test_assignment_without_long_enough_window_is_skipped(self):
+        long_session = make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2])
+        long_session.update({'programs': [7], 'session_minutes': 240})
+        lecture = make_assignment(2, teacher_id=11, rooms=[101], slots=[1, 2])
+        lecture.update({'programs': [8], 'session_minutes': 90})
+        subproblem = {
+            'assignments': [long_session, lecture],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+            'interval_model': True,
+            'slot_times': {1: (0, 480, 600), 2: (1, 480, 600)},
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        
+        self.assertEqual(result['status'], cp_model.OPTIMAL)
+        self.assertEqual(result['skipped'], [1])
+        self.assertEqual([assignment_id for assignment_id, _, _, _ in result['selected']], [2])
+    
+    def test_every_mode_plans_the_same_number_of_sessions(self):
+        # sessions_needed est un total sur les semaines modélisées dans tous les modes
+        modes = {
+            'grid': {},
+            'two_phase': {'two_phase': True},
+            'interval': {'interval_model': True},
+            'template': {'template_week': True},
+        }
+        sessions = {}
+        for mode, options in modes.items():
+            instance = make_instance()
+            instance.end_date = date(2024, 9, 13)
+            # Examen de 4h par semaine: séances de 2h dans tous les modes
+            instance.subject_type = ['exam']
+            solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 13), [1], instance=instance, **options)
+            solver._collect_data()
+            solver._create_constraint_model()
+            
+            solution = solver._solve_model()
+            
+            replicas = solver.num_weeks if solver.template_week else 1
+            sessions[mode] = len(solution) * replicas
+        
+        self.assertEqual(sessions, dict.fromkeys(modes, 4))
+    
+    def test_programs_link_components(self):
+        first = make_assignment(1, teacher_id=10, rooms=[100], slots=[1])
+        second = make_assignment(2, teacher_id=11, rooms=[101], slots=[1])
+        first['programs'] = second['programs'] = [7]
+        
+        self.assertEqual(len(split_into_components([first, second])), 1)
+
+
+class SolverBudgetTest(SimpleTestCase):
+    """Tests du budget du solveur fourni par les utilisateurs"""
+    
+    def test_defaults_when_not_provided(self):
+        max_time, workers, gap = solver_budget()
+        
+        self.assertEqual(max_time, SOLVER_MAX_TIME_SECONDS)
+        self.assertGreaterEqual(workers, 1)
+        self.assertGreaterEqual(gap, 0)
+    
+    def test_values_are_capped(self):
+        max_time, workers, gap = solver_budget(10 ** 6, 512, 3)
+        
+        self.assertEqual(max_time, SOLVER_TIME_LIMIT_CAP)
+        self.assertEqual(workers, SOLVER_WORKERS_CAP)
+        self.assertEqual(gap, SOLVER_RELATIVE_GAP_CAP)
+    
+    def test_non_finite_values_are_rejected(self):
+        for max_time, gap in ((float('nan'), None), ('inf', None), (None, float('nan'))):
+            with self.subTest(max_time=max_time, gap=gap), self.assertRaises(ValueError):
+                solver_budget(max_time, None, gap)
+    
+    def test_gap_target_reports_gap(self):
+        subproblem = {
+            'assignments': [make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2])],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1,
+                                  target_gap=0.5)
+        
+        self.assertEqual(len(result['selected']), 1)
+        self.assertLessEqual(result['gap'], 0.5)
+
+
+def make_instance():
+    """Petite instance: 2 salles, 3 créneaux, 1 enseignant indisponible au créneau 2"""
+    return ProblemInstance(
+        date(2024, 9, 2), date(2024, 9, 6), [1],
+        rooms=[(100, 40, 'lecture', 2), (101, 10, 'lecture', 1)],
+        slots=[
+            (1, 0, time(8, 0), time(10, 0), 1),
+            (2, 0, time(10, 0), time(12, 0), 1),
+            (3, 1, time(8, 0), time(10, 0), 1),
+        ],
+        teachers=[(10, 'Ada Lovelace', 20, 0b101)],
+        subjects=[(5, 'Algèbre', 'lecture', 4, [1], [0])],
+        student_counts={1: 30},
+    )
+
+
+class ProblemInstanceTest(SimpleTestCase):
+    """Tests de l'instance compacte utilisée par le solveur"""
+    
+    def test_round_trip_through_json(self):
+        instance = make_instance()
+        
+        restored = ProblemInstance.from_dict(instance.to_dict())
+        
+        self.assertEqual(restored.to_dict(), instance.to_dict())
+        self.assertEqual(restored.slot_index[3], 2)
+        self.assertEqual(restored.slot(1).start_time, time(10, 0))
+    
+    def test_room_types_follow_model_choices(self):
+        room_types = {value for value, _ in Room.ROOM_TYPE_CHOICES}
+        
+        self.assertEqual(set(SUBJECT_ROOM_TYPES), {value for value, _ in Subject.SUBJECT_TYPE_CHOICES})
+        for allowed in SUBJECT_ROOM_TYPES.values():
+            self.assertLessEqual(set(allowed), room_types)
+    
+    def test_lab_subject_only_gets_lab_rooms(self):
+        instance = make_instance()
+        instance.room_type = ['amphitheater', 'lab']
+        instance.room_capacity = [200, 40]
+        instance.subject_type = ['lab']
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=instance)
+        
+        solver._collect_data()
+        solver._create_constraint_model()
+        
+        self.assertEqual(solver.subproblems[0]['assignments'][0]['rooms'], [(101, 1)])
+    
+    def test_availability_bitmask(self):
+        self.assertEqual(make_instance().available_slots(0), [0, 2])
+    
+    def test_solver_builds_from_instance_without_database(self):
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=make_instance())
+        
+        solver._collect_data()
+        solver._create_constraint_model()
+        
+        assignment = solver.subproblems[0]['assignments'][0]
+        # Salle 101 trop petite, créneau 2 bloqué par l'indisponibilité
+        self.assertEqual(assignment['rooms'], [(100, 2)])
+        self.assertEqual([slot_id for slot_id, _ in assignment['slots']], [1, 3])
+        self.assertEqual(assignment['sessions_needed'], 2)
+
+
+class ProblemInstanceLoadTest(TestCase):
+    """Tests du chargement de l'instance depuis les modèles"""
+    
+    def test_load_reads_live_models(self):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        other_program = Program.objects.create(name='Master', code='M1INFO', department=department, level='M1')
+        subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture', semester=1
+        )
+        subject.program.set([program, other_program])
+        teacher = Teacher.objects.create(
+            user=User.objects.create(email='ada@test.local', username='ada', first_name='Ada',
+                                     last_name='Lovelace', role='teacher'),
+            employee_id='E1', specialization='Mathématiques'
+        )
+        teacher.subjects.add(subject)
+        TeacherAvailability.objects.create(
+            teacher=teacher, day_of_week=0, start_time=time(10, 0), end_time=time(11, 0), is_available=False
+        )
+        room = Room.objects.create(name='Salle A', code='SA', room_type='lecture', capacity=40,
+                                   department=department)
+        slots = [
+            TimeSlot.objects.create(day_of_week=0, start_time=start, end_time=end, name=f'Créneau {i}')
+            for i, (start, end) in enumerate([(time(8, 0), time(10, 0)), (time(10, 0), time(12, 0))])
+        ]
+        
+        instance = ProblemInstance.load([program.id], date(2024, 9, 2), date(2024, 9, 6))
+        
+        self.assertEqual(instance.subject_ids, [subject.id])
+        self.assertEqual(instance.subject_programs, [[program.id]])
+        self.assertEqual(instance.room_ids, [room.id])
+        self.assertEqual(instance.slot_ids, [slot.id for slot in slots])
+        self.assertEqual(instance.teacher_names, ['Ada Lovelace'])
+        # Indisponible le lundi de 10h à 11h: seul le premier créneau reste ouvert
+        self.assertEqual(instance.available_slots(0), [0])
+
+
+class TimetableRepairTest(TestCase):
+    """Tests de la réparation locale autour des séances perturbées"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        cls.subject = Subject.objects.create(
+            name='Algèbre', code='ALG1', department=department, subject_type='lecture', semester=1
+        )
+        cls.user = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        cls.teacher = Teacher.objects.create(
+            user=User.objects.create(email='prof@test.local', username='prof', role='teacher'),
+            employee_id='E1', specialization='Mathématiques'
+        )
+        cls.room = Room.objects.create(name='Salle A', code='SA', room_type='lecture', capacity=40,
+                                       department=department)
+        cls.slots = [
+            TimeSlot.objects.create(day_of_week=0, start_time=start, end_time=end, name=f'Créneau {i}')
+            for i, (start, end) in enumerate([(time(8, 0), time(10, 0)), (time(10, 0), time(12, 0))])
+        ]
+    
+    def make_session(self, session_date, slot):
+        session = Schedule.objects.create(
+            title='Algèbre', subject=self.subject, teacher=self.teacher, room=self.room, time_slot=slot,
+            start_date=session_date, end_date=session_date, duration_minutes=120
+        )
+        session.programs.add(self.program)
+        return session
+    
+    def test_disrupted_session_is_moved_to_a_free_slot(self):
+        session = self.make_session(date(2024, 9, 2), self.slots[0])
+        Absence.objects.create(
+            absence_type='teacher', reason='sick', teacher=self.teacher, is_approved=True, created_by=self.user,
+            start_datetime=timezone.make_aware(datetime(2024, 9, 2, 8, 0)),
+            end_datetime=timezone.make_aware(datetime(2024, 9, 2, 10, 0))
+        )
+        
+        result = repair_timetable(self.user.id, teacher_id=self.teacher.id,
+                                  start_date=date(2024, 9, 2), end_date=date(2024, 9, 6))
+        
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['unresolved'], [])
+        session.refresh_from_db()
+        self.assertEqual(session.time_slot, self.slots[1])
+        self.assertEqual(session.start_date, date(2024, 9, 2))
+    
+    def test_disrupted_sessions_default_to_the_current_week(self):
+        monday = timezone.localdate() - timedelta(days=timezone.localdate().weekday())
+        current = self.make_session(monday, self.slots[0])
+        self.make_session(monday - timedelta(days=7), self.slots[0])
+        self.make_session(monday + timedelta(days=7), self.slots[0])
+        
+        self.assertEqual(disrupted_sessions(teacher_id=self.teacher.id), [current.id])
+
+
+class ProgressReportTest(SimpleTestCase):
+    """Tests de la remontée de l'objectif pendant la résolution"""
+    
+    def test_objective_is_written_from_the_calling_thread(self):
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=make_instance())
+        solver._collect_data()
+        solver._create_constraint_model()
+        reporting_threads = []
+        
+        with mock.patch.object(solver, '_report_objective',
+                               side_effect=lambda *_: reporting_threads.append(threading.get_ident())):
+            result = solver._solve_with_progress(solver.subproblems[0])
+        
+        self.assertEqual(result['status'], cp_model.OPTIMAL)
+        self.assertEqual(set(reporting_threads), {threading.get_ident()})
+
+
+class FeasibilityTest(SimpleTestCase):
+    """Tests de l'analyse de faisabilité et de l'explication des infaisabilités"""
+    
+    def analyze(self, instance, end_date=date(2024, 9, 6)):
+        solver = TimetableSolver(None, date(2024, 9, 2), end_date, [1], instance=instance)
+        solver._collect_data()
+        solver._create_constraint_model()
+        return analyze_feasibility(
+            instance, solver.assignments, solver.feasible_rooms, solver.feasible_slots, solver.unschedulable,
+            num_weeks=solver.model_weeks
+        )
+    
+    def test_feasible_instance_has_no_diagnostic(self):
+        self.assertEqual(self.analyze(make_instance()), [])
+    
+    def test_program_larger_than_every_room(self):
+        instance = make_instance()
+        instance.student_counts = {1: 50}
+        
+        codes = [d['code'] for d in self.analyze(instance)]
+        
+        self.assertEqual(codes, ['program_capacity'])
+    
+    def test_subject_without_room_of_its_type(self):
+        instance = make_instance()
+        # TP: aucune des deux salles de cours ne convient, même assez grande
+        instance.subject_type = ['lab']
+        
+        diagnostics = self.analyze(instance)
+        
+        self.assertEqual([d['code'] for d in diagnostics], ['room_type'])
+        self.assertEqual(diagnostics[0]['details']['room_types'], ['lab'])
+    
+    def test_sessions_exceed_rooms_and_teacher_availability(self):
+        instance = make_instance()
+        # 6h -> 3 séances, pour 1 salle assez grande et 2 créneaux disponibles
+        instance.subject_hours = [6]
+        
+        codes = {d['code'] for d in self.analyze(instance)}
+        
+        self.assertEqual(codes, {'room_type_capacity', 'teacher_availability'})
+    
+    def test_multi_week_capacity_covers_total_sessions(self):
+        instance = make_instance()
+        instance.end_date = date(2024, 9, 13)
+        # 4h par semaine -> 4 séances sur 2 semaines, pour 2 créneaux disponibles par semaine
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 13), [1], instance=instance)
+        solver._collect_data()
+        solver._create_constraint_model()
+        
+        self.assertEqual(solver._check_feasibility(), [])
+        self.assertEqual(self.analyze(instance, end_date=date(2024, 9, 13)), [])
+        self.assertEqual(len(solver._solve_model()), 4)
+    
+    def test_session_longer_than_every_window(self):
+        instance = make_instance()
+        instance.subject_type = ['exam']
+        # Créneaux d'une heure séparés: aucune plage pour une séance de 2h
+        instance.slot_end = [time(9, 0), time(11, 0), time(9, 0)]
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=instance,
+                                 interval_model=True)
+        solver._collect_data()
+        solver._create_constraint_model()
+        
+        diagnostics = solver._check_feasibility()
+        
+        self.assertEqual([d['code'] for d in diagnostics], ['session_length'])
+        self.assertEqual(diagnostics[0]['details']['session_minutes'], 120)
+    
+    def test_minimal_infeasible_subset(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1]),
+                make_assignment(2, teacher_id=10, rooms=[101], slots=[1]),
+                make_assignment(3, teacher_id=11, rooms=[102], slots=[1, 2]),
+            ],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+        }
+        
+        result = solve_subproblem(subproblem, max_time_in_seconds=10, num_search_workers=1)
+        self.assertEqual(result['status'], cp_model.INFEASIBLE)
+        
+        # Même enseignant, même unique créneau: l'affectation 3 n'y est pour rien
+        self.assertEqual(
+            explain_infeasibility(subproblem, max_time_in_seconds=10),
+            [('assignment', 1), ('assignment', 2), ('teacher', 10)]
+        )
+
+
+class GreedyConstructionTest(SimpleTestCase):
+    """Tests de la construction gloutonne (indices et repli)"""
+    
+    def test_most_constrained_assignment_is_placed_first(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2]),
+                make_assignment(2, teacher_id=11, rooms=[100], slots=[1]),
+            ],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 1,
+        }
+        
+        construction = greedy_construction(subproblem)
+        
+        self.assertEqual(construction['placed'], construction['required'])
+        self.assertEqual(sorted(construction['selected']), [(1, 100, 2, 0), (2, 100, 1, 0)])
+    
+    def test_teacher_hours_limit_leaves_sessions_unplaced(self):
+        subproblem = {
+            'assignments': [make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2], sessions_needed=2)],
+            'teacher_max_hours': {10: 2},
+            'num_weeks': 1,
+        }
+        
+        construction = greedy_construction(subproblem)
+        
+        self.assertEqual((construction['placed'], construction['required']), (1, 2))
+    
+    def test_multi_week_construction_is_feasible_for_the_model(self):
+        # sessions_needed est un total sur les semaines, comme dans TimetableModel
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2], sessions_needed=4),
+                make_assignment(2, teacher_id=11, rooms=[100], slots=[1, 2], sessions_needed=2),
+            ],
+            'teacher_max_hours': {10: 20, 11: 20},
+            'num_weeks': 3,
+        }
+        
+        construction = greedy_construction(subproblem)
+        
+        self.assertEqual((construction['placed'], construction['required']), (6, 6))
+        model = TimetableModel(subproblem).build()
+        selected = set(construction['selected'])
+        for key, var in model.schedule_vars.items():
+            model.model.Add(var == (key in selected))
+        solver = cp_model.CpSolver()
+        self.assertIn(solver.Solve(model.model), (cp_model.OPTIMAL, cp_model.FEASIBLE))
+    
+    @override_settings(TIMETABLE_GREEDY_FALLBACK_VARIABLES=0)
+    def test_large_instance_falls_back_to_greedy(self):
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=make_instance())
+        solver._collect_data()
+        solver._create_constraint_model()
+        
+        solution = solver._solve_model()
+        
+        self.assertEqual(solver.stats['fallback'], 'size')
+        self.assertEqual(sorted(slot_id for _, _, slot_id, _ in solution), [1, 3])
+        self.assertEqual(solver.stats['greedy_sessions_missing'], 0)
+        self.assertEqual(solver.selected_teachers, {0: 10})
+
+
+class SolutionCacheTest(SimpleTestCase):
+    """Tests de l'empreinte canonique des générations"""
+    
+    def test_fingerprint_ignores_loading_order(self):
+        instance = make_instance()
+        reordered = make_instance()
+        reordered.program_ids = list(reversed(reordered.program_ids + [2]))
+        instance.program_ids = instance.program_ids + [2]
+        
+        self.assertEqual(
+            problem_fingerprint(instance, {'two_phase': False}),
+            problem_fingerprint(reordered, {'two_phase': False})
+        )
+    
+    def test_fingerprint_covers_data_and_parameters(self):
+        reference = problem_fingerprint(make_instance(), {'two_phase': False})
+        
+        other_teacher = make_instance()
+        other_teacher.teacher_available = [0b111]
+        
+        self.assertNotEqual(problem_fingerprint(make_instance(), {'two_phase': True}), reference)
+        self.assertNotEqual(problem_fingerprint(other_teacher, {'two_phase': False}), reference)
+
+
+class PortfolioTest(SimpleTestCase):
+    """Tests du portefeuille de configurations CP-SAT"""
+    
+    def test_winning_configuration_is_recorded(self):
+        subproblem = {
+            'assignments': [
+                make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2]),
+                make_assignment(2, teacher_id=10, rooms=[100, 101], slots=[1, 2]),
+            ],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+        }
+        configs = [
+            {'name': 'default', 'parameters': {'random_seed': 0}},
+            {'name': 'other_seed', 'parameters': {'random_seed': 7}},
+        ]
+        
+        result = solve_portfolio(subproblem, max_time_in_seconds=10, configs=configs)
+        
+        self.assertEqual(result['status'], cp_model.OPTIMAL)
+        self.assertIn(result['portfolio_config'], {'default', 'other_seed'})
+        self.assertEqual(len(result['selected']), 2)
+        self.assertEqual(result['portfolio_runs'][0]['config'], result['portfolio_config'])
+    
+    @override_settings(TIMETABLE_PORTFOLIO_START_METHOD='spawn')
+    def test_configurations_run_in_spawned_processes(self):
+        subproblem = {
+            'assignments': [make_assignment(1, teacher_id=10, rooms=[100], slots=[1, 2])],
+            'teacher_max_hours': {10: 20},
+            'num_weeks': 1,
+        }
+        configs = [{'name': 'default', 'parameters': {'random_seed': 0}}]
+        
+        result = solve_portfolio(subproblem, max_time_in_seconds=10, configs=configs)
+        
+        self.assertEqual(result['status'], cp_model.OPTIMAL)
+        self.assertEqual(result['portfolio_config'], 'default')
+    
+    def test_components_share_the_time_limit(self):
+        solver = TimetableSolver(None, date(2024, 9, 2), date(2024, 9, 6), [1], instance=make_instance(),
+                                 max_time_in_seconds=60)
+        solver.subproblems = [{'assignments': []}] * 3
+        budgets = []
+        
+        def fake_portfolio(subproblem, max_time_in_seconds, *args):
+            budgets.append(max_time_in_seconds)
+            return {'portfolio_config': 'default', 'portfolio_runs': []}
+        
+        with mock.patch('core.timetable_solver.solve_portfolio', side_effect=fake_portfolio), \
+                mock.patch.object(solver, '_report_solve_progress'):
+            solver._run_portfolio(cpu_count=2)
+        
+        # Sous-problèmes résolus instantanément: le temps non consommé passe aux suivants
+        self.assertEqual([round(budget) for budget in budgets], [20, 30, 60])
+
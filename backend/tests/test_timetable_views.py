@@ -0,0 +1,157 @@
+"""
+Tests de l'API de génération CP-SAT en arrière-plan et de réparation
+"""
+
+import os
+import json
+import django
+from django.test import TestCase
+
+# Configuration Django pour les tests
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schedule_management.settings')
+django.setup()
+
+from datetime import date
+from unittest import mock
+from rest_framework.test import APIClient
+from authentication.models import User
+from core.models import Department, Program, TimetableGeneration
+
+GENERATE_URL = '/api/core/timetable/generate/'
+REPAIR_URL = '/api/core/timetable/repair/'
+
+
+def status_url(generation_id):
+    return f'/api/core/timetable/generate/{generation_id}/status/'
+
+
+class TimetableGenerationViewTest(TestCase):
+    """Tests de POST api/core/timetable/generate/ (tâche Celery simulée)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Informatique', code='INFO')
+        cls.program = Program.objects.create(name='Licence', code='L1INFO', department=department, level='L1')
+        cls.admin = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        cls.teacher = User.objects.create(email='prof@test.local', username='prof', role='teacher')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def generate(self, **options):
+        payload = {'start_date': '2024-09-02', 'end_date': '2024-09-13', 'program_ids': [self.program.id]}
+        payload.update(options)
+        return self.client.post(GENERATE_URL, payload, format='json')
+    
+    @mock.patch('core.timetable_views.generate_timetable_task')
+    def test_generation_is_enqueued(self, task):
+        task.delay.return_value.id = 'task-1'
+        
+        response = self.generate(two_phase='true', max_time_in_seconds=30)
+        
+        self.assertEqual(response.status_code, 202, response.data)
+        generation = TimetableGeneration.objects.get(pk=response.data['generation_id'])
+        self.assertEqual(generation.task_id, 'task-1')
+        self.assertEqual(list(generation.programs.all()), [self.program])
+        self.assertEqual(response.data['status_url'], status_url(generation.id))
+        generation_id, options = task.delay.call_args.args
+        self.assertEqual(generation_id, generation.id)
+        self.assertTrue(options['two_phase'])
+        self.assertEqual(options['max_time_in_seconds'], 30.0)
+    
+    @mock.patch('core.timetable_views.generate_timetable_task')
+    def test_only_admins_can_generate(self, task):
+        self.client.force_authenticate(self.teacher)
+        
+        response = self.generate()
+        
+        self.assertEqual(response.status_code, 403)
+        task.delay.assert_not_called()
+        self.assertFalse(TimetableGeneration.objects.exists())
+    
+    @mock.patch('core.timetable_views.generate_timetable_task')
+    def test_invalid_solver_budget_is_rejected(self, task):
+        response = self.generate(max_time_in_seconds='nan')
+        
+        self.assertEqual(response.status_code, 400)
+        task.delay.assert_not_called()
+    
+    @mock.patch('core.timetable_views.generate_timetable_task')
+    def test_enqueue_failure_marks_generation_failed(self, task):
+        task.delay.side_effect = ConnectionError('broker down')
+        
+        response = self.generate()
+        
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(TimetableGeneration.objects.get().status, 'failed')
+
+
+class TimetableGenerationStatusViewTest(TestCase):
+    """Tests de GET api/core/timetable/generate/<id>/status/"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email='admin@test.local', username='admin', role='admin')
+        cls.teacher = User.objects.create(email='prof@test.local', username='prof', role='teacher')
+        cls.generation = TimetableGeneration.objects.create(
+            generated_by=cls.admin, status='success', start_date=date(2024, 9, 2), end_date=date(2024, 9, 13),
+            current_step='done', progress=100, total_sessions_planned=12,
+            execution_log=json.dumps({'status': 'OPTIMAL'})
+        )
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_status_reports_progress_and_stats(self):
+        self.client.force_authenticate(self.admin)
+        
+        response = self.client.get(status_url(self.generation.id))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['progress'], 100)
+        self.assertEqual(response.data['total_sessions_planned'], 12)
+        self.assertEqual(response.data['stats'], {'status': 'OPTIMAL'})
+    
+    def test_other_users_cannot_read_the_generation(self):
+        self.client.force_authenticate(self.teacher)
+        
+        response = self.client.get(status_url(self.generation.id))
+        
+        self.assertEqual(response.status_code, 403)
+
+
+class TimetableRepairViewTest(TestCase):
+    """Tests de POST api/core/timetable/repair/ (réparation simulée)"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email='admin@test.local', username='admin', role='admin')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    @mock.patch('core.timetable_views.repair_timetable')
+    def test_repair_reports_moved_sessions(self, repair):
+        repair.return_value = {
+            'success': True, 'moved': [{'schedule_id': 4}], 'unresolved': [], 'stats': {}, 'generation_id': 7
+        }
+        
+        response = self.client.post(
+            REPAIR_URL, {'teacher_id': 3, 'start_date': '2024-09-02', 'end_date': '2024-09-06'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['generation_id'], 7)
+        repair.assert_called_once_with(
+            self.admin.id, schedule_ids=[], teacher_id=3, room_id=None,
+            start_date=date(2024, 9, 2), end_date=date(2024, 9, 6)
+        )
+    
+    @mock.patch('core.timetable_views.repair_timetable')
+    def test_repair_requires_a_disruption(self, repair):
+        response = self.client.post(REPAIR_URL, {}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        repair.assert_not_called()